@@ -39,7 +39,12 @@ import http.client
 from urllib.parse import urlencode, quote
 import logging
 import time
-from threading import Timer
+import heapq
+from copy import copy
+from functools import lru_cache
+from itertools import count
+from types import MappingProxyType
+from threading import Thread, Condition, Lock
 
 # noinspection PyProtectedMember
 from .version import _Version
@@ -56,11 +61,20 @@ from . import httpclient
 from . import namespace
 from . import mapi
 from . import pathbuilder
+from . import pool
+from . import download
+from . import metrics
+from .metrics import Metrics
+from . import hooks
+from . import retry
+from .retry import RetryPolicy
+from . import limit
+from . import hedge
 
 
 __all__ = ['Target', 'Connection', 'BaseAuthorization', 'DummyAuthorization',
            'NativeAuthorization', 'NativeADAuthorization',
-           'LocalSwiftAuthorization', 'HcpsdkError',
+           'LocalSwiftAuthorization', 'Timings', 'HcpsdkError',
            'HcpsdkCantConnectError', 'HcpsdkTimeoutError',
            'HcpsdkCertificateError', 'HcpsdkReplicaInitError']
 
@@ -69,6 +83,21 @@ logging.getLogger('hcpsdk').addHandler(logging.NullHandler())
 version = _Version()
 
 RFC3986_reserved_chars = ' :?#[]@!$&\'()*+,;='
+_RESERVED = frozenset(RFC3986_reserved_chars)
+
+
+def _encodesascii(s):
+    """
+    Check if *s* is pure ascii - for Python < 3.7, lacking *str.isascii()*.
+    """
+    try:
+        s.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+_isascii = getattr(str, 'isascii', _encodesascii)
 
 class HcpsdkError(Exception):
     """
@@ -162,6 +191,12 @@ RS_WRITE_ON_FAILOVER = 8  # allow to write to replica when failed over
 # The ports used for https
 SSL_PORTS = [443, 8000, 9090]
 
+# Idle connections closed by HCP after less than MIN_KEEPALIVE seconds don't
+# tell its keep-alive interval (a node restart, for example); once it is
+# known, idle Connections are closed after KEEPALIVE_MARGIN times of it.
+MIN_KEEPALIVE = 1.0
+KEEPALIVE_MARGIN = 0.8
+
 
 class BaseAuthorization(object):
     """
@@ -359,7 +394,9 @@ class Target(object):
 
     def __init__(self, fqdn, authorization, port=443, dnscache=False,
                  sslcontext=SSL_NOVERIFY, interface=I_NATIVE,
-                 replica_fqdn=None, replica_strategy=None):
+                 replica_fqdn=None, replica_strategy=None, strategy=None,
+                 breaker=None, metrics=True, retrypolicy=None, limiter=None,
+                 hedging=None):
         """
         :param fqdn:                ([namespace.]tenant.hcp.loc)
         :param authorization:       an instance of one of BaseAuthorization's subclasses
@@ -370,10 +407,44 @@ class Target(object):
         :param sslcontext:          the context used to handle https requests; defaults to
                                     no certificate verification
         :param interface:           the HCP interface to use (I_NATIVE)
-        :param replica_fqdn:        the replica HCP's FQDN
-        :param replica_strategy:    OR'ed combination of the RS_* modes
-        :raises:                    *ips.IpsError* if DNS query fails, *HcpsdkError* in all
-                                    other fault cases
+        :param replica_fqdn:        the replica HCP's FQDN; the replica is
+                                    set up as a *Target* of its own, with
+                                    its own IP address cache, circuit
+                                    breaker, concurrency limit and metrics
+        :param replica_strategy:    OR'ed combination of the RS_* modes,
+                                    telling which Requests
+                                    *Connection*\\ s may send to the
+                                    replica
+        :param strategy:            an *hcpsdk.ips.Strategy* object used to
+                                    select the IP address for new
+                                    *Connection*\\ s; defaults to
+                                    round-robin
+        :param breaker:             an *hcpsdk.ips.CircuitBreaker* object
+                                    used to evict IP addresses that keep
+                                    failing; defaults to 3 failures / 30
+                                    seconds
+        :param metrics:             if True, collect latency histograms and
+                                    counters in *Target.metrics*
+        :param retrypolicy:         an *hcpsdk.retry.RetryPolicy* object
+                                    shared by all *Connection*\\ s using
+                                    this target; defaults to exponential
+                                    backoff from 50 ms, with jitter and a
+                                    20% retry budget
+        :param limiter:             an *hcpsdk.limit.Limiter* object
+                                    limiting the Requests in flight over all
+                                    *Connection*\\ s using this target,
+                                    adapting to the load HCP can take;
+                                    unlimited if not given
+        :param hedging:             an *hcpsdk.hedge.HedgePolicy* object;
+                                    if given, slow GET and HEAD Requests are
+                                    sent to a second IP address, too
+        :raises:                    *ips.IpsError* if DNS query fails,
+                                    *HcpsdkReplicaInitError* if the setup
+                                    of the replica failed, *HcpsdkError* in
+                                    all other fault cases
+
+        ..  versionchanged:: 0.9.6.0
+            *replica_fqdn* and *replica_strategy* are implemented.
         """
         self.logger = logging.getLogger(__name__ + '.Target')
         self.__fqdn = fqdn
@@ -381,17 +452,31 @@ class Target(object):
         self.__dnscache = dnscache
         self.__sslcontext = sslcontext
         self.__headers = {'Host': self.__fqdn}
+        self.__baseheaders = None  # Host + authorization, read-only
+        self.__authheaders = None  # the authorization headers used for it
         self.__port = port
         self.__ssl = self.__port in SSL_PORTS
+        self.__tlssessions = {}  # the latest ssl.SSLSession per IP address
+        self.__keepalive = None  # HCP's keep-alive interval, once learned
+        self.__keptalive = 0.0  # the longest idle time a connection survived
 
         self.__interface = interface
         self.__replica = None  # placeholder for a replica's *Target* object
         self.__replica_strategy = replica_strategy
+        self.__turns = count()  # alternates reads/writes allowed on both
+        self.__pool = None  # the ConnectionPool, created on first use
+        self.__poollock = Lock()
+        self.__metrics = Metrics(self.__fqdn) if metrics else None
+        self.__retrypolicy = retrypolicy or RetryPolicy()
+        self.__limiter = limiter
+        self.__hedging = hedging
+        self.__hooks = hooks.Hooks()
 
         # instantiate an IP address circler for this Target
         try:
             self.ipaddrqry = ips.Circle(self.__fqdn, port=self.__port,
-                                        dnscache=self.__dnscache)
+                                        dnscache=self.__dnscache,
+                                        strategy=strategy, breaker=breaker)
         except ips.IpsError as e:
             self.logger.debug(e, exc_info=True)
             raise ips.IpsError(e)
@@ -404,12 +489,55 @@ class Target(object):
 
         # If we have *replica_fqdn*, try to init its *Target* object
         if replica_fqdn:
-            # try:
-            #     self.__replica = Target(replica_fqdn, user, password,
-            #                           self.__port, interface=self.__interface)
-            # except HcpsdkError as e:
-            #     raise HcpsdkReplicaInitError(e)
-            raise HcpsdkReplicaInitError('Error: not yet implemented')
+            try:
+                self.__replica = Target(replica_fqdn, authorization,
+                                        port=self.__port,
+                                        dnscache=self.__dnscache,
+                                        sslcontext=self.__sslcontext,
+                                        interface=self.__interface,
+                                        strategy=copy(self.ipaddrqry.strategy),
+                                        breaker=copy(self.ipaddrqry.breaker),
+                                        metrics=metrics,
+                                        retrypolicy=self.__retrypolicy,
+                                        limiter=copy(self.__limiter),
+                                        hedging=self.__hedging)
+            except (ips.IpsError, HcpsdkError) as e:
+                raise HcpsdkReplicaInitError(e)
+            self.logger.debug('Replica initialized: {} - replica_strategy = {}'
+                              .format(replica_fqdn, self.__replica_strategy))
+
+    def _select(self, method, current=None, avoid=None):
+        """
+        Select the side - this *Target* or its replica - a Request is to be
+        sent to, as allowed by the replica strategy. A side is considered
+        to be down if the circuits of all its IP addresses are open.
+
+        :param method:  the Request's HTTP method
+        :param current: the side the *Connection* is connected to, if any;
+                        it's kept as long as it is allowed and up
+        :param avoid:   a side that just failed, to be avoided if possible
+        :return:        this *Target* or its replica
+        """
+        replica = self.__replica
+        if not replica or not self.__replica_strategy:
+            return self
+        if method in ('GET', 'HEAD'):
+            allowed, failover = RS_READ_ALLOWED, RS_READ_ON_FAILOVER
+        else:
+            allowed, failover = RS_WRITE_ALLOWED, RS_WRITE_ON_FAILOVER
+        if not self.__replica_strategy & (allowed | failover):
+            return self
+
+        up = [side for side in (self, replica)
+              if side is not avoid and side.ipaddrqry.available()]
+        if not self.__replica_strategy & allowed:
+            # the replica is used only while this Target is down
+            return self if self in up or replica not in up else replica
+        if current in up:
+            return current
+        if len(up) == 2:
+            return up[next(self.__turns) % 2]
+        return up[0] if up else self
 
     def getaddr(self):
         """
@@ -420,6 +548,64 @@ class Target(object):
         # noinspection PyProtectedMember
         return self.ipaddrqry._addr()
 
+    def prewarm(self, n, wait=False):
+        """
+        Open *Connection*\\ s in *Target.pool* in the background, spread
+        across the IP addresses, so that the next *n* Requests done through
+        the pool don't need to connect first.
+
+        :param n:       the number of connected, idle *Connection*\\ s wanted
+        :param wait:    if True, return not before the *Connection*\\ s are
+                        open
+        :return:        the number of *Connection*\\ s opened if *wait* is
+                        True, else *None*
+
+        ..  versionadded:: 0.9.6.0
+        """
+        return self.pool.prewarm(n, wait=wait)
+
+    def _idled(self, idle, closed):
+        """
+        Learn HCP's keep-alive interval from idle connections about to be
+        re-used: an idle connection closed by HCP tells that the interval
+        is shorter than the time it was idle, a connection that survived
+        tells it's longer.
+
+        :param idle:    the time (secs) the connection was idle
+        :param closed:  True if HCP had closed the connection
+        """
+        if not closed:
+            if idle > self.__keptalive:
+                self.__keptalive = idle
+        elif idle >= MIN_KEEPALIVE and idle > self.__keptalive and \
+                (self.__keepalive is None or idle < self.__keepalive):
+            self.__keepalive = idle
+            self.logger.debug('learned keep-alive interval for {}: {:.1f} '
+                              'secs'.format(self.__fqdn, idle))
+
+    def _tlssession(self, address):
+        """
+        Get the TLS session cached for an IP address.
+
+        :param address: the IP address
+        :return:        an *ssl.SSLSession* or *None*
+        """
+        return self.__tlssessions.get(address)
+
+    def _settlssession(self, address, session):
+        """
+        Cache the TLS session of a connection to an IP address, to be offered
+        for resumption by the next connection to it.
+
+        :param address: the IP address
+        :param session: an *ssl.SSLSession*, or *None* to drop the cached one
+        """
+        if session is None or self.__sslcontext is None:
+            # sessions can't be resumed with an SSL context of their own
+            self.__tlssessions.pop(address, None)
+        else:
+            self.__tlssessions[address] = session
+
     # properties for the read-only attributes
     def __getfqdn(self):
         return self.__fqdn
@@ -452,12 +638,88 @@ class Target(object):
                     'The list of resolved IP addresses for this target (r/o)')
 
     def __getheaders(self):
-        tmp = self.__headers.copy()
-        tmp.update(self.__authorization._getheaders())
-        return tmp
+        return dict(self._baseheaders)
     headers = property(__getheaders, None, None,
                     'The calculated authorization headers (r/o)')
 
+    def __getbaseheaders(self):
+        # noinspection PyProtectedMember
+        auth = self.__authorization._getheaders()
+        if auth is not self.__authheaders:
+            tmp = self.__headers.copy()
+            tmp.update(auth)
+            self.__baseheaders = MappingProxyType(tmp)
+            self.__authheaders = auth
+        return self.__baseheaders
+    _baseheaders = property(__getbaseheaders, None, None,
+                            'The headers sent with every Request, as a '
+                            'read-only mapping, rebuilt only if the '
+                            'authorization headers got replaced (r/o)')
+
+    def __getkeepalive(self):
+        return self.__keepalive
+    keepalive = property(__getkeepalive, None, None,
+                         'HCP\'s keep-alive interval (secs), as learned from '
+                         'idle connections closed by HCP, or *None* as long '
+                         'as unknown; idle *Connection*\\ s are closed before '
+                         'it runs out (r/o)\n\n'
+                         '.. versionadded:: 0.9.6.0')
+
+    def __getpool(self):
+        with self.__poollock:
+            if not self.__pool:
+                self.__pool = pool.ConnectionPool(self)
+            return self.__pool
+    def __setpool(self, value):
+        if value.target is not self:
+            raise HcpsdkError('ConnectionPool initialized for a different '
+                              'Target')
+        with self.__poollock:
+            if self.__pool and self.__pool is not value:
+                self.__pool.close()
+            self.__pool = value
+    pool = property(__getpool, __setpool, None,
+                    'The *hcpsdk.pool.ConnectionPool* shared by all threads '
+                    'using this target; created with default settings on '
+                    'first access, if not assigned before (r/w)\n\n'
+                    '.. versionadded:: 0.9.6.0')
+
+    def __getmetrics(self):
+        return self.__metrics
+    metrics = property(__getmetrics, None, None,
+                       'The *hcpsdk.metrics.Metrics* collected for this '
+                       'target by all *Connection*\\ s using it, or *None* '
+                       'if disabled (r/o)\n\n'
+                       '.. versionadded:: 0.9.6.0')
+
+    def __gethooks(self):
+        return self.__hooks
+    hooks = property(__gethooks, None, None,
+                     'The *hcpsdk.hooks.Hooks* called for all *Connection*\\ '
+                     's using this target (r/o)\n\n'
+                     '.. versionadded:: 0.9.6.0')
+
+    def __getretrypolicy(self):
+        return self.__retrypolicy
+    retrypolicy = property(__getretrypolicy, None, None,
+                           'The *hcpsdk.retry.RetryPolicy* used by all '
+                           '*Connection*\\ s using this target (r/o)\n\n'
+                           '.. versionadded:: 0.9.6.0')
+
+    def __getlimiter(self):
+        return self.__limiter
+    limiter = property(__getlimiter, None, None,
+                       'The *hcpsdk.limit.Limiter* shared by all '
+                       '*Connection*\\ s using this target, if any (r/o)\n\n'
+                       '.. versionadded:: 0.9.6.0')
+
+    def __gethedging(self):
+        return self.__hedging
+    hedging = property(__gethedging, None, None,
+                       'The *hcpsdk.hedge.HedgePolicy* used by all '
+                       '*Connection*\\ s using this target, if any (r/o)\n\n'
+                       '.. versionadded:: 0.9.6.0')
+
     def __getreplica(self):
         return self.__replica
     replica = property(__getreplica, None, None,
@@ -470,16 +732,173 @@ class Target(object):
 
     def __repr__(self):
         return('{}({}, {}, port={}, dnscache={}, sslcontext={}, interface={}, '
-               'replica_fqdn={}, replica_strategy={})'
+               'replica_fqdn={}, replica_strategy={}, strategy={}, '
+               'breaker={}, metrics={}, retrypolicy={}, limiter={}, '
+               'hedging={})'
                .format(__class__.__name__, self.__fqdn, repr(self.__authorization), self.__port,
                        self.__dnscache, repr(self.sslcontext),
-                       self.__interface, self.__replica,
-                       self.__replica_strategy))
+                       self.__interface,
+                       self.__replica.fqdn if self.__replica else None,
+                       self.__replica_strategy,
+                       repr(self.ipaddrqry.strategy),
+                       repr(self.ipaddrqry.breaker),
+                       self.__metrics is not None,
+                       repr(self.__retrypolicy), repr(self.__limiter),
+                       repr(self.__hedging)))
 
     def __str__(self):
         return "{} initialized for {}".format(__class__.__name__, self.__fqdn)
 
 
+class _IdleReaper(object):
+    """
+    Closes *Connection*\\ s that have been idle for their *idletime*.
+
+    A single thread serves all *Connection*\\ s of the process, using a heap
+    of idle deadlines, instead of starting a *threading.Timer* per request.
+    Canceled deadlines are not removed from the heap, but just marked as
+    canceled (and skipped when they come up), which keeps both, scheduling
+    and canceling at O(log n). The thread exits once no *Connection* has
+    been scheduled for *linger* seconds, and is restarted on demand.
+    """
+
+    def __init__(self, linger=30.0):
+        """
+        :param linger:  the time (secs) the thread waits for new work
+                        before it exits
+        """
+        self.logger = logging.getLogger(__name__ + '._IdleReaper')
+        self.__linger = linger
+        self.__cond = Condition()
+        self.__heap = []  # [deadline, sequence #, Connection or None]
+        self.__seq = count()
+        self.__canceled = 0  # number of canceled entries in the heap
+        self.__thread = None
+
+    def schedule(self, con, idletime):
+        """
+        Schedule *con* to be closed after *idletime* seconds.
+
+        :param con:         the *Connection* to close
+        :param idletime:    the idle time (secs)
+        :return:            the heap entry, to be handed to *cancel()*
+        """
+        entry = [time.monotonic() + idletime, next(self.__seq), con]
+        with self.__cond:
+            heapq.heappush(self.__heap, entry)
+            if not self.__thread:
+                self.__thread = Thread(target=self.__run,
+                                       name='hcpsdk-idlereaper', daemon=True)
+                self.__thread.start()
+            elif self.__heap[0] is entry:
+                self.__cond.notify()  # new earliest deadline
+        return entry
+
+    def cancel(self, entry):
+        """
+        Cancel a scheduled close.
+
+        :param entry:   the heap entry returned by *schedule()*
+        """
+        with self.__cond:
+            if entry[2]:
+                entry[2] = None
+                self.__canceled += 1
+                # if most of the heap is garbage, clean it up
+                if self.__canceled > 1024 and \
+                        self.__canceled > len(self.__heap) // 2:
+                    self.__heap = [e for e in self.__heap if e[2]]
+                    heapq.heapify(self.__heap)
+                    self.__canceled = 0
+
+    def __run(self):
+        """
+        The reaper thread - wait for the next deadline, close the
+        *Connection* if it's still scheduled.
+        """
+        with self.__cond:
+            while True:
+                while self.__heap and not self.__heap[0][2]:
+                    heapq.heappop(self.__heap)
+                    self.__canceled -= 1
+                if not self.__heap:
+                    if not self.__cond.wait(self.__linger) and \
+                            not self.__heap:
+                        self.__thread = None  # schedule() starts a new one
+                        return
+                    continue
+                wait = self.__heap[0][0] - time.monotonic()
+                if wait > 0:
+                    self.__cond.wait(wait)
+                    continue
+                entry = heapq.heappop(self.__heap)
+                con = entry[2]
+                entry[2] = None
+                self.__cond.release()
+                try:
+                    # noinspection PyProtectedMember
+                    con._idletimeout(entry)
+                except Exception:
+                    self.logger.exception('closing idle Connection failed')
+                finally:
+                    self.__cond.acquire()
+
+    def __len__(self):
+        with self.__cond:
+            return len(self.__heap) - self.__canceled
+
+    def __getalive(self):
+        with self.__cond:
+            return self.__thread is not None
+    alive = property(__getalive, None, None,
+                     'True while the reaper thread is running (r/o)')
+
+
+# the process-wide reaper for idle Connections
+_reaper = _IdleReaper()
+
+
+class Timings(object):
+    """
+    The time (in seconds, measured with *time.perf_counter()*) the phases of
+    a single Request took. Phases that didn't take place (no new connection
+    was needed, no TLS with http, ...) are 0.0. If the Request was retried,
+    the times for acquiring an IP address, connecting and the TLS handshake
+    are summed up over all attempts.
+
+    ..  versionadded:: 0.9.6.0
+    """
+
+    def __init__(self, method=None, url=None):
+        """
+        :param method:  the Request's http method
+        :param url:     the Request's url
+        """
+        self.method = method
+        self.url = url
+        self.address = None  # the IP address the Request was sent to
+        self.retries = 0  # the number of retries needed
+        self.acquire = 0.0  # acquiring a permit and an IP address
+        self.connect = 0.0  # the TCP connect
+        self.tls = 0.0  # the TLS handshake
+        self.send = 0.0  # sending the Request (incl. the body)
+        self.ttfb = 0.0  # waiting for the Response (time to first byte)
+        self.transfer = 0.0  # reading the Response body
+
+    def __gettotal(self):
+        return (self.acquire + self.connect + self.tls + self.send +
+                self.ttfb + self.transfer)
+    total = property(__gettotal, None, None,
+                     'The sum of all phases (r/o)')
+
+    def __repr__(self):
+        return ('{}({} {} @ {}: acquire={:.6f}, connect={:.6f}, tls={:.6f}, '
+                'send={:.6f}, ttfb={:.6f}, transfer={:.6f}, retries={})'
+                .format(__class__.__name__, self.method, self.url,
+                        self.address, self.acquire, self.connect, self.tls,
+                        self.send, self.ttfb, self.transfer, self.retries))
+
+
 class Connection(object):
     """
     This class represents a Connection to HCP,
@@ -489,10 +908,14 @@ class Connection(object):
     # noinspection PyShadowingNames
     def __init__(self, target, timeout=30, idletime=30, retries=0,
                  debuglevel=0, sock_keepalive=False,
-                 tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3):
+                 tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3,
+                 blocksize=httpclient.BLOCKSIZE, ontimings=None,
+                 connect_timeout=None, firstbyte_timeout=None, deadline=None):
         """
         :param target:          an initialized Target object
-        :param timeout:         the timeout for this Connection (secs)
+        :param timeout:         the timeout for this Connection (secs); it
+                                applies to sending a Request and to each
+                                single read of a Response
         :param idletime:        the time the Connection shall stay persistence
                                 when idle (secs)
         :param retries:         the number of retries until giving up on a
@@ -503,6 +926,20 @@ class Connection(object):
         :param tcp_keepalive:   idle time used when SO_KEEPALIVE is enable
         :param tcp_keepintvl:   interval between keepalives
         :param tcp_keepcnt:     number of keepalives before close
+        :param blocksize:       the size of the blocks a request body is sent
+                                in (files are sent using *os.sendfile()*
+                                with http, and from a memory map in blocks
+                                of *blocksize* with https)
+        :param ontimings:       a callable called with a *Timings* object
+                                each time a Request has been completed
+                                (that is, its Response has been read
+                                completely)
+        :param connect_timeout: the timeout for the TCP connect and the TLS
+                                handshake (secs); defaults to *timeout*
+        :param firstbyte_timeout:   the time to wait for the first byte of
+                                a Response (secs); defaults to *timeout*
+        :param deadline:        the default for *request()*'s *deadline*;
+                                *None* means no deadline
 
         *Connection()* retries *request()s* if:
             a)  the underlying connection has been closed by HCP before
@@ -513,6 +950,17 @@ class Connection(object):
                 of IP addresses, a fresh IP address is acquired from the cache
                 and the connection is setup from scratch.
 
+        Before an idle connection is re-used, it's checked (without
+        blocking) if HCP has closed it meanwhile; if so, it's re-opened right
+        away, without a failed Request or a retry. From these closes, the
+        *Target* learns HCP's keep-alive interval (see *Target.keepalive*);
+        once known, idle connections are closed before it runs out, even if
+        *idletime* is longer.
+
+        Which errors (and HTTP status codes) are retried, how long to wait
+        between retries and how many retries a *Target* can afford in total
+        is decided by the *Target*'s *hcpsdk.retry.RetryPolicy*.
+
         You should rarely need this, but if you have a device in the data path
         that limits the time an idle connection can be open, this might be of
         help:
@@ -525,6 +973,19 @@ class Connection(object):
             end doesn't answer.  See ``man tcp`` for the details.
 
             ..  versionadded:: 0.9.4.3
+
+        A Request's *deadline* bounds the time it takes in total - including
+        retries, the time waiting between them and reading the Response. The
+        timeouts of the single steps are cut to the time left, retries that
+        wouldn't make it in time are given up, and once the deadline has
+        passed, *HcpsdkTimeoutError* is raised. So, the time a Request may
+        take is *deadline*, not *retries* times *timeout*.
+
+        ..  versionchanged:: 0.9.6.0
+            Added *blocksize* and *ontimings*; retries back off as told by
+            the *Target*'s *RetryPolicy*; stale connections are detected
+            before re-use; added *connect_timeout*, *firstbyte_timeout* and
+            *deadline*.
         """
         self.logger = logging.getLogger(__name__ + '.Connection')
 
@@ -534,8 +995,14 @@ class Connection(object):
         #################
 
         self.__target = target  # an initialized Target object
+        self.__side = target  # the Target in use - *target* or its replica
+        self.__replicated = bool(target.replica and target.replica_strategy)
         self.__address = None  # the assigned IP address to use
         self.__timeout = timeout  # the timeout for this Connection (secs)
+        self.__connecttimeout = connect_timeout or timeout
+        self.__firstbyte = firstbyte_timeout or timeout
+        self.__deadline = deadline  # the default deadline of a Request (secs)
+        self.__end = None  # the deadline of the Request in flight (monotonic)
         self.__idletime = float(idletime)  # the time the Connection shall stay open since last usage (secs)
         self.__debuglevel = debuglevel  # 0..9 -see-> http.client.HTTP[S]connetion
         self.__retries = retries  # the number of retries until giving up on a Request
@@ -543,97 +1010,377 @@ class Connection(object):
         self.tcp_keepalive = tcp_keepalive
         self.tcp_keepintvl = tcp_keepintvl
         self.tcp_keepcnt = tcp_keepcnt
+        self.blocksize = blocksize
+        self.ontimings = ontimings
 
         self.__sslcontext = self.__target.sslcontext
         self.__con = None  # http.client.HTTP[S]Connection object
         self._response = None
 
-        self.__connect_time = 0.0  # record the time the connect() call took
-        self.__service_time1 = 0.0  # the time a single step took (connect, 1st read, ...)
+        self.__connect_time = 0.0  # the time the TCP connect and TLS handshake took
+        self.__service_time1 = 0.0  # the time a single step took (send, 1st read, ...)
         self.__service_time2 = 0.0  # the time a Request took incl. all reads, but w/o connect
-
-        self.idletimer = None  # used to hold a threading.Timer() object
-
-        self.logger.log(logging.DEBUG,
-                        'Connection object initialized: IP {} ({}) - timeout: '
-                        '{} - idletime: {} - retries: {}'
-                        .format(self.__address, self.__target.fqdn,
-                                self.__timeout, self.__idletime,
-                                self.__retries))
-        if self.__sslcontext:
+        self.__timings = Timings()  # the phases of the last Request
+        self.__metrics = self.__target.metrics
+        self.__sent = 0  # the body bytes sent with the last Request
+        self.__received = 0  # the body bytes received for the last Request
+        self.__opened = False  # if a connection has been opened before
+        self.__tlsnew = False  # True until a new TLS session is cached
+        self.__hooks = hooks.Hooks()
+        self.__targethooks = self.__target.hooks
+        self.__policy = self.__target.retrypolicy
+        self.__limiter = self.__target.limiter
+        self.__hedging = self.__target.hedging
+        self.__permit = None  # the limiter's permit held by this Connection
+        self.__requesting = False  # True while request() is running
+        self.__r_t = 0.0  # the time the Request in flight was started
+
+        self.idletimer = None  # used to hold an idle reaper entry
+        self.__idlesince = None  # when the Connection became idle
+        self.__inflight = None  # the IP address of a Request in flight
+
+        if self.logger.isEnabledFor(logging.DEBUG):
             self.logger.log(logging.DEBUG,
-                            'SSLcontext = {}'.format(self.__sslcontext))
+                            'Connection object initialized: IP {} ({}) - '
+                            'timeout: {} - idletime: {} - retries: {}'
+                            .format(self.__address, self.__side.fqdn,
+                                    self.__timeout, self.__idletime,
+                                    self.__retries))
+            if self.__sslcontext:
+                self.logger.log(logging.DEBUG,
+                                'SSLcontext = {}'.format(self.__sslcontext))
 
     def _set_idletimer(self):
         """
-        Create and start a timer
+        Schedule the Connection to be closed after *idletime*
         """
         self._cancel_idletimer()  # as a prevention, cancel a running timer
-        self.idletimer = Timer(self.__idletime, self.__cancel_idletimer)
-        self.idletimer.start()
-        # self.logger.log(logging.DEBUG, 'idletimer started: {}'.format(self.idletimer))
+        idletime = self.__idletime
+        keepalive = self.__side.keepalive
+        if keepalive and keepalive * KEEPALIVE_MARGIN < idletime:
+            idletime = keepalive * KEEPALIVE_MARGIN
+        self.__idlesince = time.monotonic()
+        self.idletimer = _reaper.schedule(self, idletime)
 
     def _cancel_idletimer(self):
         """
         Cancel an active Connection keep-alive timer - manually called
         """
         if self.idletimer:
-            self.idletimer.cancel()
-            # self.logger.log(logging.DEBUG, 'idletimer canceled: {}'.format(self.idletimer))
+            _reaper.cancel(self.idletimer)
+            self.idletimer = None
+
+    def _idletimeout(self, entry):
+        """
+        Close the Connection, as *idletime* has passed - called by the
+        idle reaper.
+
+        :param entry:   the idle reaper's entry that timed out
+        """
+        if self.idletimer is entry:
             self.idletimer = None
-        # else:
-        #     self.logger.log(logging.DEBUG,
-        #                     'tried to cancel a non-existing idletimer (pretty OK)'.format(self.idletimer))
+            self.close()
+            self.logger.log(logging.DEBUG, 'idletimer timed out')
 
-    def __cancel_idletimer(self):
+    def _check_idletimer(self):
         """
-        Cancel an active Connection keep-alive timer - auto-called if timer
-        has passed
+        Close the Connection if *idletime* has passed, but the idle reaper
+        didn't get to it, yet, then cancel the idle timer.
         """
         if self.idletimer:
-            self.idletimer.cancel()
+            if self.idletimer[0] <= time.monotonic():
+                self.close()
+                self.logger.log(logging.DEBUG, 'idletimer expired')
+            else:
+                self._cancel_idletimer()
+
+    def _started(self):
+        """
+        Report a Request in flight to the Target's IP address cache.
+        """
+        self._finished()
+        self.__inflight = self.__address
+        self.__side.ipaddrqry.started(self.__inflight)
+
+    def _finished(self, service_time=None):
+        """
+        Report the Request in flight (if any) to be finished.
+
+        :param service_time:    the time the Request took, *None* if it
+                                failed or wasn't read completely
+        """
+        if self.__inflight:
+            self.__side.ipaddrqry.finished(self.__inflight, service_time)
+            self.__inflight = None
+            if service_time is not None:
+                if self.__permit is not None:
+                    self._release(self.__timings.send + self.__timings.ttfb,
+                                  overload=self._response.status == 503)
+                if self.__metrics:
+                    self.__metrics.record(self.__timings,
+                                          self._response.status,
+                                          self.__sent, self.__received)
+                if self.ontimings:
+                    try:
+                        self.ontimings(self.__timings)
+                    except Exception:
+                        self.logger.exception('ontimings callback failed')
+
+    def __acquire(self, timings):
+        """
+        Acquire a permit from the Target's *Limiter* for the Request to be
+        sent, waiting up to *timeout* seconds.
+        """
+        self._release()  # in case the former Request wasn't read completely
+        a_t = time.perf_counter()
+        self.__permit = self.__limiter.acquire(
+            self.__cut(self.__timeout))
+        timings.acquire += time.perf_counter() - a_t
+        if self.__permit is None:
+            raise HcpsdkTimeoutError('concurrency limit ({}) reached - {}'
+                                     .format(self.__limiter.limit,
+                                             timings.url))
+
+    def _release(self, rtt=None, overload=False):
+        """
+        Release the permit held for the Request in flight (if any), feeding
+        its outcome back to the Target's *Limiter*.
+
+        :param rtt:         the Request's latency (secs), *None* if unknown
+        :param overload:    *True* if the Request signaled overload
+        """
+        if self.__permit is not None:
+            permit, self.__permit = self.__permit, None
+            self.__limiter.release(permit, rtt, overload)
+
+    def _failed(self):
+        """
+        Report the IP address in use to have failed, so that the Target's
+        IP address cache may evict it for a while.
+        """
+        self._finished()
+        if self.__address:
+            self.__side.ipaddrqry.failed(self.__address)
+            if self.__side.ssl:
+                self.__side._settlssession(self.__address, None)
+
+    def _fire(self, name, **kwargs):
+        """
+        Fire an event, if callbacks are registered for it.
+
+        :param name:    the event (one of *hcpsdk.hooks.EVENTS*)
+        :param kwargs:  the *hcpsdk.hooks.Event*'s attributes
+        """
+        callbacks = (getattr(self.__targethooks, name) +
+                     getattr(self.__hooks, name))
+        if callbacks:
+            event = hooks.Event(name, self, **kwargs)
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    self.logger.exception('{} hook failed'.format(name))
+
+    def __cut(self, timeout):
+        """
+        Cut a timeout to the time left until the deadline of the Request in
+        flight (if any).
+
+        :param timeout: the timeout (secs)
+        :return:        the timeout to use
+        :raises:        *HcpsdkTimeoutError* if the deadline has passed
+        """
+        if self.__end is None:
+            return timeout
+        remaining = self.__end - time.monotonic()
+        if remaining <= 0:
+            raise HcpsdkTimeoutError('deadline exceeded - {}'
+                                     .format(self.__timings.url))
+        return remaining if timeout is None or remaining < timeout \
+            else timeout
+
+    def __checkdeadline(self):
+        """
+        Called on a timeout - if it was caused by the deadline of the
+        Request in flight (rather than by HCP), close the underlying
+        connection and give up, without blaming the IP address.
+
+        :raises:    *HcpsdkTimeoutError* if the deadline has passed
+        """
+        if self.__end is not None and time.monotonic() >= self.__end:
             self.close()
-            self.logger.log(logging.DEBUG,
-                            'idletimer timed out: {}'.format(self.idletimer))
-            self.idletimer = None
+            raise HcpsdkTimeoutError('deadline exceeded - {}'
+                                     .format(self.__timings.url))
+
+    def __settimeout(self, timeout):
+        """
+        Set the socket timeout for the next step of the Request in flight,
+        cut to its deadline.
+        """
+        sock = self.__con.sock
+        if sock:
+            sock.settimeout(self.__cut(timeout))
+
+    def __checkstale(self):
+        """
+        Close the underlying connection if HCP has closed it while it was
+        idle, so that the Request connects right away, instead of failing
+        and being retried. Teaches the *Target* HCP's keep-alive interval.
+        """
+        stale = httpclient._stale(self.__con.sock)
+        if self.__idlesince is not None:
+            self.__side._idled(time.monotonic() - self.__idlesince, stale)
+            self.__idlesince = None
+        if stale:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.log(logging.DEBUG,
+                                'Connection closed by HCP while idle: IP {} '
+                                '({})'.format(self.__address,
+                                              self.__side.fqdn))
+            if self.__metrics:
+                self.__metrics.count('stale')
+            self.close()
+
+    def __route(self, method, avoid=None):
+        """
+        Switch to the side - the *Target* or its replica - the Request is to
+        be sent to, as selected by the *Target*'s replica strategy.
 
-    def _connect(self):
+        :param method:  the Request's HTTP method
+        :param avoid:   a side that just failed
+        :return:        True if the side has been switched
         """
-        Open a new Connection and return the Connection object
+        current = self.__side if self.__con and self.__con.sock else None
+        side = self.__target._select(method, current, avoid)
+        if side is self.__side:
+            return False
+        self.close()
+        self.__side = side
+        self.__metrics = side.metrics
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.log(logging.DEBUG, 'switched to {} for {}'
+                            .format(side.fqdn, method))
+        return True
+
+    def _connect(self, address=None, timings=None):
+        """
+        Create a new (not yet opened) Connection object and return it
+
+        :param address: the IP address to use; acquired from the *Target* if
+                        not given
+        :param timings: the *Timings* object of the Request in flight
         """
-        self.__address = self.__target.getaddr()
+        a_t = time.perf_counter()
+        self.__address = address or self.__side.getaddr()
+        if timings:
+            timings.acquire += time.perf_counter() - a_t
 
-        if self.__target.ssl:
-            c_t = time.time()
+        if self.__side.ssl:
             con = httpclient.HTTPSConnection(self.__address,
-                                             port=self.__target.port,
-                                             timeout=self.__timeout,
+                                             port=self.__side.port,
+                                             timeout=self.__connecttimeout,
                                              context=self.__sslcontext,
                                              sock_keepalive=self.sock_keepalive,
                                              tcp_keepalive=self.tcp_keepalive,
                                              tcp_keepintvl=self.tcp_keepintvl,
-                                             tcp_keepcnt=self.tcp_keepcnt)
-            self.__connect_time = time.time() - c_t
+                                             tcp_keepcnt=self.tcp_keepcnt,
+                                             blocksize=self.blocksize,
+                                             session=self.__side._tlssession(
+                                                 self.__address))
         else:
-            c_t = time.time()
             con = httpclient.HTTPConnection(self.__address,
-                                            port=self.__target.port,
-                                            timeout=self.__timeout,
+                                            port=self.__side.port,
+                                            timeout=self.__connecttimeout,
                                             sock_keepalive=self.sock_keepalive,
                                             tcp_keepalive=self.tcp_keepalive,
                                             tcp_keepintvl=self.tcp_keepintvl,
-                                            tcp_keepcnt=self.tcp_keepcnt)
-            self.__connect_time = time.time() - c_t
-        self.logger.log(logging.DEBUG,
-                        'Connection open: IP {} ({}) - connect_time: {:0.17f}'
-                        .format(self.__address, self.__target.fqdn,
-                                self.__connect_time))
+                                            tcp_keepcnt=self.tcp_keepcnt,
+                                            blocksize=self.blocksize)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.log(logging.DEBUG,
+                            'Connection object created: IP {} ({})'
+                            .format(self.__address, self.__side.fqdn))
 
         if self.__debuglevel:
             con.set_debuglevel(self.__debuglevel)
         return con
 
-    def request(self, method, url, body=None, params=None, headers=None):
+    def __open(self, timings=None):
+        """
+        Open the underlying connection, recording the time the TCP connect
+        and the TLS handshake took.
+
+        :param timings: the *Timings* object of the Request in flight
+        """
+        self.__con.timeout = self.__cut(self.__connecttimeout)
+        self.__con.connect()
+        if self.__con.timeout != self.__timeout:
+            self.__con.sock.settimeout(self.__timeout)
+        self.__connect_time = self.__con.tcp_time + self.__con.tls_time
+        if timings:
+            timings.connect += self.__con.tcp_time
+            timings.tls += self.__con.tls_time
+        if self.__side.ssl:
+            self.__tlsnew = not self.__con.session_reused
+        if self.__metrics:
+            self.__metrics.count('connects')
+            if self.__opened:
+                self.__metrics.count('reconnects')
+            if self.__side.ssl:
+                self.__metrics.count('tls_handshakes')
+                if self.__con.session_reused:
+                    self.__metrics.count('tls_resumptions')
+        self.__opened = True
+        if timings:
+            self._fire('on_connect', method=timings.method, url=timings.url,
+                       address=self.__address, attempt=timings.retries,
+                       elapsed=self.__connect_time, timings=timings)
+        else:
+            self._fire('on_connect', address=self.__address,
+                       elapsed=self.__connect_time)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.log(logging.DEBUG,
+                            'Connection open: IP {} ({}) - connect_time: '
+                            '{:0.17f}'.format(self.__address,
+                                              self.__side.fqdn,
+                                              self.__connect_time))
+
+    def connect(self, address=None):
+        """
+        Open the underlying connection right away, instead of waiting for the
+        next *request()* to do so. An already open connection is closed
+        before.
+
+        :param address: the IP address to connect to; if not given, an IP
+                        address is acquired from the *Target*
+        :raises:        *HcpsdkCertificateError* if the certificate presented
+                        by HCP doesn't verify, *HcpsdkTimeoutError* if the
+                        connect timed out, *HcpsdkCantConnectError* in all
+                        other cases
+
+        ..  versionadded:: 0.9.6.0
+        """
+        self.close()
+        self.__end = None
+        self.__con = self._connect(address)
+        try:
+            self.__open()
+        except ssl.SSLError as e:
+            self.close()
+            raise HcpsdkCertificateError(str(e))
+        except (TimeoutError, socket.timeout) as e:
+            self._failed()
+            self.close()
+            raise HcpsdkTimeoutError('Timeout during connect to {} ({})'
+                                     .format(self.__address, str(e)))
+        except OSError as e:
+            self._failed()
+            self.close()
+            raise HcpsdkCantConnectError('Unable to connect to {} ({})'
+                                         .format(self.__address, str(e)))
+
+    def request(self, method, url, body=None, params=None, headers=None,
+                deadline=None):
         """
         Wraps the *http.client.HTTP[s]Connection.Request()* method to be able to
         catch any exception that might happen plus to be able to trigger
@@ -659,49 +1406,225 @@ class Connection(object):
 
         :param headers: a dictionary holding additional key/value pairs to add to the
                         auto-prepared header
+        :param deadline:    the max. time (secs) the Request may take, including
+                        retries and reading the Response; defaults to the
+                        *Connection*'s *deadline*
         :return:        the original *Response* object received from
                         *http.client.HTTP[S]Connection.requests()*.
         :raises:        one of the *hcpsdk.Hcpsdk[..]Error*\ s or
                         *hcpsdk.ips.IpsError* in case an IP address cache refresh failed
         """
-        self._cancel_idletimer()  # 1st, cancel the idletimer
+        self.__requesting = True
+        try:
+            return self.__request(method, url, body, params, headers,
+                                  deadline)
+        except HcpsdkError as e:
+            self._release(overload=isinstance(e, HcpsdkTimeoutError))
+            if self.__metrics:
+                self.__metrics.failed(self.__timings,
+                                      timeout=isinstance(e, HcpsdkTimeoutError))
+            self.__error(e)
+            raise
+        except ips.IpsError as e:
+            self._release()
+            self.__error(e)
+            raise
+        finally:
+            self.__requesting = False
+
+    def __hedge(self, hedging, method, url, headers, timings):
+        """
+        Wait for the first byte of the Response for the hedging delay. If it
+        doesn't arrive in time, send the Request to another IP address, too,
+        and go on with the connection that answers first - the other one is
+        closed. If waiting fails, the Request goes on with the connection it
+        was sent to first. TLS records without application data (session
+        tickets) don't count as an answer.
+
+        :return:    the time (secs) spent connecting the hedged Request, which
+                    is recorded as connect and TLS time, not as time to first
+                    byte
+        """
+        con, address = self.__con, self.__address
+        try:
+            arrived = httpclient._arrived([con.sock], hedging.delay)
+        except (OSError, ValueError) as e:
+            self.logger.debug('unable to wait for hedging ({})'.format(e))
+            return 0.0
+        if arrived:
+            con.unread(arrived[con.sock])
+            return 0.0  # answered in time
+
+        # pick the least loaded IP address with a closed circuit, without
+        # handing out an IP address (which would turn the strategy and use
+        # up half-open probes)
+        stats = self.__side.ipaddrqry.stats
+        candidates = [a for a in self.__side.addresses
+                      if a != address and a in stats and
+                      stats[a].state == 'closed']
+        if not candidates or not hedging._hedge():
+            return 0.0
+        other = min(candidates,
+                    key=lambda a: (stats[a].outstanding, stats[a].ewma or 0.0))
+
+        # the hedged Request is opened and timed out like the first one, for
+        # the timeouts and the TLS session cache to apply if it wins
+        hcon = None
+        connecting = 0.0
+        primary = self.__connect_time, self.__tlsnew
+        try:
+            self.__con = hcon = self._connect(address=other)
+            self.__open(timings)
+            connecting = hcon.tcp_time + hcon.tls_time
+            self.__settimeout(self.__timeout)
+            hcon.request(method, url, headers=headers)
+            self.__settimeout(self.__firstbyte)
+        except Exception as e:
+            self.logger.debug('hedged {} Request for {} failed ({})'
+                              .format(method, url, e))
+            if hcon:
+                hcon.close()
+            return connecting
+        finally:
+            hedge = self.__connect_time, self.__tlsnew
+            self.__con, self.__address = con, address
+            self.__connect_time, self.__tlsnew = primary
+        self.__side.ipaddrqry.started(other)  # the race is on
+
+        try:
+            arrived = httpclient._arrived([con.sock, hcon.sock],
+                                          con.sock.gettimeout())
+        except (OSError, ValueError) as e:
+            self.logger.debug('unable to wait for the hedged {} Request for {}'
+                              ' ({})'.format(method, url, e))
+            arrived = {}
+        if hcon.sock in arrived and con.sock not in arrived:
+            hcon.unread(arrived[hcon.sock])
+            hedging._won()
+            con.close()
+            self._finished()  # the Request to *address* is given up
+            self.__con, self.__address = hcon, other
+            self.__connect_time, self.__tlsnew = hedge
+            self.__inflight = other
+            timings.address = other
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug('hedged {} Request for {} won ({} over {})'
+                                  .format(method, url, other, address))
+        else:
+            if con.sock in arrived:
+                con.unread(arrived[con.sock])
+            hcon.close()
+            self.__side.ipaddrqry.finished(other)
+        return connecting
+
+    def __retry(self, error, attempt, status=None, retryafter=None):
+        """
+        Fire *on_retry* for the Request in flight, then wait for the delay
+        the *RetryPolicy* asks for.
+        """
+        t = self.__timings
+        self._fire('on_retry', method=t.method, url=t.url,
+                   address=self.__address, attempt=attempt,
+                   elapsed=time.perf_counter() - self.__r_t, error=error,
+                   status=status, timings=t)
+        delay = self.__policy.delay(attempt, retryafter)
+        if self.__end is not None and \
+                time.monotonic() + delay >= self.__end:
+            self.close()
+            raise HcpsdkTimeoutError('deadline exceeded, retry # {} given up '
+                                     '- {}'.format(attempt, t.url))
+        if delay:
+            time.sleep(delay)
+
+    def __error(self, error):
+        """
+        Fire *on_error* for the Request in flight.
+        """
+        t = self.__timings
+        self._fire('on_error', method=t.method, url=t.url,
+                   address=self.__address, attempt=t.retries,
+                   elapsed=time.perf_counter() - self.__r_t, error=error,
+                   timings=t)
+
+    def __request(self, method, url, body, params, headers, deadline):
+        """
+        Implements *request()*.
+        """
+        self.__r_t = time.perf_counter()
+        if deadline is None:
+            deadline = self.__deadline
+        self.__end = time.monotonic() + deadline if deadline is not None \
+            else None
+        self._check_idletimer()  # 1st, cancel the idletimer
+        self._finished()  # in case the former Request wasn't read completely
+        if self.__con and self.__con.sock:
+            # the former Request may have left a timeout cut to its deadline
+            self.__con.sock.settimeout(self.__timeout)
+            self.__checkstale()
+        if self.__replicated:
+            self.__route(method)
+        extraheaders = headers
         if not headers:
-            headers = self.__target.headers
+            headers = self.__side._baseheaders
         else:
-            headers.update(self.__target.headers)
+            # the Target's headers win, but the caller's dict stays untouched
+            headers = dict(headers, **self.__side._baseheaders)
 
         # if url needs url-encoding, do so...
-        try:
-            # --> if url can be encoded to ascii and it doesn't contain
-            #     forbidden characters, we can go with it.
-            url.encode("ascii")
-            if any([x in url for x in RFC3986_reserved_chars]):
-                raise HcpsdkError('')
-        except HcpsdkError:
-            # in this case, we need to urlencode it...
-            self.logger.log(logging.DEBUG, 'url ({}) does need quoting'.format(url))
-            url = quote(url)
-            self.logger.log(logging.DEBUG, 'quote(url) = {}'.format(url))
-        else:
-            self.logger.log(logging.DEBUG, 'url ({}) doesn\'t need quoting'.format(url))
+        url, quoted = _quoteurl(url)
+        # logging is checked once per request - with DEBUG disabled, the
+        # messages on the request path aren't even formatted
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            if quoted:
+                self.logger.log(logging.DEBUG, 'quote(url) = {}'.format(url))
+            else:
+                self.logger.log(logging.DEBUG,
+                                'url ({}) doesn\'t need quoting'.format(url))
 
         if params:
             url = url + '?' + urlencode(params)
-        self.logger.log(logging.DEBUG, 'URL = {}'.format(url))
+        if debug:
+            self.logger.log(logging.DEBUG, 'URL = {}'.format(url))
+        timings = self.__timings = Timings(method, url)
+        self.__policy._request()
+        hedging = self.__hedging if self.__hedging and \
+            method in self.__hedging.methods else None
+        if hedging:
+            hedging._request()
+        if self.__limiter:
+            self.__acquire(timings)
+        self.__received = 0
+        if self.__metrics:
+            self.__sent = httpclient._bodylength(body)
+
+        # remember where a file body starts, to be able to re-send it on retry
+        try:
+            bodyoffset = body.tell() if hasattr(body, 'seek') else None
+        except OSError:
+            bodyoffset = None
 
         initialretry = False    # used if connection isn't open
         retryonfailure = False  # used for retries on failures
         retries = 0             # - " -
+        failedover = False      # used to fail over to the replica once
         while True:
             try:
                 if retryonfailure:
                     retryonfailure = False
                     self.close()
-                    self.__target.ipaddrqry.refresh()
-                    self.__con = self._connect()
+                    if self.__replicated and self.__route(method):
+                        headers = dict(extraheaders or {},
+                                       **self.__side._baseheaders)
+                    if self.__side.addresses:
+                        self.__side.ipaddrqry.refresh(wait=False)
+                    else:  # DNS failed before - wait for it, within limits
+                        self.__side.ipaddrqry.refresh(
+                            timeout=self.__cut(self.__timeout))
+                    self.__con = self._connect(timings=timings)
                 if initialretry:
                     self.close()
-                    self.__con = self._connect()
+                    self.__con = self._connect(timings=timings)
                     initialretry = False
 
                 # This is to allow a test case to inject an error situation...
@@ -711,9 +1634,22 @@ class Connection(object):
                     raise __e('test case')
                 ####################
 
-                self.logger.log(logging.DEBUG, '{}: About to request for {}'
-                                .format(method, url))
-                s_t = time.time()
+                if debug:
+                    self.logger.log(logging.DEBUG, '{}: About to request for {}'
+                                    .format(method, url))
+                if bodyoffset is not None:
+                    body.seek(bodyoffset)
+                timings.retries = retries
+                if not self.__con.sock:
+                    self.__open(timings)
+                if self.__end is not None:
+                    self.__settimeout(self.__timeout)
+                timings.address = self.__address
+                self._fire('on_request', method=method, url=url,
+                           address=self.__address, attempt=retries,
+                           elapsed=time.perf_counter() - self.__r_t,
+                           timings=timings)
+                s_t = time.perf_counter()
                 self.__con.request(method, url, body=body, headers=headers)
             except ips.IpsError as e:
                 # This is a trigger for the case that *hcpsdk.ips* isn't able
@@ -724,7 +1660,14 @@ class Connection(object):
             except ConnectionRefusedError as e:
                 # This is a trigger for the case that we were able to get an
                 # IP address, but a connection to it was actively refused.
+                self._failed()
                 self.close()
+                if self.__replicated and not failedover and \
+                        self.__route(method, avoid=self.__side):
+                    failedover = True
+                    headers = dict(extraheaders or {},
+                                   **self.__side._baseheaders)
+                    continue
                 raise HcpsdkError('Unable to connect ({})'
                                   .format(str(e)))
             except (http.client.NotConnected, AttributeError) as e:
@@ -749,11 +1692,13 @@ class Connection(object):
                 # close the connection, force the target to refresh its address
                 # list and retry with a new connection.
                 self._fail = None
+                self._failed()
                 self.logger.debug(
                     'ConnectionAbortedError: {} Request for {} failed ({})'
                     .format(method, url, e))
-                if retries < self.__retries:
+                if retries < self.__retries and self.__policy.retry(e):
                     retries += 1
+                    self.__retry(e, retries)
                     retryonfailure = True
                     self.logger.log(logging.DEBUG,
                                     'ConnectionAbortedError - retry # {}'
@@ -775,8 +1720,9 @@ class Connection(object):
                 self.logger.log(logging.DEBUG,
                                 'CannotSendRequest: {} Request for {} failed '
                                 '({})'.format(method, url, e))
-                if retries < self.__retries:
+                if retries < self.__retries and self.__policy.retry(e):
                     retries += 1
+                    self.__retry(e, retries)
                     initialretry = True
                     self.logger.log(logging.DEBUG,
                                     'CannotSendRequest - retry # {}'.format(
@@ -798,8 +1744,9 @@ class Connection(object):
                 self.logger.debug(
                     'http.client.ResponseNotReady: {} Request for {} failed '
                     '({})'.format(method, url, e))
-                if retries < self.__retries:
+                if retries < self.__retries and self.__policy.retry(e):
                     retries += 1
+                    self.__retry(e, retries)
                     retryonfailure = True
                     self.logger.log(logging.DEBUG,
                                     'http.client.ResponseNotReady - retry # {}'
@@ -826,10 +1773,13 @@ class Connection(object):
                 # We will retry in this case (if retries have been asked for).
                 # If we fail we close the underlying connection.
                 self._fail = None
+                self.__checkdeadline()
+                self._failed()
                 self.logger.debug('TimeoutError: {} Request for {} failed ({})'
                                   .format(method, url, e))
-                if retries < self.__retries:
+                if retries < self.__retries and self.__policy.retry(e):
                     retries += 1
+                    self.__retry(e, retries)
                     retryonfailure = True
                     self.logger.log(logging.DEBUG, 'TimeoutError - retry # {}'
                                     .format(retries))
@@ -841,6 +1791,10 @@ class Connection(object):
                     self.close()
                     raise HcpsdkTimeoutError('Timeout ({} retries) - {}'
                                              .format(retries, url))
+            except HcpsdkTimeoutError:
+                # the deadline has passed
+                self.close()
+                raise
             except http.client.HTTPException as e:
                 # Again, there might be no recovery from this, so we close the
                 # underlying connection and give up.
@@ -852,21 +1806,41 @@ class Connection(object):
                 # Again, there might be no recovery from this, so we close the
                 # underlying connection and give up.
                 self._fail = None
+                if isinstance(e, OSError):  # i.e. no route to host
+                    self._failed()
                 self.logger.exception('unexpected Exception')
                 self.close()
                 raise HcpsdkError(str(e))
             else:
-                self.__service_time1 = self.__service_time2 = time.time() - s_t
-                self.logger.log(logging.DEBUG,
-                                '{} Request for {} - service_time1&2 = '
-                                '{:0.17f}'
-                                .format(method, url, self.__service_time1))
+                r_t = time.perf_counter()
+                timings.send = r_t - s_t
+                self.__service_time1 = self.__service_time2 = timings.send
+                if debug:
+                    self.logger.log(logging.DEBUG,
+                                    '{} Request for {} - service_time1&2 = '
+                                    '{:0.17f}'
+                                    .format(method, url, self.__service_time1))
+                if self.__firstbyte != self.__timeout or \
+                        self.__end is not None:
+                    try:
+                        self.__settimeout(self.__firstbyte)
+                    except HcpsdkTimeoutError:
+                        self.close()
+                        raise
+                self._started()
 
+                hedged = 0.0
                 try:
+                    if hedging and hedging.delay is not None:
+                        hedged = self.__hedge(hedging, method, url, headers,
+                                              timings)
                     self._response = self.__con.getresponse()
                 except (TimeoutError, socket.timeout, BrokenPipeError) as e:
-                    if retries < self.__retries:
+                    self.__checkdeadline()
+                    self._failed()
+                    if retries < self.__retries and self.__policy.retry(e):
                         retries += 1
+                        self.__retry(e, retries)
                         self.logger.log(logging.DEBUG,
                                         'TimeoutError while getting response '
                                         '- retry # {}'.format(retries))
@@ -884,9 +1858,11 @@ class Connection(object):
                     # Same for OSError 9
                     # ('HTTP Persistent Connection Timeout Interval' < Connection.timeout)
                     # So, we close the connection here and trigger a retry...
+                    self._finished()
                     self.close()
-                    if retries < self.__retries:
+                    if retries < self.__retries and self.__policy.retry(e):
                         retries += 1
+                        self.__retry(e, retries)
                         retryonfailure = True
                         self.logger.log(logging.DEBUG,
                                         'HCP most likely closed the connection'
@@ -908,11 +1884,13 @@ class Connection(object):
                     # We'll try it with the same approach as with the
                     # ConnectionAbortedError...
                     self._fail = None
+                    self._finished()
                     self.logger.debug(
                         'http.client.ResponseNotReady: {} getresponse() for '
                         '{} failed ({})'.format(method, url, e))
-                    if retries < self.__retries:
+                    if retries < self.__retries and self.__policy.retry(e):
                         retries += 1
+                        self.__retry(e, retries)
                         retryonfailure = True
                         self.logger.log(logging.DEBUG,
                                         'http.client.ResponseNotReady - retry '
@@ -929,15 +1907,54 @@ class Connection(object):
                             ' retries) - {}'
                             .format(retries, url))
                 except Exception as e:
+                    self._finished()
                     self.logger.exception(
                         'Exception not catched in hcpsdk.__init__: {}'.format(
                             str(e)))
                 else:
-                    self.__service_time2 = time.time() - s_t
-                    self.logger.log(logging.DEBUG,
-                                    '{} Request for {} - after getResponse(): '
-                                    'service_time2 = {:0.17f}'
-                                    .format(method, url, self.__service_time2))
+                    self.__side.ipaddrqry.succeeded(self.__address)
+                    timings.ttfb = time.perf_counter() - r_t - hedged
+                    if self.__con.sock:  # undo firstbyte and deadline
+                        self.__con.sock.settimeout(self.__timeout)
+                    if self.__tlsnew:
+                        # with TLS 1.3, the session ticket arrives after the
+                        # handshake, so the session is cached not before now
+                        self.__tlsnew = False
+                        self.__side._settlssession(self.__address,
+                                                   self.__con.sock.session)
+                    self.__service_time2 = timings.send + timings.ttfb
+                    if hedging:
+                        hedging.record(timings.ttfb)
+                    status = self._response.status
+                    self._fire('on_response', method=method, url=url,
+                               address=self.__address, attempt=retries,
+                               elapsed=time.perf_counter() - self.__r_t,
+                               status=status, timings=timings)
+                    if status in self.__policy.statuses and \
+                            retries < self.__retries and \
+                            self.__policy.retry(status=status):
+                        # i.e. 503 - HCP is busy; drop the Response and
+                        # retry after the time HCP asked for
+                        retryafter = self._response.getheader('Retry-After')
+                        self._response.read()
+                        self._finished()
+                        self._release(overload=True)
+                        retries += 1
+                        self.__retry(None, retries, status=status,
+                                     retryafter=retryafter)
+                        if self.__limiter:
+                            self.__acquire(timings)
+                        self.logger.log(logging.DEBUG,
+                                        '{} {} - retry # {}'
+                                        .format(status, self._response.reason,
+                                                retries))
+                        continue
+                    if debug:
+                        self.logger.log(logging.DEBUG,
+                                        '{} Request for {} - after '
+                                        'getResponse(): service_time2 = '
+                                        '{:0.17f}'.format(method, url,
+                                                          self.__service_time2))
 
             return self._response
 
@@ -957,55 +1974,62 @@ class Connection(object):
         return self._response.getheaders()
 
     # noinspection PyUnusedLocal,PyPep8Naming
-    def PUT(self, url, body=None, params=None, headers=None):
+    def PUT(self, url, body=None, params=None, headers=None, deadline=None):
         """
         Convenience method for Request() - PUT an object.
         Cleans up and leaves the Connection ready for the next Request.
         For parameter description see *Request()*.
         """
-        r = self.request('PUT', url, body, params, headers)
+        r = self.request('PUT', url, body, params, headers, deadline)
         r.read()  # clean up
+        self._finished(self.__service_time2)
         self._set_idletimer()
         return r
 
     # noinspection PyPep8Naming
-    def GET(self, url, params=None, headers=None):
+    def GET(self, url, params=None, headers=None, deadline=None):
         """
         Convenience method for Request() - GET an object.
         You need to fully *.read()* the requested content from the Connection
         before it can be used for another Request.
         For parameter description see *Request()*.
         """
-        return self.request('GET', url, params=params, headers=headers)
+        return self.request('GET', url, params=params, headers=headers,
+                            deadline=deadline)
 
-    def HEAD(self, url, params=None, headers=None):
+    def HEAD(self, url, params=None, headers=None, deadline=None):
         """
         Convenience method for Request() - HEAD - get metadata of an object.
         Cleans up and leaves the Connection ready for the next Request.
         For parameter description see *Request()*.
         """
-        r = self.request('HEAD', url, params=params, headers=headers)
+        r = self.request('HEAD', url, params=params, headers=headers,
+                         deadline=deadline)
         r.read()  # clean up
+        self._finished(self.__service_time2)
         self._set_idletimer()
         return r
 
-    def POST(self, url, body=None, params=None, headers=None):
+    def POST(self, url, body=None, params=None, headers=None,
+             deadline=None):
         """
         Convenience method for Request() - POST metadata.
         Does no clean-up, as a POST can have a response body!
         For parameter description see *Request()*.
         """
         return self.request('POST', url, body=body, params=params,
-                            headers=headers)
+                            headers=headers, deadline=deadline)
 
-    def DELETE(self, url, params=None, headers=None):
+    def DELETE(self, url, params=None, headers=None, deadline=None):
         """
         Convenience method for Request() - DELETE an object.
         Cleans up and leaves the Connection ready for the next Request.
         For parameter description see *Request()*.
         """
-        r = self.request('DELETE', url, params=params, headers=headers)
+        r = self.request('DELETE', url, params=params, headers=headers,
+                         deadline=deadline)
         r.read()  # clean up
+        self._finished(self.__service_time2)
         self._set_idletimer()
         return r
 
@@ -1020,38 +2044,115 @@ class Connection(object):
         :raises:    *HcpsdkTimeoutError* in case a socket.timeout was catched,
                     *HcpsdkError* in all other cases.
         """
-        s_t = time.time()
+        return self.__read(amt=amt)
+
+    def readinto(self, b):
+        """
+        Read up to len(b) bytes from a *Response* into *b*, without
+        allocating a new bytes object.
+
+        :param b:   a pre-allocated, writable buffer (*bytearray*,
+                    *memoryview*, ...)
+        :return:    the number of bytes read; zero signals end of transfer,
+                    which means that the Connection is ready for another
+                    Request.
+        :raises:    *HcpsdkTimeoutError* in case a socket.timeout was catched,
+                    *HcpsdkError* in all other cases.
+
+        ..  versionadded:: 0.9.6.0
+        """
+        return self.__read(b=b)
+
+    def iter_chunks(self, size=2**18):
+        """
+        Generator reading a *Response* chunk by chunk into a single buffer
+        that is re-used for every chunk.
+
+        :param size:    the max. size of a chunk
+        :return:        yields a *memoryview* per chunk, which is valid until
+                        the next chunk is requested, only (copy it if you
+                        need to keep it)
+        :raises:        *HcpsdkTimeoutError* in case a socket.timeout was
+                        catched, *HcpsdkError* in all other cases.
+
+        **Example:**
+
+        ::
+
+            >>> con.GET('/rest/hcpsdk/large.bin')
+            >>> with open('large.bin', 'wb') as f:
+            ...     for chunk in con.iter_chunks():
+            ...         f.write(chunk)
+
+        ..  versionadded:: 0.9.6.0
+        """
+        with memoryview(bytearray(size)) as view:
+            while True:
+                n = self.readinto(view)
+                if not n:
+                    return
+                yield view[:n]
+
+    def __read(self, amt=None, b=None):
+        """
+        Read from a *Response* - into a new bytes object or into *b*, with
+        the error handling and service time accounting shared by *read()*
+        and *readinto()*.
+        """
+        s_t = time.perf_counter()
         try:
-            buf = self._response.read(amt)
-            self.__service_time1 = time.time() - s_t
+            if self.__end is not None and self.__con:
+                self.__settimeout(self.__timeout)
+            if b is None:
+                buf = self._response.read(amt)
+                readsize = len(buf)
+            else:
+                buf = readsize = self._response.readinto(b)
+            self.__service_time1 = time.perf_counter() - s_t
         except AttributeError as e:
             msg = 'faulty read: {}'.format(str(e))
             self.logger.log(logging.DEBUG, msg)
             raise HcpsdkError(msg)
-        except socket.timeout as e:
+        except (socket.timeout, HcpsdkTimeoutError) as e:
+            self._finished()
+            self._release(overload=True)
+            if self.__metrics:
+                self.__metrics.failed(self.__timings, timeout=True)
+            self.__error(e)
+            self.close()  # the rest of the Response is still in flight
             msg = 'read: {}'.format(str(e))
             self.logger.log(logging.DEBUG, msg)
             raise HcpsdkTimeoutError(msg)
         except (http.client.IncompleteRead, OSError) as e:
+            self._finished()
+            self._release()
+            if self.__metrics:
+                self.__metrics.failed(self.__timings)
+            self.__error(e)
             msg = 'read error: {}'.format(str(e))
             self.logger.log(logging.DEBUG, msg)
             raise HcpsdkError(msg)
         else:
             self.__service_time2 += self.__service_time1
-            readsize = len(buf)
+            self.__timings.transfer += self.__service_time1
+            self.__received += readsize
+            if self._response.isclosed():
+                self._finished(self.__service_time2)
             if readsize:
-                self.logger.log(logging.DEBUG,
-                                '(partial?) read {} bytes: service_time1/2 = '
-                                '{:0.17f}/{:0.17f} secs'
-                                .format(readsize, self.__service_time1,
-                                        self.__service_time2))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.log(logging.DEBUG,
+                                    '(partial?) read {} bytes: service_time1/2'
+                                    ' = {:0.17f}/{:0.17f} secs'
+                                    .format(readsize, self.__service_time1,
+                                            self.__service_time2))
             else:
                 self._set_idletimer()
-                self.logger.log(logging.DEBUG,
-                                'final read: service_time1/2 = {:0.17f}/'
-                                '{:0.17f} secs'
-                                .format(self.__service_time1,
-                                        self.__service_time2))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.log(logging.DEBUG,
+                                    'final read: service_time1/2 = {:0.17f}/'
+                                    '{:0.17f} secs'
+                                    .format(self.__service_time1,
+                                            self.__service_time2))
             return buf
 
     def close(self):
@@ -1060,26 +2161,39 @@ class Connection(object):
 
         .. Warning::
            **It is essential to close the Connection**, as open connections
-           might keep the program from terminating for at max *timeout*
-           seconds, due to the fact that the timer used to keep the Connection
-           persistent runs in a separate thread, which will be canceled on
-           *close()*.
+           will stay open for *idletime* seconds, otherwise.
+
+        ..  versionchanged:: 0.9.6.0
+            Idle Connections are closed by a single, process-wide thread;
+            open Connections no longer keep the program from terminating.
         """
+        self._finished()
+        if not self.__requesting:  # not if request() reconnects
+            self._release()
         # noinspection PyBroadException
         if self.__con:
             try:
                 self._cancel_idletimer()
                 self.__con.close()
                 self.__con = None
-                self.logger.log(logging.DEBUG,
-                                'Connection object closed: IP {} ({})'
-                                .format(self.__address, self.__target.fqdn))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.log(logging.DEBUG,
+                                    'Connection object closed: IP {} ({})'
+                                    .format(self.__address,
+                                            self.__side.fqdn))
             except Exception as e:
                 self.logger.exception('Connection object close failed: '
                                       'IP {} ({})'
-                                .format(self.__address, self.__target.fqdn))
+                                .format(self.__address, self.__side.fqdn))
 
     # properties for externally visible attributes
+    def __getside(self):
+        return self.__side
+    side = property(__getside, None, None,
+                    'The *Target* in use - the one the *Connection* was '
+                    'created for, or its replica (r/o)\n\n'
+                    '.. versionadded:: 0.9.6.0')
+
     def __getaddress(self):
         return self.__address
     address = property(__getaddress, None, None,
@@ -1119,7 +2233,9 @@ class Connection(object):
         else:
             return 0.00000000001
     connect_time = property(__getconnect_time, None, None,
-                            'The time in seconds the last connect took (r/o)')
+                            'The time in seconds the TCP connect and the TLS '
+                            'handshake of the last connection opened took '
+                            '(r/o)')
 
     def __getservice_time1(self):
         if self.__service_time1 > 0.0:
@@ -1142,6 +2258,20 @@ class Connection(object):
                              'to now. Sum of all ``service_time1`` during '
                              'handling a Request (r/o)')
 
+    def __gethooks(self):
+        return self.__hooks
+    hooks = property(__gethooks, None, None,
+                     'The *hcpsdk.hooks.Hooks* called for this Connection, '
+                     'in addition to those of its *Target* (r/o)\n\n'
+                     '.. versionadded:: 0.9.6.0')
+
+    def __gettimings(self):
+        return self.__timings
+    timings = property(__gettimings, None, None,
+                       'A *Timings* object holding the time the phases of '
+                       'the last Request took; updated while the Response '
+                       'is read (r/o)')
+
     def __getdebug_level(self):
         return self.__debuglevel
     def __setdebug_level(self, value):
@@ -1158,11 +2288,13 @@ class Connection(object):
     def __repr__(self):
         return('{}({}, timeout={}, idletime={}, retries={}, '
                'debuglevel={}, sock_keepalive={}, tcp_keepalive={}, '
-               'tcp_keepintvl={}, tcp_keepcnt={})'
+               'tcp_keepintvl={}, tcp_keepcnt={}, connect_timeout={}, '
+               'firstbyte_timeout={}, deadline={})'
                .format(__class__.__name__, repr(self.__target), self.__timeout, self.__idletime,
                        self.__retries, self.__debuglevel, self.sock_keepalive,
                        self.tcp_keepalive, self.tcp_keepintvl,
-                       self.tcp_keepcnt))
+                       self.tcp_keepcnt, self.__connecttimeout,
+                       self.__firstbyte, self.__deadline))
 
     def __str__(self):
         return ("{} initialized for fqdn {} @ {}"
@@ -1186,3 +2318,33 @@ def checkport(target, port):
         raise HcpsdkPortError('Target initialized for port {}, not {}'
                               .format(target.port, port))
 
+
+def _quoteurl(url):
+    """
+    Quote *url*, if necessary. If *url* is pure ascii and it doesn't contain
+    forbidden characters, we can go with it (and existing quoting will not be
+    touched).
+
+    If quoting is necessary, the path (up to the last '/') is taken from a
+    cache, as it tends to be the same for many Requests (think of
+    *hcpsdk.pathbuilder*) - only the object name needs to be quoted.
+
+    :param url: the url w/o the server part (i.e: /rest/path/object)
+    :return:    a 2-tuple of the (quoted) url and a bool telling if quoting
+                was necessary
+    """
+    if _isascii(url) and _RESERVED.isdisjoint(url):
+        return url, False
+    path, sep, name = url.rpartition('/')
+    return _quotepath(path) + sep + quote(name), True
+
+
+@lru_cache(maxsize=4096)
+def _quotepath(path):
+    """
+    Quote *path* - the cached part of *_quoteurl()*.
+
+    :param path:    the url up to (excluding) the last '/'
+    :return:        the quoted path
+    """
+    return quote(path)
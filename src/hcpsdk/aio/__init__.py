@@ -0,0 +1,944 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import io
+import ssl
+import time
+import logging
+import http.client
+from collections import deque
+from types import MappingProxyType
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+import hcpsdk
+from hcpsdk import ips, httpclient
+
+__all__ = ['AsyncCircle', 'AsyncTarget', 'AsyncConnection', 'AsyncResponse']
+
+logging.getLogger('hcpsdk.aio').addHandler(logging.NullHandler())
+
+# the size of the chunks used to send file bodies
+BLOCKSIZE = 2**16
+
+
+class AsyncCircle(object):
+    """
+    The asyncio counterpart of *hcpsdk.ips.Circle*.
+
+    Wraps an *hcpsdk.ips.Circle*, whose (blocking) name resolution is run in
+    the event loop's default executor, so that it never blocks the event
+    loop. Handing out an IP address from the cache doesn't block anyway.
+    Concurrent refreshes are coalesced into a single DNS query.
+    """
+
+    def __init__(self, fqdn, port=443, dnscache=False, strategy=None,
+                 breaker=None):
+        """
+        :param fqdn:        the FQDN to be resolved
+        :param port:        the port to be used by the *AsyncTarget* object
+        :param dnscache:    if True, use the system resolver (which **might** do
+                            local caching), else use an internal resolver,
+                            bypassing any cache available
+        :param strategy:    an *hcpsdk.ips.Strategy* object used to select
+                            the IP address handed out next
+        :param breaker:     an *hcpsdk.ips.CircuitBreaker* object used to
+                            evict IP addresses that keep failing
+        """
+        self.logger = logging.getLogger(__name__ + '.AsyncCircle')
+        self.__authority = fqdn
+        self.__port = port
+        self.__dnscache = dnscache
+        self.__strategy = strategy
+        self.__breaker = breaker
+        self.__circle = None  # the hcpsdk.ips.Circle, once resolved
+        self.__refreshing = None  # the Future of a running refresh
+
+    async def _addr(self):
+        """
+        Get an IP address out of the cache, resolving the FQDN on first use.
+
+        :return:    an IP address (as string)
+        :raises:    *hcpsdk.ips.IpsError* if name resolution fails
+        """
+        if not self.__circle:
+            await self.refresh()
+        # noinspection PyProtectedMember
+        return self.__circle._addr()
+
+    async def refresh(self, wait=True):
+        """
+        Force a fresh DNS query and rebuild the cached list of IP addresses.
+
+        :param wait:    if False (and the FQDN has been resolved before),
+                        just urge the TTL cache to refresh the IP addresses
+                        in the background
+        :raises:        *hcpsdk.ips.IpsError* if name resolution fails
+        """
+        if not wait and self.__circle:
+            self.__circle.refresh(wait=False)
+            return
+        if not self.__refreshing:
+            loop = asyncio.get_running_loop()
+            if self.__circle:
+                self.__refreshing = loop.run_in_executor(None,
+                                                         self.__circle.refresh)
+            else:
+                self.__refreshing = loop.run_in_executor(None, self.__create)
+            self.__refreshing.add_done_callback(self.__refreshed)
+        await asyncio.shield(self.__refreshing)
+
+    def __create(self):
+        """
+        Create the *ips.Circle* - runs in an executor thread.
+        """
+        self.__circle = ips.Circle(self.__authority, port=self.__port,
+                                   dnscache=self.__dnscache,
+                                   strategy=self.__strategy,
+                                   breaker=self.__breaker)
+
+    def started(self, address):
+        """
+        Report that a request to *address* has been started (see
+        *hcpsdk.ips.Circle.started()*).
+        """
+        if self.__circle:
+            self.__circle.started(address)
+
+    def finished(self, address, service_time=None):
+        """
+        Report that a request to *address* has been finished (see
+        *hcpsdk.ips.Circle.finished()*).
+        """
+        if self.__circle:
+            self.__circle.finished(address, service_time)
+
+    def failed(self, address):
+        """
+        Report that *address* failed (see *hcpsdk.ips.Circle.failed()*).
+        """
+        if self.__circle:
+            self.__circle.failed(address)
+
+    def succeeded(self, address):
+        """
+        Report that *address* delivered a response (see
+        *hcpsdk.ips.Circle.succeeded()*).
+        """
+        if self.__circle:
+            self.__circle.succeeded(address)
+
+    def __refreshed(self, future):
+        """
+        Called when a refresh is done.
+        """
+        self.__refreshing = None
+
+    def __getcircle(self):
+        return self.__circle
+    circle = property(__getcircle, None, None,
+                      'The wrapped *hcpsdk.ips.Circle*, *None* before the '
+                      'first name resolution (r/o)')
+
+    def __getaddresses(self):
+        # noinspection PyProtectedMember
+        return self.__circle._addresses if self.__circle else []
+    _addresses = property(__getaddresses, None, None,
+                          'The list of cached IP addresses (r/o)')
+
+
+class AsyncTarget(object):
+    """
+    The asyncio counterpart of *hcpsdk.Target*. It caches the FQDN and the
+    port, queries the provided *Authorization* object for the required
+    authorization token and pools the *AsyncConnection*\\ s used to access
+    HCP.
+
+    Name resolution happens on first use, not during initialization.
+    """
+
+    def __init__(self, fqdn, authorization, port=443, dnscache=False,
+                 sslcontext=hcpsdk.SSL_NOVERIFY, interface=hcpsdk.I_NATIVE,
+                 maxconnections=100, strategy=None, breaker=None,
+                 retrypolicy=None, **conargs):
+        """
+        :param fqdn:            ([namespace.]tenant.hcp.loc)
+        :param authorization:   an instance of one of BaseAuthorization's
+                                subclasses
+        :param port:            one of the port constants (*hcpsdk.P_**)
+        :param dnscache:        if True, use the system resolver (which
+                                **might** do local caching), else use an
+                                internal resolver, bypassing any cache
+                                available
+        :param sslcontext:      the context used to handle https requests;
+                                defaults to no certificate verification
+        :param interface:       the HCP interface to use (I_NATIVE)
+        :param maxconnections:  the max. number of *AsyncConnection*\\ s
+                                handed out by *checkout()* at a time
+        :param strategy:        an *hcpsdk.ips.Strategy* object used to select
+                                the IP address for new *AsyncConnection*\\ s;
+                                defaults to round-robin
+        :param breaker:         an *hcpsdk.ips.CircuitBreaker* object used
+                                to evict IP addresses that keep failing
+        :param retrypolicy:     an *hcpsdk.retry.RetryPolicy* object shared
+                                by all *AsyncConnection*\\ s
+        :param conargs:         more keyword arguments handed over to
+                                *AsyncConnection()* by *checkout()*
+                                (timeout, idletime, retries)
+        """
+        self.logger = logging.getLogger(__name__ + '.AsyncTarget')
+        self.__fqdn = fqdn
+        self.__authorization = authorization
+        self.__dnscache = dnscache
+        self.__sslcontext = sslcontext
+        self.__headers = {'Host': self.__fqdn}
+        self.__baseheaders = None  # Host + authorization, read-only
+        self.__authheaders = None  # the authorization headers used for it
+        self.__port = port
+        self.__ssl = self.__port in hcpsdk.SSL_PORTS
+        self.__interface = interface
+        self.__maxconnections = maxconnections
+        self.__conargs = conargs
+        self.__retrypolicy = retrypolicy or hcpsdk.RetryPolicy()
+
+        self.__idle = deque()  # idle AsyncConnections, most recent right
+        self.__inuse = set()
+        self.__slots = None  # asyncio.Semaphore, created on first use
+
+        self.ipaddrqry = AsyncCircle(self.__fqdn, port=self.__port,
+                                     dnscache=self.__dnscache,
+                                     strategy=strategy, breaker=breaker)
+
+        self.logger.debug('AsyncTarget initialized: {}:{} - SSL = {}'
+                          .format(self.__fqdn, self.__port, self.__ssl))
+
+    async def getaddr(self):
+        """
+        Convenience method to get an IP address out of the pool.
+
+        :return:    an IP address (as string)
+        :raises:    *hcpsdk.ips.IpsError* if name resolution fails
+        """
+        # noinspection PyProtectedMember
+        return await self.ipaddrqry._addr()
+
+    async def checkout(self):
+        """
+        Get an *AsyncConnection* out of the pool, waiting for one to be
+        checked in if *maxconnections* are in use.
+
+        :return:    an *AsyncConnection* object
+        """
+        if not self.__slots:
+            self.__slots = asyncio.Semaphore(self.__maxconnections)
+        await self.__slots.acquire()
+        if self.__idle:
+            con = self.__idle.pop()
+        else:
+            con = AsyncConnection(self, **self.__conargs)
+        self.__inuse.add(con)
+        return con
+
+    def checkin(self, con, discard=False):
+        """
+        Return an *AsyncConnection* to the pool.
+
+        An *AsyncConnection* with a *Response* that hasn't been read
+        completely will be closed, as it can't serve another request.
+
+        :param con:     an *AsyncConnection* taken from this pool
+        :param discard: close the *AsyncConnection* and remove it from the
+                        pool
+        """
+        if con not in self.__inuse:
+            raise hcpsdk.HcpsdkError('AsyncConnection not checked out from '
+                                     'this pool')
+        self.__inuse.discard(con)
+        if discard:
+            con._abort()
+        else:
+            if con.response and not con.response.isclosed():
+                con._abort()
+            self.__idle.append(con)
+        self.__slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Asynchronous context manager that checks out an *AsyncConnection*
+        and checks it in when leaving the context. If the context is left
+        with an exception, the *AsyncConnection* is discarded.
+
+        ::
+
+            >>> async with t.connection() as con:
+            ...     r = await con.GET('/rest/hcpsdk/test1.txt')
+            ...     data = await con.read()
+        """
+        con = await self.checkout()
+        try:
+            yield con
+        except BaseException:
+            self.checkin(con, discard=True)
+            raise
+        else:
+            self.checkin(con)
+
+    async def close(self):
+        """
+        Close all idle *AsyncConnection*\\ s.
+        """
+        while self.__idle:
+            await self.__idle.popleft().close()
+
+    # properties for the read-only attributes
+    def __getfqdn(self):
+        return self.__fqdn
+    fqdn = property(__getfqdn, None, None,
+                    'The FQDN for which this object was initialized (r/o)')
+
+    def __getinterface(self):
+        return self.__interface
+    interface = property(__getinterface, None, None,
+                         'The HCP interface used (r/o)')
+
+    def __getport(self):
+        return self.__port
+    port = property(__getport, None, None,
+                    'The target port in use (r/o)')
+
+    def __getssl(self):
+        return self.__ssl
+    ssl = property(__getssl, None, None,
+                   'Indicates if SSL is used (r/o)')
+
+    def __getsslcontext(self):
+        return self.__sslcontext
+    sslcontext = property(__getsslcontext, None, None,
+                          'The assigned SSL context (r/o)')
+
+    def __getaddresses(self):
+        # noinspection PyProtectedMember
+        return self.ipaddrqry._addresses
+    addresses = property(__getaddresses, None, None,
+                         'The list of resolved IP addresses for this target '
+                         '(r/o)')
+
+    def __getheaders(self):
+        return dict(self._baseheaders)
+    headers = property(__getheaders, None, None,
+                       'The calculated authorization headers (r/o)')
+
+    def __getbaseheaders(self):
+        # noinspection PyProtectedMember
+        auth = self.__authorization._getheaders()
+        if auth is not self.__authheaders:
+            tmp = self.__headers.copy()
+            tmp.update(auth)
+            self.__baseheaders = MappingProxyType(tmp)
+            self.__authheaders = auth
+        return self.__baseheaders
+    _baseheaders = property(__getbaseheaders, None, None,
+                            'The headers sent with every Request, as a '
+                            'read-only mapping (r/o)')
+
+    def __getretrypolicy(self):
+        return self.__retrypolicy
+    retrypolicy = property(__getretrypolicy, None, None,
+                           'The *hcpsdk.retry.RetryPolicy* used by all '
+                           '*AsyncConnection*\\ s (r/o)')
+
+    def __repr__(self):
+        return ('{}({}, {}, port={}, dnscache={}, sslcontext={}, '
+                'interface={}, maxconnections={}, retrypolicy={})'
+                .format(__class__.__name__, self.__fqdn,
+                        repr(self.__authorization), self.__port,
+                        self.__dnscache, repr(self.__sslcontext),
+                        self.__interface, self.__maxconnections,
+                        repr(self.__retrypolicy)))
+
+    def __str__(self):
+        return "{} initialized for {}".format(__class__.__name__, self.__fqdn)
+
+
+class AsyncResponse(object):
+    """
+    The *Response* to a request issued through an *AsyncConnection*,
+    modeled after *http.client.HTTPResponse*.
+    """
+
+    def __init__(self, reader, method, version, status, reason, headers,
+                 onfinish):
+        """
+        :param reader:      the *asyncio.StreamReader* to read the body from
+        :param method:      the request's method
+        :param version:     the http version presented by the server
+        :param status:      the http status code
+        :param reason:      the http status message
+        :param headers:     an *http.client.HTTPMessage* holding the headers
+        :param onfinish:    called with this object when the body has been
+                            read completely
+        """
+        self.__reader = reader
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.__onfinish = onfinish
+        self.__closed = False
+        self.__chunked = False
+        self.__chunkleft = 0
+        self.__length = None
+
+        conhdr = (headers.get('Connection') or '').lower()
+        self.willclose = conhdr == 'close' or \
+                         (version == 'HTTP/1.0' and conhdr != 'keep-alive')
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            self.__length = 0
+        elif (headers.get('Transfer-Encoding') or '').lower() == 'chunked':
+            self.__chunked = True
+        elif headers.get('Content-Length') is not None:
+            try:
+                self.__length = int(headers.get('Content-Length'))
+            except ValueError:
+                raise http.client.HTTPException('invalid Content-Length: {}'
+                                                .format(headers.get(
+                                                    'Content-Length')))
+        else:
+            self.willclose = True  # the body ends when the connection does
+
+        if self.__length == 0:
+            self.__finish()
+
+    async def read(self, amt=None):
+        """
+        Read and return *amt* bytes (or all, if *amt* isn't given) of the
+        *Response* body.
+
+        :param amt: number of bytes to read
+        :return:    the bytes read; an empty bytes object signals the end of
+                    the body
+        """
+        if self.__closed:
+            return b''
+        if self.__chunked:
+            return await self.__readchunked(amt)
+        if self.__length is None:
+            data = await self.__reader.read(amt or -1)
+            if not data or not amt:
+                self.__finish()
+            return data
+        if amt is None or amt > self.__length:
+            amt = self.__length
+        try:
+            data = await self.__reader.readexactly(amt)
+        except asyncio.IncompleteReadError as e:
+            raise http.client.IncompleteRead(e.partial, e.expected)
+        self.__length -= len(data)
+        if not self.__length:
+            self.__finish()
+        return data
+
+    async def __readchunked(self, amt):
+        """
+        Read from a chunked body.
+        """
+        buf = bytearray()
+        try:
+            while amt is None or len(buf) < amt:
+                if not self.__chunkleft:
+                    line = await self.__reader.readline()
+                    try:
+                        size = int(line.split(b';', 1)[0], 16)
+                    except ValueError:
+                        raise http.client.IncompleteRead(bytes(buf))
+                    if not size:
+                        # skip the trailers
+                        while True:
+                            line = await self.__reader.readline()
+                            if line in (b'\r\n', b'\n', b''):
+                                break
+                        self.__finish()
+                        break
+                    self.__chunkleft = size
+                size = self.__chunkleft if amt is None \
+                    else min(self.__chunkleft, amt - len(buf))
+                buf += await self.__reader.readexactly(size)
+                self.__chunkleft -= size
+                if not self.__chunkleft:
+                    await self.__reader.readexactly(2)  # CRLF
+        except asyncio.IncompleteReadError as e:
+            raise http.client.IncompleteRead(bytes(buf) + e.partial)
+        return bytes(buf)
+
+    def __finish(self):
+        """
+        Mark the body as completely read.
+        """
+        if not self.__closed:
+            self.__closed = True
+            self.__onfinish(self)
+
+    def isclosed(self):
+        """
+        :return:    True if the body has been read completely
+        """
+        return self.__closed
+
+    def getheader(self, name, default=None):
+        """
+        Get a single header.
+
+        :param name:    the header's name
+        :param default: returned if the header isn't available
+        """
+        return self.headers.get(name, default)
+
+    def getheaders(self):
+        """
+        Get the headers as a list of (name, value) tuples.
+        """
+        return list(self.headers.items())
+
+
+class AsyncConnection(object):
+    """
+    The asyncio counterpart of *hcpsdk.Connection*, using asyncio streams.
+
+    Instead of creating *AsyncConnection*\\ s directly, check them out from
+    the *AsyncTarget*, which pools them.
+    """
+
+    def __init__(self, target, timeout=30, idletime=30, retries=0):
+        """
+        :param target:      an *AsyncTarget* object
+        :param timeout:     the timeout for this Connection (secs)
+        :param idletime:    the time the Connection shall stay persistent
+                            when idle (secs)
+        :param retries:     the number of retries until giving up on a
+                            Request
+        """
+        self.logger = logging.getLogger(__name__ + '.AsyncConnection')
+        self.__target = target
+        self.__address = None
+        self.__timeout = timeout
+        self.__idletime = float(idletime)
+        self.__retries = retries
+        self.__policy = target.retrypolicy
+
+        self.__reader = None
+        self.__writer = None
+        self.__lastused = 0.0  # time.monotonic() of the end of the last Request
+        self.__inflight = None  # the IP address of a Request in flight
+        self.__s_t = 0.0  # the time the Request in flight was started
+        self._response = None
+
+        self.__connect_time = 0.0
+        self.__service_time1 = 0.0
+        self.__service_time2 = 0.0
+
+    async def _connect(self):
+        """
+        Open the stream to an IP address acquired from the *AsyncTarget*.
+        """
+        self.__address = await self.__target.getaddr()
+        if self.__target.ssl:
+            kwargs = {'ssl': self.__target.sslcontext,
+                      'server_hostname': self.__address}
+        else:
+            kwargs = {}
+        c_t = time.perf_counter()
+        self.__reader, self.__writer = await asyncio.wait_for(
+            asyncio.open_connection(self.__address, self.__target.port,
+                                    **kwargs),
+            self.__timeout)
+        self.__connect_time = time.perf_counter() - c_t
+        self.logger.log(logging.DEBUG,
+                        'Connection open: IP {} ({}) - connect_time: {:0.17f}'
+                        .format(self.__address, self.__target.fqdn,
+                                self.__connect_time))
+
+    async def request(self, method, url, body=None, params=None,
+                      headers=None):
+        """
+        Send a request to HCP and get the *Response*. Retries and error
+        handling mimic *hcpsdk.Connection.request()*.
+
+        :param method:  any valid http method (GET,HEAD,PUT,POST,DELETE)
+        :param url:     the url to access w/o the server part (i.e:
+                        /rest/path/object); url quoting will be done if
+                        necessary, but existing quoting will not be touched
+        :param body:    the payload to send (bytes, str or a file object
+                        opened for binary read)
+        :param params:  a dictionary or a list of 2-tuples with parameters
+                        to be added to the Request
+        :param headers: a dictionary holding additional key/value pairs to
+                        add to the auto-prepared header
+        :return:        an *AsyncResponse* object
+        :raises:        one of the *hcpsdk.Hcpsdk[..]Error*\\ s or
+                        *hcpsdk.ips.IpsError* in case name resolution failed
+        """
+        if self.__writer:
+            if self._response and not self._response.isclosed():
+                # the former Response hasn't been read completely
+                self._abort()
+            elif time.monotonic() - self.__lastused > self.__idletime:
+                self._abort()
+
+        # the Target's headers win, as with hcpsdk.Connection
+        hdrs = dict(headers or {}, **self.__target._baseheaders)
+        url = hcpsdk._quoteurl(url)[0]
+        if params:
+            url = url + '?' + urlencode(params)
+
+        if isinstance(body, str):
+            body = body.encode('iso-8859-1')
+        if body is None:
+            length = 0 if method in ('PUT', 'POST') else None
+            offset = None
+        elif hasattr(body, 'read'):
+            length = httpclient._bodysize(body)[0]
+            if length is None:
+                # not seekable - read it up front, to be able to retry
+                body = body.read()
+                length, offset = len(body), None
+            else:
+                offset = body.tell()
+        else:
+            length = httpclient._bodylength(body)
+            offset = None
+        if length is not None:
+            hdrs['Content-Length'] = str(length)
+        hdrs.setdefault('Accept-Encoding', 'identity')
+        head = '{} {} HTTP/1.1\r\n{}\r\n'.format(
+            method, url,
+            ''.join(['{}: {}\r\n'.format(k, v) for k, v in hdrs.items()])
+        ).encode('iso-8859-1')
+
+        # noinspection PyProtectedMember
+        self.__policy._request()
+        retries = 0
+        while True:
+            try:
+                if not self.__writer:
+                    await self._connect()
+                if offset is not None:
+                    body.seek(offset)
+                self.logger.log(logging.DEBUG, '{}: About to request for {}'
+                                .format(method, url))
+                s_t = self.__s_t = time.perf_counter()
+                self._finished()
+                self.__inflight = self.__address
+                self.__target.ipaddrqry.started(self.__inflight)
+                await asyncio.wait_for(self.__send(head, body),
+                                       self.__timeout)
+                self.__service_time1 = self.__service_time2 = \
+                    time.perf_counter() - s_t
+                self._response = await asyncio.wait_for(
+                    self.__readresponse(method), self.__timeout)
+            except ips.IpsError:
+                raise
+            except ssl.SSLError as e:
+                self._abort()
+                raise hcpsdk.HcpsdkCertificateError(str(e))
+            except ConnectionRefusedError as e:
+                self._abort()
+                self.__target.ipaddrqry.failed(self.__address)
+                raise hcpsdk.HcpsdkError('Unable to connect ({})'
+                                         .format(str(e)))
+            except (asyncio.TimeoutError, OSError,
+                    asyncio.IncompleteReadError,
+                    http.client.HTTPException) as e:
+                # timeouts, aborted or reset connections as well as HCP
+                # having closed the connection are retried on a fresh
+                # connection, after urging the Target to refresh its
+                # IP addresses
+                self._abort()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.__target.ipaddrqry.failed(self.__address)
+                self.logger.debug('{}: {} Request for {} failed ({})'
+                                  .format(type(e).__name__, method, url, e))
+                if retries < self.__retries and self.__policy.retry(e):
+                    retries += 1
+                    self.logger.log(logging.DEBUG, '{} - retry # {}'
+                                    .format(type(e).__name__, retries))
+                    await self.__target.ipaddrqry.refresh(wait=False)
+                    await asyncio.sleep(self.__policy.delay(retries))
+                    continue
+                raise hcpsdk.HcpsdkTimeoutError(
+                    '{} (giving up after {} retries) - {}'
+                    .format(type(e).__name__, retries, url))
+            else:
+                self.__target.ipaddrqry.succeeded(self.__address)
+                self.__service_time2 = time.perf_counter() - s_t
+                self.logger.log(logging.DEBUG,
+                                '{} Request for {} - service_time2 = '
+                                '{:0.17f}'
+                                .format(method, url, self.__service_time2))
+                status = self._response.status
+                if status in self.__policy.statuses and \
+                        retries < self.__retries and \
+                        self.__policy.retry(status=status):
+                    # i.e. 503 - HCP is busy; drop the Response and retry
+                    # after the time HCP asked for
+                    retryafter = self._response.getheader('Retry-After')
+                    await self.read()
+                    retries += 1
+                    await asyncio.sleep(self.__policy.delay(retries,
+                                                            retryafter))
+                    continue
+                return self._response
+
+    async def __send(self, head, body):
+        """
+        Send the request head and body.
+        """
+        if body is None:
+            self.__writer.write(head)
+        elif hasattr(body, 'read'):
+            self.__writer.write(head)
+            while True:
+                data = body.read(BLOCKSIZE)
+                if not data:
+                    break
+                self.__writer.write(data)
+                await self.__writer.drain()
+        else:
+            self.__writer.write(head)
+            self.__writer.write(body)
+        await self.__writer.drain()
+
+    async def __readresponse(self, method):
+        """
+        Read the status line and the headers of a *Response*.
+        """
+        while True:
+            line = await self.__reader.readline()
+            if not line:
+                raise http.client.RemoteDisconnected('Remote end closed '
+                                                     'connection without '
+                                                     'response')
+            try:
+                version, status, reason = \
+                    (line.decode('iso-8859-1').strip().split(None, 2) +
+                     [''])[:3]
+                status = int(status)
+            except ValueError:
+                raise http.client.BadStatusLine(line)
+            if not version.startswith('HTTP/'):
+                raise http.client.BadStatusLine(line)
+
+            lines = []
+            while True:
+                line = await self.__reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                lines.append(line)
+            headers = http.client.parse_headers(
+                io.BytesIO(b''.join(lines) + b'\r\n'))
+            if status != http.client.CONTINUE:
+                return AsyncResponse(self.__reader, method, version, status,
+                                     reason, headers, self.__finished)
+
+    def _finished(self, service_time=None):
+        """
+        Report the Request in flight (if any) to be finished.
+
+        :param service_time:    the time the Request took, *None* if it
+                                failed or wasn't read completely
+        """
+        if self.__inflight:
+            self.__target.ipaddrqry.finished(self.__inflight, service_time)
+            self.__inflight = None
+
+    def __finished(self, response):
+        """
+        Called by the *AsyncResponse* when its body has been read.
+        """
+        self.__lastused = time.monotonic()
+        self._finished(time.perf_counter() - self.__s_t)
+        if response.willclose:
+            self._abort()
+
+    async def read(self, amt=None):
+        """
+        Read amt # of bytes (or all, if amt isn't given) from a *Response*.
+
+        :param amt: number of bytes to read
+        :return:    the requested number of bytes; fewer (or zero) bytes
+                    signal end of transfer, which means that the Connection
+                    is ready for another Request.
+        :raises:    *HcpsdkTimeoutError* in case of a timeout,
+                    *HcpsdkError* in all other cases.
+        """
+        s_t = time.perf_counter()
+        try:
+            buf = await asyncio.wait_for(self._response.read(amt),
+                                         self.__timeout)
+            self.__service_time1 = time.perf_counter() - s_t
+        except AttributeError as e:
+            raise hcpsdk.HcpsdkError('faulty read: {}'.format(str(e)))
+        except asyncio.TimeoutError as e:
+            self._abort()
+            raise hcpsdk.HcpsdkTimeoutError('read: timeout')
+        except (http.client.IncompleteRead, OSError) as e:
+            self._abort()
+            raise hcpsdk.HcpsdkError('read error: {}'.format(str(e)))
+        else:
+            self.__service_time2 += self.__service_time1
+            return buf
+
+    # noinspection PyPep8Naming
+    async def PUT(self, url, body=None, params=None, headers=None):
+        """
+        Convenience method for request() - PUT an object.
+        Cleans up and leaves the Connection ready for the next Request.
+        """
+        r = await self.request('PUT', url, body, params, headers)
+        await self.read()
+        return r
+
+    # noinspection PyPep8Naming
+    async def GET(self, url, params=None, headers=None):
+        """
+        Convenience method for request() - GET an object.
+        You need to fully *read()* the requested content from the Connection
+        before it can be used for another Request.
+        """
+        return await self.request('GET', url, params=params, headers=headers)
+
+    # noinspection PyPep8Naming
+    async def HEAD(self, url, params=None, headers=None):
+        """
+        Convenience method for request() - HEAD - get metadata of an object.
+        Cleans up and leaves the Connection ready for the next Request.
+        """
+        r = await self.request('HEAD', url, params=params, headers=headers)
+        await self.read()
+        return r
+
+    # noinspection PyPep8Naming
+    async def POST(self, url, body=None, params=None, headers=None):
+        """
+        Convenience method for request() - POST metadata.
+        Does no clean-up, as a POST can have a response body!
+        """
+        return await self.request('POST', url, body=body, params=params,
+                                  headers=headers)
+
+    # noinspection PyPep8Naming
+    async def DELETE(self, url, params=None, headers=None):
+        """
+        Convenience method for request() - DELETE an object.
+        Cleans up and leaves the Connection ready for the next Request.
+        """
+        r = await self.request('DELETE', url, params=params, headers=headers)
+        await self.read()
+        return r
+
+    def getheader(self, *args, **kwargs):
+        """
+        Used to get a single *Response* header.
+        """
+        return self._response.getheader(*args, **kwargs)
+
+    def getheaders(self):
+        """
+        Used to get a the *Response* headers.
+        """
+        return self._response.getheaders()
+
+    def _abort(self):
+        """
+        Close the stream, without waiting for it to be closed.
+        """
+        self._finished()
+        if self.__writer:
+            self.__writer.close()
+            self.__writer = self.__reader = None
+            self.logger.log(logging.DEBUG,
+                            'Connection object closed: IP {} ({})'
+                            .format(self.__address, self.__target.fqdn))
+
+    async def close(self):
+        """
+        Close the Connection.
+        """
+        writer = self.__writer
+        self._abort()
+        if writer:
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    # properties for externally visible attributes
+    def __getaddress(self):
+        return self.__address
+    address = property(__getaddress, None, None,
+                       'The IP address for which this object was initialized '
+                       '(r/o)')
+
+    def __getresponse(self):
+        return self._response
+    response = property(__getresponse, None, None,
+                        'The *AsyncResponse* object for the last Request '
+                        '(r/o)')
+
+    def __getresponse_status(self):
+        return self._response.status
+    response_status = property(__getresponse_status, None, None,
+                               'The HTTP status code of the last Request '
+                               '(r/o)')
+
+    def __getresponse_reason(self):
+        return self._response.reason
+    response_reason = property(__getresponse_reason, None, None,
+                               'The corresponding HTTP status message (r/o)')
+
+    def __getconnect_time(self):
+        return self.__connect_time or 0.00000000001
+    connect_time = property(__getconnect_time, None, None,
+                            'The time in seconds the last connect took (r/o)')
+
+    def __getservice_time1(self):
+        return self.__service_time1 or 0.00000000001
+    service_time1 = property(__getservice_time1, None, None,
+                             'The time in seconds the last action on a '
+                             'Request took (r/o)')
+
+    def __getservice_time2(self):
+        return self.__service_time2 or 0.00000000001
+    service_time2 = property(__getservice_time2, None, None,
+                             'Duration in secods of the complete Request up '
+                             'to now (r/o)')
+
+    def __repr__(self):
+        return ('{}({}, timeout={}, idletime={}, retries={})'
+                .format(__class__.__name__, repr(self.__target),
+                        self.__timeout, self.__idletime, self.__retries))
+
+    def __str__(self):
+        return ("{} initialized for fqdn {} @ {}"
+                .format(__class__.__name__, self.__target.fqdn,
+                        self.__address))
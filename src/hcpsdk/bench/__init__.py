@@ -0,0 +1,650 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import sys
+import time
+import math
+import json
+import random
+import asyncio
+import argparse
+import itertools
+import threading
+import logging
+from collections import OrderedDict, Counter
+import hcpsdk
+
+
+__all__ = ['BenchError', 'Results', 'run', 'run_async', 'main']
+
+logging.getLogger('hcpsdk.bench').addHandler(logging.NullHandler())
+
+OPS = ('PUT', 'GET', 'HEAD', 'DELETE')
+PERCENTILES = (50, 90, 99, 99.9)
+BLOCKSIZE = 2**18  # the size of the blocks read from a GET response
+UNITS = {'': 1, 'k': 2**10, 'm': 2**20, 'g': 2**30}
+
+
+class BenchError(Exception):
+    """
+    Signal that a benchmark could not be run.
+    """
+
+    def __init__(self, reason):
+        """
+        :param reason:  an error description
+        """
+        self.args = (reason,)
+
+
+def percentile(values, p):
+    """
+    Get the *p*-th percentile (nearest rank) of a sorted list.
+
+    :param values:  a sorted list of values
+    :param p:       the percentile (0 < p <= 100)
+    :return:        the value, or 0.0 if *values* is empty
+    """
+    if not values:
+        return 0.0
+    rank = math.ceil(round(p * len(values) / 100, 6))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def parsemix(mix):
+    """
+    Parse a request mix like ``'PUT:1,GET:4'`` into a dict of weights.
+
+    :param mix: the mix as string
+    :return:    a dict {operation: weight}
+    :raises:    *BenchError* on an invalid mix
+    """
+    weights = OrderedDict()
+    for item in mix.split(','):
+        op, _, weight = item.strip().partition(':')
+        op = op.upper()
+        if op not in OPS:
+            raise BenchError('unknown operation: {}'.format(op))
+        try:
+            weights[op] = float(weight or 1)
+        except ValueError:
+            raise BenchError('invalid weight: {}'.format(item))
+    if not sum(weights.values()) > 0:
+        raise BenchError('invalid mix: {}'.format(mix))
+    return weights
+
+
+def parsesize(size):
+    """
+    Parse an object size like ``'4k'`` or ``'16M'`` into bytes.
+
+    :param size:    the size as string
+    :return:        the size in bytes
+    :raises:        *BenchError* on an invalid size
+    """
+    size = size.strip().lower().rstrip('b')
+    try:
+        return int(float(size.rstrip('kmg')) * UNITS[size[-1:]
+                   if size[-1:] in UNITS else ''])
+    except ValueError:
+        raise BenchError('invalid size: {}'.format(size))
+
+
+class _OpStats(object):
+    """
+    The measurements for a single operation, collected by a single worker.
+    """
+
+    def __init__(self):
+        self.latencies = []  # the end-to-end time of each request
+        self.service_time1 = []  # the time sending the request took
+        self.service_time2 = []  # the time incl. reading the response
+        self.bytes = 0
+        self.errors = 0
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.service_time1.extend(other.service_time1)
+        self.service_time2.extend(other.service_time2)
+        self.bytes += other.bytes
+        self.errors += other.errors
+
+
+class Results(object):
+    """
+    The results of a benchmark run.
+    """
+
+    def __init__(self, mode, concurrency):
+        """
+        :param mode:        'threads' or 'async'
+        :param concurrency: the number of concurrent workers
+        """
+        self.mode = mode
+        self.concurrency = concurrency
+        self.elapsed = 0.0
+        self.ops = OrderedDict((op, _OpStats()) for op in OPS)
+        self.connects = []  # the connect_time of each new connection
+
+    def _merge(self, ops, connects):
+        for op, stats in ops.items():
+            self.ops[op].merge(stats)
+        self.connects.extend(connects)
+
+    def summary(self):
+        """
+        Summarize the results.
+
+        :return:    a dict holding the overall figures, a dict per
+                    operation and the connect times; times are in seconds
+        """
+        elapsed = self.elapsed or 1e-9
+        d = OrderedDict([('mode', self.mode),
+                         ('concurrency', self.concurrency),
+                         ('elapsed', self.elapsed),
+                         ('requests', 0), ('errors', 0), ('bytes', 0)])
+        ops = OrderedDict()
+        for op, stats in self.ops.items():
+            if not stats.latencies:
+                continue
+            lat = sorted(stats.latencies)
+            o = OrderedDict([('requests', len(lat)),
+                             ('errors', stats.errors),
+                             ('bytes', stats.bytes),
+                             ('req/s', len(lat) / elapsed),
+                             ('MiB/s', stats.bytes / elapsed / 2**20)])
+            for p in PERCENTILES:
+                o['p{:g}'.format(p)] = percentile(lat, p)
+            o['service_time1'] = sum(stats.service_time1) / len(lat)
+            o['service_time2'] = sum(stats.service_time2) / len(lat)
+            ops[op] = o
+            d['requests'] += len(lat)
+            d['errors'] += stats.errors
+            d['bytes'] += stats.bytes
+        d['req/s'] = d['requests'] / elapsed
+        d['MiB/s'] = d['bytes'] / elapsed / 2**20
+        d['ops'] = ops
+        connects = sorted(self.connects)
+        d['connects'] = OrderedDict(
+            [('count', len(connects)),
+             ('avg', sum(connects) / len(connects) if connects else 0.0)] +
+            [('p{:g}'.format(p), percentile(connects, p))
+             for p in PERCENTILES])
+        return d
+
+    def report(self):
+        """
+        Format the results as a table.
+
+        :return:    a multi-line string
+        """
+        d = self.summary()
+        ms = lambda x: '{:.2f}'.format(x * 1000)
+        lines = ['{} {} - {:.1f} secs, {} requests ({} errors), {:.1f} req/s, '
+                 '{:.2f} MiB/s'.format(d['concurrency'], d['mode'],
+                                       d['elapsed'], d['requests'],
+                                       d['errors'], d['req/s'], d['MiB/s']),
+                 '',
+                 '{:<6} {:>8} {:>6} {:>9} {:>8} {:>8} {:>8} {:>8} {:>8} '
+                 '{:>8} {:>8}'.format('op', 'requests', 'errors', 'req/s',
+                                      'MiB/s', 'p50 ms', 'p90 ms', 'p99 ms',
+                                      'p99.9 ms', 'svc1 ms', 'svc2 ms')]
+        for op, o in d['ops'].items():
+            lines.append('{:<6} {:>8} {:>6} {:>9.1f} {:>8.2f} {:>8} {:>8} '
+                         '{:>8} {:>8} {:>8} {:>8}'
+                         .format(op, o['requests'], o['errors'], o['req/s'],
+                                 o['MiB/s'], ms(o['p50']), ms(o['p90']),
+                                 ms(o['p99']), ms(o['p99.9']),
+                                 ms(o['service_time1']),
+                                 ms(o['service_time2'])))
+        c = d['connects']
+        lines.extend(['', 'connects: {} - avg {} ms, p50 {} ms, p99 {} ms'
+                      .format(c['count'], ms(c['avg']), ms(c['p50']),
+                              ms(c['p99']))])
+        return '\n'.join(lines)
+
+
+class _Plan(object):
+    """
+    The state shared by the workers of a run: which operation to issue
+    next, the objects available to read, and when to stop.
+    """
+
+    def __init__(self, mix, sizes, path, duration, requests, seed):
+        self.weights = parsemix(mix) if isinstance(mix, str) else mix
+        self.sizes = sizes
+        self.data = {s: os.urandom(s) for s in set(sizes)}
+        self.path = path.rstrip('/') + '/' + '{:x}'.format(
+            int(time.time() * 1000))
+        self.duration = duration
+        self.requests = requests
+        self.names = []  # the objects available for GET/HEAD/DELETE
+        self.reading = Counter()  # the GET/HEADs in flight per object
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.__count = itertools.count()
+        self.__serial = itertools.count()
+        self.__deadline = None
+
+    def start(self):
+        self.__deadline = time.monotonic() + self.duration \
+            if self.duration else None
+
+    def more(self):
+        """
+        Tell if another request is due (thread-safe).
+        """
+        if self.__deadline and time.monotonic() >= self.__deadline:
+            return False
+        return not self.requests or next(self.__count) < self.requests
+
+    def next(self):
+        """
+        Pick the next operation.
+
+        :return:    a 3-tuple (operation, url, body)
+        """
+        with self.lock:
+            op = self.random.choices(list(self.weights),
+                                     list(self.weights.values()))[0]
+            if op != 'PUT' and self.names:
+                i = self.random.randrange(len(self.names))
+                if op != 'DELETE':
+                    self.reading[self.names[i]] += 1
+                    return op, self.names[i], None
+                elif not self.reading[self.names[i]]:
+                    # don't delete objects that are being read
+                    self.names[i], self.names[-1] = \
+                        self.names[-1], self.names[i]
+                    return op, self.names.pop(), None
+            size = self.random.choice(self.sizes)
+        return ('PUT', '{}/{}'.format(self.path, next(self.__serial)),
+                self.data[size])
+
+    def done(self, op, url, ok):
+        """
+        Record the outcome of an operation.
+        """
+        if op == 'PUT':
+            if ok:
+                with self.lock:
+                    self.names.append(url)
+        elif op != 'DELETE':
+            with self.lock:
+                self.reading[url] -= 1
+                if not self.reading[url]:
+                    del self.reading[url]
+
+
+def _issue(con, op, url, body, buf):
+    """
+    Issue a single request on an *hcpsdk.Connection* and read the response.
+
+    :return:    a 3-tuple (success, bytes transferred, time sending the
+                request took)
+    """
+    r = con.request(op, url, body=body)
+    service_time1 = con.service_time1
+    size = len(body) if body else 0
+    if op == 'GET':
+        n = con.readinto(buf)
+        while n:
+            size += n
+            n = con.readinto(buf)
+    else:
+        con.read()
+    return 200 <= r.status < 300, size, service_time1
+
+
+def _worker(target, plan, results, jobs, conargs):
+    """
+    A thread running requests on its own *hcpsdk.Connection*, either
+    picked from the *plan* and measured, or taken from a list of *jobs*
+    (which isn't measured).
+    """
+    ops = OrderedDict((op, _OpStats()) for op in OPS)
+    connects = []
+    buf = bytearray(BLOCKSIZE)
+    con = hcpsdk.Connection(target, **conargs)
+    try:
+        while True:
+            if jobs is not None:
+                try:
+                    op, url, body = jobs.pop()
+                except IndexError:
+                    break
+            elif plan.more():
+                op, url, body = plan.next()
+            else:
+                break
+            if not con.con:
+                con.connect()
+                connects.append(con.connect_time)
+            stats = ops[op]
+            s_t = time.perf_counter()
+            try:
+                ok, size, service_time1 = _issue(con, op, url, body, buf)
+            except (hcpsdk.HcpsdkError, hcpsdk.ips.IpsError) as e:
+                logging.getLogger(__name__).debug('{} {} failed: {}'
+                                                  .format(op, url, e))
+                ok, size, service_time1 = False, 0, 0.0
+            if jobs is None:
+                stats.latencies.append(time.perf_counter() - s_t)
+                stats.service_time1.append(service_time1)
+                stats.service_time2.append(con.service_time2 if ok else 0.0)
+                stats.bytes += size
+                stats.errors += not ok
+            plan.done(op, url, ok)
+    finally:
+        con.close()
+    if jobs is None:
+        with plan.lock:
+            results._merge(ops, connects)
+
+
+def _prepare(plan, objects):
+    """
+    Create the PUTs for the objects to be read or deleted during a run.
+    """
+    if set(plan.weights) - {'PUT'} and objects:
+        return [('PUT', '{}/prep-{}'.format(plan.path, i),
+                 plan.data[plan.sizes[i % len(plan.sizes)]])
+                for i in range(objects)]
+    return []
+
+
+def _runthreads(target, plan, concurrency, jobs, results, conargs):
+    """
+    Run *concurrency* workers and wait for them to finish.
+    """
+    threads = [threading.Thread(target=_worker, name='hcpsdk-bench-{}'
+                                .format(i),
+                                args=(target, plan, results, jobs, conargs),
+                                daemon=True)
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run(target, mix='PUT:1,GET:4,HEAD:1,DELETE:1', sizes=(4096,),
+        concurrency=8, duration=None, requests=None,
+        path='/rest/hcpsdk-bench', objects=100, keep=False, seed=None,
+        **conargs):
+    """
+    Run a benchmark with a number of threads, each using its own
+    *hcpsdk.Connection*.
+
+    :param target:      an *hcpsdk.Target* object
+    :param mix:         the weighted mix of operations, either as a string
+                        like ``'PUT:1,GET:4'`` or as a dict
+    :param sizes:       a list of object sizes (bytes) used for PUTs,
+                        picked at random
+    :param concurrency: the number of threads
+    :param duration:    run for that many seconds...
+    :param requests:    ...or until that many requests have been issued
+    :param path:        the folder to write the objects to
+    :param objects:     the number of objects to create before the run, if
+                        the mix reads or deletes objects
+    :param keep:        don't delete the objects left after the run
+    :param seed:        seed for picking operations and sizes
+    :param conargs:     more keyword arguments handed over to
+                        *hcpsdk.Connection()* (timeout, idletime, retries)
+    :return:            a *Results* object
+    :raises:            *BenchError* on invalid arguments
+    """
+    if not (duration or requests):
+        raise BenchError('either duration or requests is required')
+    plan = _Plan(mix, list(sizes), path, duration, requests, seed)
+    results = Results('threads', concurrency)
+    prep = _prepare(plan, objects)
+    if prep:
+        _runthreads(target, plan, concurrency, prep, None, conargs)
+    plan.start()
+    s_t = time.perf_counter()
+    _runthreads(target, plan, concurrency, None, results, conargs)
+    results.elapsed = time.perf_counter() - s_t
+    if not keep:
+        _runthreads(target, plan, concurrency,
+                    [('DELETE', n, None) for n in plan.names], None, conargs)
+    return results
+
+
+async def _aissue(con, op, url, body):
+    """
+    Issue a single request on an *hcpsdk.aio.AsyncConnection* and read the
+    response.
+
+    :return:    a 3-tuple (success, bytes transferred, time sending the
+                request took)
+    """
+    r = await con.request(op, url, body=body)
+    service_time1 = con.service_time1
+    size = len(body) if body else 0
+    if op == 'GET':
+        chunk = await con.read(BLOCKSIZE)
+        while chunk:
+            size += len(chunk)
+            chunk = await con.read(BLOCKSIZE)
+    else:
+        await con.read()
+    return 200 <= r.status < 300, size, service_time1
+
+
+async def _aworker(target, plan, results, jobs):
+    """
+    The asyncio counterpart of *_worker()*, using an *AsyncConnection*
+    checked out from the *AsyncTarget*.
+    """
+    ops = OrderedDict((op, _OpStats()) for op in OPS)
+    connects = []
+    con = await target.checkout()
+    try:
+        while True:
+            if jobs is not None:
+                try:
+                    op, url, body = jobs.pop()
+                except IndexError:
+                    break
+            elif plan.more():
+                op, url, body = plan.next()
+            else:
+                break
+            stats = ops[op]
+            connect_time = con.connect_time
+            s_t = time.perf_counter()
+            try:
+                ok, size, service_time1 = await _aissue(con, op, url,
+                                                             body)
+            except (hcpsdk.HcpsdkError, hcpsdk.ips.IpsError) as e:
+                logging.getLogger(__name__).debug('{} {} failed: {}'
+                                                  .format(op, url, e))
+                ok, size, service_time1 = False, 0, 0.0
+            if jobs is None:
+                stats.latencies.append(time.perf_counter() - s_t)
+                stats.service_time1.append(service_time1)
+                stats.service_time2.append(con.service_time2 if ok else 0.0)
+                stats.bytes += size
+                stats.errors += not ok
+                if con.connect_time != connect_time:
+                    # the request had to open a new stream
+                    connects.append(con.connect_time)
+            plan.done(op, url, ok)
+    finally:
+        target.checkin(con)
+    if jobs is None:
+        results._merge(ops, connects)
+
+
+async def _runtasks(target, plan, concurrency, jobs, results):
+    """
+    Run *concurrency* tasks and wait for them to finish.
+    """
+    await asyncio.gather(*[_aworker(target, plan, results, jobs)
+                           for i in range(concurrency)])
+
+
+async def run_async(target, mix='PUT:1,GET:4,HEAD:1,DELETE:1', sizes=(4096,),
+                    concurrency=8, duration=None, requests=None,
+                    path='/rest/hcpsdk-bench', objects=100, keep=False,
+                    seed=None):
+    """
+    Run a benchmark with a number of asyncio tasks, each using an
+    *hcpsdk.aio.AsyncConnection* checked out from *target*. The parameters
+    are the same as for *run()*, except that *target* is an
+    *hcpsdk.aio.AsyncTarget* object (which should allow for at least
+    *concurrency* connections).
+
+    :return:    a *Results* object
+    :raises:    *BenchError* on invalid arguments
+    """
+    if not (duration or requests):
+        raise BenchError('either duration or requests is required')
+    plan = _Plan(mix, list(sizes), path, duration, requests, seed)
+    results = Results('async', concurrency)
+    prep = _prepare(plan, objects)
+    if prep:
+        await _runtasks(target, plan, concurrency, prep, None)
+        await target.close()  # start the run with new connections
+    plan.start()
+    s_t = time.perf_counter()
+    await _runtasks(target, plan, concurrency, None, results)
+    results.elapsed = time.perf_counter() - s_t
+    if not keep:
+        await _runtasks(target, plan, concurrency,
+                        [('DELETE', n, None) for n in plan.names], None)
+    return results
+
+
+def main(args=None):
+    """
+    The *hcpsdk-bench* command.
+
+    :param args:    the command line arguments (defaults to sys.argv[1:])
+    :return:        the exit code
+    """
+    parser = argparse.ArgumentParser(prog='hcpsdk-bench',
+                                     description='Benchmark hcpsdk against '
+                                                 'HCP or hcpsdk.emulator')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--fqdn', help='the FQDN of the namespace '
+                                       '(namespace.tenant.hcp.loc)')
+    target.add_argument('--emulator', action='store_true',
+                        help='run against a local hcpsdk.emulator')
+    parser.add_argument('--port', type=int, default=443,
+                        help='the port to use (%(default)s)')
+    parser.add_argument('-u', '--user', default='',
+                        help='the data access user')
+    parser.add_argument('-p', '--password', default='',
+                        help='the user\'s password')
+    parser.add_argument('--dnscache', action='store_true',
+                        help='use the system resolver')
+    parser.add_argument('--mix', default='PUT:1,GET:4,HEAD:1,DELETE:1',
+                        help='the weighted mix of operations (%(default)s)')
+    parser.add_argument('--size', default='4k',
+                        help='comma-separated object sizes, picked at random '
+                             '(%(default)s)')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='the number of threads or tasks (%(default)s)')
+    parser.add_argument('--async', dest='asyncmode', action='store_true',
+                        help='use hcpsdk.aio tasks instead of threads')
+    stop = parser.add_mutually_exclusive_group()
+    stop.add_argument('-d', '--duration', type=float,
+                      help='run for that many seconds (10)')
+    stop.add_argument('-n', '--requests', type=int,
+                      help='run until that many requests have been issued')
+    parser.add_argument('--path', default='/rest/hcpsdk-bench',
+                        help='the folder to write to (%(default)s)')
+    parser.add_argument('--objects', type=int, default=100,
+                        help='the number of objects to create before the '
+                             'run (%(default)s)')
+    parser.add_argument('--keep', action='store_true',
+                        help='don\'t delete the objects after the run')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='retries per request (%(default)s)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='the timeout per request (%(default)s)')
+    parser.add_argument('--limit', choices=['aimd', 'gradient'],
+                        help='limit the requests in flight to what HCP can '
+                             'take (not with --async)')
+    parser.add_argument('--seed', type=int, help='seed for the mix')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args(args)
+
+    try:
+        kwargs = {'mix': parsemix(args.mix),
+                  'sizes': [parsesize(s) for s in args.size.split(',')],
+                  'concurrency': args.concurrency,
+                  'duration': args.duration,
+                  'requests': args.requests,
+                  'path': args.path, 'objects': args.objects,
+                  'keep': args.keep, 'seed': args.seed}
+    except BenchError as e:
+        parser.error(str(e))
+    if not (args.duration or args.requests):
+        kwargs['duration'] = 10
+
+    emulator = None
+    if args.emulator:
+        from hcpsdk.emulator import Emulator
+        emulator = Emulator().start()
+        fqdn, port, dnscache = 'localhost', emulator.port, True
+    else:
+        fqdn, port, dnscache = args.fqdn, args.port, args.dnscache
+    auth = hcpsdk.NativeAuthorization(args.user, args.password)
+
+    try:
+        if args.asyncmode:
+            from hcpsdk.aio import AsyncTarget
+            t = AsyncTarget(fqdn, auth, port=port, dnscache=dnscache,
+                            maxconnections=args.concurrency,
+                            timeout=args.timeout, retries=args.retries)
+
+            async def _run():
+                try:
+                    return await run_async(t, **kwargs)
+                finally:
+                    await t.close()
+            results = asyncio.run(_run())
+        else:
+            limiter = {'aimd': hcpsdk.limit.AIMD,
+                       'gradient': hcpsdk.limit.Gradient}[args.limit]() \
+                if args.limit else None
+            t = hcpsdk.Target(fqdn, auth, port=port, dnscache=dnscache,
+                              limiter=limiter)
+            results = run(t, timeout=args.timeout, retries=args.retries,
+                          **kwargs)
+    except (hcpsdk.HcpsdkError, hcpsdk.ips.IpsError) as e:
+        sys.exit('hcpsdk-bench: {}'.format(e))
+    finally:
+        if emulator:
+            emulator.stop()
+
+    if args.json:
+        print(json.dumps(results.summary(), indent=4))
+    else:
+        print('{} {}:{}'.format(args.mix, fqdn, port))
+        print(results.report())
+    return 0
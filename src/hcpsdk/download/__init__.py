@@ -0,0 +1,520 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import io
+import os
+import threading
+import logging
+from collections import deque, OrderedDict
+import hcpsdk
+
+
+__all__ = ['DownloadError', 'download', 'HcpObjectFile']
+
+logging.getLogger('hcpsdk.download').addHandler(logging.NullHandler())
+
+CHUNKSIZE = 2**24  # the default size of a byte range (16 MiB)
+BLOCKSIZE = 2**20  # the size of the blocks read from a response (1 MiB)
+FILEBLOCKSIZE = 2**16  # the default block size of an HcpObjectFile (64 KiB)
+
+
+class DownloadError(Exception):
+    """
+    Signal that a download failed.
+    """
+
+    def __init__(self, reason):
+        """
+        :param reason:  an error description
+        """
+        self.args = (reason,)
+
+
+class _Range(object):
+    """
+    A byte range still to be fetched.
+    """
+
+    def __init__(self, start, end):
+        self.start = start  # the first byte not yet fetched
+        self.end = end  # the last byte of the range
+        self.attempts = 0
+
+    def __str__(self):
+        return 'bytes={}-{}'.format(self.start, self.end)
+
+
+class _Sink(object):
+    """
+    Writes blocks at a given offset into a file descriptor or a buffer.
+    """
+
+    def __init__(self, dest, size):
+        """
+        :param dest:    a filename, a file object or a writable buffer
+        :param size:    the size of the object to be downloaded
+        """
+        self.__fd = self.__buf = None
+        self.__ownfd = False
+        self.__lock = threading.Lock()  # for systems lacking os.pwrite()
+        if isinstance(dest, (str, bytes, os.PathLike)):
+            self.__fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC |
+                                getattr(os, 'O_BINARY', 0), 0o666)
+            self.__ownfd = True
+        elif hasattr(dest, 'fileno'):
+            dest.flush()
+            self.__fd = dest.fileno()
+        else:
+            self.__buf = memoryview(dest).cast('B')
+            if len(self.__buf) < size:
+                raise DownloadError('buffer too small ({} < {} bytes)'
+                                    .format(len(self.__buf), size))
+            return
+
+        os.ftruncate(self.__fd, size)
+        if hasattr(os, 'posix_fallocate') and size:
+            try:
+                os.posix_fallocate(self.__fd, 0, size)
+            except OSError:
+                pass  # not supported by the filesystem - no big deal
+
+    def view(self, offset, size):
+        """
+        Get the part of the buffer to read *size* bytes at *offset* into.
+
+        :return:    a *memoryview*, or None if writing to a file
+        """
+        if self.__buf is not None:
+            return self.__buf[offset:offset + size]
+        return None
+
+    def write(self, offset, data):
+        """
+        Write *data* at *offset*.
+        """
+        if self.__buf is not None:
+            self.__buf[offset:offset + len(data)] = data
+        elif hasattr(os, 'pwrite'):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(self.__fd, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            with self.__lock:
+                os.lseek(self.__fd, offset, os.SEEK_SET)
+                os.write(self.__fd, data)
+
+    def close(self):
+        if self.__ownfd:
+            os.close(self.__fd)
+        elif self.__buf is not None:
+            self.__buf.release()
+
+
+def download(target, url, dest, parallel=8, chunksize=CHUNKSIZE, retries=3,
+             params=None, headers=None, timeout=30):
+    """
+    Download an object by fetching byte ranges of it in parallel.
+
+    The object's size is acquired by a HEAD request; then the object is
+    split into ranges of *chunksize* bytes, which are fetched by *parallel*
+    *hcpsdk.Connection*\\ s (spread across the IP addresses of *target*) and
+    written to their offsets in *dest*. A range that fails is retried on its
+    own (from the first byte not yet received), using a new connection.
+
+    :param target:      an *hcpsdk.Target* object
+    :param url:         the object's url (i.e. /rest/path/object)
+    :param dest:        a filename, a file object opened for binary writing
+                        (the object is written from offset 0 on, the file
+                        is truncated to the object's size) or a writable
+                        buffer (bytearray, mmap, ...) large enough to hold
+                        the object
+    :param parallel:    the max. number of *Connection*\\ s used
+    :param chunksize:   the size of the byte ranges
+    :param retries:     the number of retries per range
+    :param params:      a dictionary with parameters to be added to the
+                        requests
+    :param headers:     a dictionary with additional headers
+    :param timeout:     the timeout for the *Connection*\\ s
+    :return:            the object's size (in bytes)
+    :raises:            *DownloadError*, or one of the *hcpsdk.Hcpsdk[..]Error*\\ s
+                        if the HEAD request fails
+
+    ..  versionadded:: 0.9.6.0
+    """
+    logger = logging.getLogger(__name__)
+
+    con = hcpsdk.Connection(target, timeout=timeout)
+    try:
+        r = con.HEAD(url, params=params, headers=dict(headers or {}))
+        if r.status != 200:
+            raise DownloadError('HEAD {} failed: {} - {}'
+                                .format(url, r.status, r.reason))
+        size = int(r.getheader('Content-Length'))
+    except Exception:
+        con.close()
+        raise
+
+    sink = _Sink(dest, size)
+    ranges = deque(_Range(start, min(start + chunksize, size) - 1)
+                   for start in range(0, size, chunksize))
+    lock = threading.Lock()
+    failed = []
+    logger.debug('downloading {} ({} bytes) in {} ranges'
+                 .format(url, size, len(ranges)))
+
+    def fetch(c, rng):
+        """
+        Fetch a single range, recording the progress in *rng*.
+        """
+        hdrs = dict(headers or {})
+        hdrs['Range'] = str(rng)
+        resp = c.GET(url, params=params, headers=hdrs)
+        if resp.status != 206:
+            c.close()
+            if resp.status >= 500:
+                raise hcpsdk.HcpsdkError('{} - {}'.format(resp.status,
+                                                          resp.reason))
+            raise DownloadError('GET {} ({}) failed: {} - {}'
+                                .format(url, rng, resp.status, resp.reason))
+        with memoryview(bytearray(BLOCKSIZE)) as buf:
+            while rng.start <= rng.end:
+                want = min(BLOCKSIZE, rng.end - rng.start + 1)
+                view = sink.view(rng.start, want)
+                if view is not None:  # read right into the buffer
+                    n = c.readinto(view)
+                else:
+                    n = c.readinto(buf[:want])
+                    sink.write(rng.start, buf[:n])
+                if not n:
+                    raise hcpsdk.HcpsdkError('incomplete read ({})'
+                                             .format(rng))
+                rng.start += n
+
+    def worker(c):
+        """
+        Fetch ranges until there are no more (or another range failed for
+        good).
+        """
+        try:
+            while True:
+                with lock:
+                    if failed or not ranges:
+                        return
+                    rng = ranges.popleft()
+                try:
+                    fetch(c, rng)
+                except DownloadError as e:
+                    with lock:
+                        failed.append(str(e))
+                except Exception as e:
+                    c.close()  # the retry will use a new connection
+                    with lock:
+                        rng.attempts += 1
+                        if rng.attempts > retries:
+                            failed.append('{} failed after {} retries ({})'
+                                          .format(rng, retries, e))
+                        else:
+                            logger.debug('{} failed ({}) - retry # {}'
+                                         .format(rng, e, rng.attempts))
+                            ranges.append(rng)
+        finally:
+            c.close()
+
+    try:
+        cons = [con] + [hcpsdk.Connection(target, timeout=timeout)
+                        for _ in range(min(parallel, len(ranges)) - 1)]
+        threads = [threading.Thread(target=worker, args=(c,),
+                                    name='hcpsdk-download-{}'.format(i),
+                                    daemon=True)
+                   for i, c in enumerate(cons)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        con.close()
+        sink.close()
+
+    if failed:
+        raise DownloadError('download of {} failed: {}'
+                            .format(url, '; '.join(failed)))
+    logger.debug('downloaded {} ({} bytes)'.format(url, size))
+    return size
+
+
+class HcpObjectFile(io.RawIOBase):
+    """
+    A read-only, seekable file object over an object stored in HCP, which
+    turns *read()* and *seek()* into ranged GETs - just the blocks holding
+    the requested bytes are transferred.
+
+    The object is read in blocks of *blocksize* bytes, which are kept in a
+    cache holding up to *cachesize* blocks; if the cache is full, the least
+    recently used block is evicted. Blocks missing in the cache are fetched
+    by a single ranged GET per run of adjacent blocks. When reading
+    sequentially (a read starting where the previous one ended), up to
+    *readahead* blocks following the requested ones are fetched along with
+    them.
+
+    The Requests are sent through *Connection*\\ s checked out from a
+    *hcpsdk.pool.ConnectionPool* (*Target.pool* by default). *HcpObjectFile*
+    can be wrapped into an *io.BufferedReader* or handed over to anything
+    expecting a binary file (*zipfile*, *tarfile*, ...).
+    """
+
+    def __init__(self, target, url, blocksize=FILEBLOCKSIZE, readahead=4,
+                 cachesize=64, size=None, pool=None, params=None,
+                 headers=None):
+        """
+        :param target:      an *hcpsdk.Target* object
+        :param url:         the object's url (i.e. /rest/path/object)
+        :param blocksize:   the size of the blocks read and cached
+        :param readahead:   the max. number of blocks fetched ahead when
+                            reading sequentially (0 = no read-ahead)
+        :param cachesize:   the max. number of blocks cached
+        :param size:        the object's size, if known (saves a HEAD
+                            request)
+        :param pool:        the *hcpsdk.pool.ConnectionPool* to use (default:
+                            *target.pool*)
+        :param params:      a dictionary with parameters to be added to the
+                            requests
+        :param headers:     a dictionary with additional headers
+        :raises:            *DownloadError*, or one of the
+                            *hcpsdk.Hcpsdk[..]Error*\\ s if the HEAD request
+                            fails
+        """
+        super().__init__()
+        self.logger = logging.getLogger(__name__ + '.HcpObjectFile')
+        if blocksize < 1 or readahead < 0 or cachesize < 1:
+            raise ValueError('blocksize and cachesize need to be > 0, '
+                             'readahead >= 0')
+        self.__target = target
+        self.__url = url
+        self.__blocksize = blocksize
+        self.__readahead = readahead
+        self.__cachesize = cachesize
+        self.__pool = pool or target.pool
+        self.__params = params
+        self.__headers = dict(headers or {})
+        self.__cache = OrderedDict()  # block #: bytes, most recently used last
+        self.__pos = 0
+        self.__next = None  # where the last read ended
+        self.__requests = 0
+        self.__received = 0
+        self.__hits = 0
+        self.__misses = 0
+
+        if size is None:
+            with self.__pool.connection() as con:
+                r = con.HEAD(url, params=params, headers=dict(self.__headers))
+                self.__requests += 1
+            if r.status != 200:
+                raise DownloadError('HEAD {} failed: {} - {}'
+                                    .format(url, r.status, r.reason))
+            size = int(r.getheader('Content-Length'))
+        self.__size = size
+        self.logger.debug('opened {} ({} bytes)'.format(url, size))
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        self._checkClosed()
+        return self.__pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        Change the position; no data is transferred.
+
+        :param offset:  the offset, relative to *whence*
+        :param whence:  *io.SEEK_SET*, *io.SEEK_CUR* or *io.SEEK_END*
+        :return:        the new position
+        """
+        self._checkClosed()
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self.__pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.__size + offset
+        else:
+            raise ValueError('invalid whence ({})'.format(whence))
+        if pos < 0:
+            raise ValueError('negative seek position {}'.format(pos))
+        self.__pos = pos
+        return pos
+
+    def readinto(self, b):
+        """
+        Read up to len(b) bytes at the current position into *b*.
+
+        :param b:   a pre-allocated, writable buffer
+        :return:    the number of bytes read (0 at the end of the object)
+        :raises:    *DownloadError*, or one of the *hcpsdk.Hcpsdk[..]Error*\\ s
+        """
+        self._checkClosed()
+        with memoryview(b) as mv, mv.cast('B') as view:
+            n = min(len(view), self.__size - self.__pos)
+            if n <= 0:
+                return 0
+            bs = self.__blocksize
+            first, last = self.__pos // bs, (self.__pos + n - 1) // bs
+            blocks = self.__getblocks(first, last,
+                                      sequential=self.__pos == self.__next)
+            done = 0
+            for i in range(first, last + 1):
+                block = blocks[i]
+                start = self.__pos + done - i * bs
+                chunk = min(len(block) - start, n - done)
+                view[done:done + chunk] = block[start:start + chunk]
+                done += chunk
+        self.__pos += n
+        self.__next = self.__pos
+        return n
+
+    def readall(self):
+        """
+        Read from the current position to the end of the object.
+        """
+        self._checkClosed()
+        return self.read(max(0, self.__size - self.__pos))
+
+    def close(self):
+        """
+        Drop the cached blocks and close the file object.
+        """
+        self.__cache.clear()
+        super().close()
+
+    def __getblocks(self, first, last, sequential=False):
+        """
+        Get the blocks *first* to *last*, fetching the ones not cached.
+
+        :return:    a dict block #: bytes
+        """
+        blocks = {}
+        missing = []
+        for i in range(first, last + 1):
+            if i in self.__cache:
+                self.__cache.move_to_end(i)
+                blocks[i] = self.__cache[i]
+                self.__hits += 1
+            else:
+                missing.append(i)
+                self.__misses += 1
+        if not missing:
+            return blocks
+
+        # split the missing blocks into runs of adjacent blocks
+        runs = [[missing[0], missing[0]]]
+        for i in missing[1:]:
+            if i == runs[-1][1] + 1:
+                runs[-1][1] = i
+            else:
+                runs.append([i, i])
+        if sequential and self.__readahead:
+            # read ahead, but not beyond the object or an already cached block
+            nblocks = (self.__size + self.__blocksize - 1) // self.__blocksize
+            end = min(last + self.__readahead, nblocks - 1)
+            while runs[-1][1] < end and runs[-1][1] + 1 not in self.__cache:
+                runs[-1][1] += 1
+
+        for start, end in runs:
+            blocks.update(self.__fetch(start, end))
+        for i in range(first, last + 1):
+            if i in blocks:
+                self.__cache[i] = blocks[i]
+                self.__cache.move_to_end(i)
+        for i in range(last + 1, runs[-1][1] + 1):  # the read-ahead blocks
+            self.__cache[i] = blocks[i]
+        while len(self.__cache) > self.__cachesize:
+            self.__cache.popitem(last=False)
+        return blocks
+
+    def __fetch(self, first, last):
+        """
+        Fetch the blocks *first* to *last* by a single ranged GET.
+
+        :return:    a dict block #: bytes
+        """
+        bs = self.__blocksize
+        start, end = first * bs, min((last + 1) * bs, self.__size) - 1
+        hdrs = dict(self.__headers)
+        hdrs['Range'] = 'bytes={}-{}'.format(start, end)
+        buf = bytearray(end - start + 1)
+        with self.__pool.connection() as con:
+            r = con.GET(self.__url, params=self.__params, headers=hdrs)
+            self.__requests += 1
+            if r.status != 206:  # leaving the context discards con
+                raise DownloadError('GET {} ({}) failed: {} - {}'
+                                    .format(self.__url, hdrs['Range'],
+                                            r.status, r.reason))
+            with memoryview(buf) as view:
+                got = 0
+                while got < len(buf):
+                    n = con.readinto(view[got:])
+                    if not n:
+                        raise hcpsdk.HcpsdkError('incomplete read ({})'
+                                                 .format(hdrs['Range']))
+                    got += n
+        self.__received += len(buf)
+        self.logger.debug('fetched {} of {}'.format(hdrs['Range'], self.__url))
+        return {i: bytes(buf[(i - first) * bs:(i - first + 1) * bs])
+                for i in range(first, last + 1)}
+
+    def __getsize(self):
+        return self.__size
+    size = property(__getsize, None, None, 'The size of the object (r/o)')
+
+    def __geturl(self):
+        return self.__url
+    url = property(__geturl, None, None, 'The url of the object (r/o)')
+
+    def __getrequests(self):
+        return self.__requests
+    requests = property(__getrequests, None, None,
+                        'The number of Requests sent to HCP (r/o)')
+
+    def __getreceived(self):
+        return self.__received
+    bytes_received = property(__getreceived, None, None,
+                              'The number of bytes fetched from HCP (r/o)')
+
+    def __gethits(self):
+        return self.__hits
+    hits = property(__gethits, None, None,
+                    'The number of blocks read from the cache (r/o)')
+
+    def __getmisses(self):
+        return self.__misses
+    misses = property(__getmisses, None, None,
+                      'The number of blocks not found in the cache (r/o)')
+
+    def __repr__(self):
+        return '{}({}, size={}, pos={})'.format(__class__.__name__,
+                                                self.__url, self.__size,
+                                                self.__pos)
@@ -0,0 +1,622 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import http.server
+import socketserver
+import threading
+import socket
+import struct
+import random
+import time
+import json
+import logging
+from hashlib import sha256
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qsl, unquote
+import xml.etree.ElementTree as Et
+
+
+__all__ = ['EmulatorError', 'Emulator']
+
+logging.getLogger('hcpsdk.emulator').addHandler(logging.NullHandler())
+
+SLICE = 2**16  # the slice size used to cap the throughput
+
+# the Tenants known to the Emulator, along with their settings
+TENANTS = {'m': {'name': 'm', 'systemVisibleDescription': 'hcpsdk emulator',
+                 'hardQuota': '100.00 GB', 'softQuota': 85,
+                 'namespaceQuota': 'None', 'snmpLoggingEnabled': False,
+                 'syslogLoggingEnabled': False, 'versioningConfigurable': True,
+                 'searchConfigurable': True, 'replicationConfigurable': True,
+                 'complianceConfigurationEnabled': False,
+                 'administrationAllowed': True, 'maxNamespacesPerUser': 100}}
+
+# the replication links known to the Emulator
+LINKS = {'link1': {'name': 'link1', 'type': 'ACTIVE_ACTIVE',
+                   'description': 'hcpsdk emulator link',
+                   'compression': 'false', 'encryption': 'false',
+                   'priority': 'OLDEST_FIRST', 'suspended': 'false',
+                   'status': 'GOOD', 'statusMessage': 'Synchronizing data',
+                   'connection': {'localHost': '127.0.0.1',
+                                  'localPort': '5748',
+                                  'remoteHost': '127.0.0.2',
+                                  'remotePort': '5748'},
+                   'statistics': {'bytesPending': '0',
+                                  'objectsPending': '0',
+                                  'upToDateAsOfMillis': '0'}}}
+
+
+class EmulatorError(Exception):
+    """
+    Signal an error in *hcpsdk.emulator*.
+    """
+
+    def __init__(self, reason):
+        """
+        :param reason:  an error description
+        """
+        self.args = (reason,)
+
+
+class _Object(object):
+    """
+    An object stored in the *Emulator*.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.hash = sha256(data).hexdigest().upper()
+        self.ingested = time.time()
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    The threaded HTTP server behind the *Emulator*.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128  # many clients may connect at once
+
+    def __init__(self, emulator, address, handler):
+        self.emulator = emulator
+        super().__init__(address, handler)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Handles the requests of a single connection.
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'HCP-emulator'
+    sys_version = ''
+    # headers and body are written separately - don't let them wait for
+    # a delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.emulator = self.server.emulator
+        # close connections that are idle for too long, as HCP does
+        self.timeout = self.emulator.idletimeout or None
+        self.emulator._count('connections')
+        super().setup()
+
+    def log_message(self, fmt, *args):
+        self.emulator.logger.debug(fmt % args)
+
+    def do_GET(self):
+        self.__dispatch('GET')
+
+    def do_HEAD(self):
+        self.__dispatch('HEAD')
+
+    def do_PUT(self):
+        self.__dispatch('PUT')
+
+    def do_POST(self):
+        self.__dispatch('POST')
+
+    def do_DELETE(self):
+        self.__dispatch('DELETE')
+
+    def __dispatch(self, method):
+        """
+        Apply the configured misbehaviour, route the request.
+        """
+        em = self.emulator
+        em._count('requests')
+        self.body = self.__readbody()
+        if em._dice(em.resetrate):
+            em._count('resets')
+            self.__reset()
+            return
+        if em.latency:
+            time.sleep(em.latency)
+        if em._dice(em.busyrate):
+            self.respond(503, headers={'Retry-After': '1'})
+            return
+        if 'Authorization' not in self.headers:
+            self.respond(403, headers={'X-HCP-ErrorMessage':
+                                       'Authorization required'})
+            return
+
+        url = urlsplit(self.path)
+        self.url = unquote(url.path)
+        self.params = dict(parse_qsl(url.query, keep_blank_values=True))
+        try:
+            if self.url.startswith('/rest/'):
+                self.__rest(method)
+            elif self.url.startswith('/proc'):
+                self.__proc(method)
+            elif self.url.startswith('/mapi/'):
+                self.__mapi(method)
+            else:
+                self.respond(404)
+        except Exception as e:
+            em.logger.exception('request failed')
+            self.respond(500, headers={'X-HCP-ErrorMessage': str(e)})
+
+    def __readbody(self):
+        """
+        Read the request body (if any), plain or chunked.
+        """
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.__readslices(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        return self.__readslices(int(self.headers.get('Content-Length', 0)))
+
+    def __readslices(self, size):
+        """
+        Read *size* bytes, obeying the throughput cap.
+        """
+        if not self.emulator.throughput:
+            return self.rfile.read(size)
+        data = bytearray()
+        while len(data) < size:
+            s = self.rfile.read(min(SLICE, size - len(data)))
+            if not s:
+                break
+            data += s
+            time.sleep(len(s) / self.emulator.throughput)
+        return bytes(data)
+
+    def __reset(self):
+        """
+        Reset the connection (send a RST instead of a response).
+        """
+        self.close_connection = True
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                   struct.pack('ii', 1, 0))
+        self.connection.close()
+
+    def respond(self, status, body=b'', headers=None, length=None):
+        """
+        Send a response, obeying the throughput cap.
+
+        :param status:  the HTTP status code
+        :param body:    the body (bytes, or an iterable of bytes if *length*
+                        is given)
+        :param headers: a dict of additional headers
+        :param length:  the Content-Length, if *body* is an iterable
+        """
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if isinstance(body, bytes):
+            length = len(body)
+            body = [body]
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        for data in body:
+            if not self.emulator.throughput:
+                self.wfile.write(data)
+                continue
+            for i in range(0, len(data), SLICE):
+                time.sleep(len(data[i:i + SLICE]) / self.emulator.throughput)
+                self.wfile.write(data[i:i + SLICE])
+
+    def __xml(self, root):
+        """
+        Send an XML document.
+        """
+        self.respond(200, Et.tostring(root, encoding='UTF-8'),
+                     headers={'Content-Type': 'application/xml'})
+
+    def __rest(self, method):
+        """
+        The data access interface: store, read and delete objects.
+        """
+        store = self.emulator.store
+        obj = store.get(self.url)
+        if method == 'PUT':
+            if obj:
+                self.respond(409, headers={'X-HCP-ErrorMessage':
+                                           'Object exists'})
+                return
+            obj = store[self.url] = _Object(self.body)
+            self.respond(201, headers={'X-HCP-Hash': 'SHA-256 ' + obj.hash,
+                                       'ETag': '"{}"'.format(obj.hash[:32])})
+        elif not obj:
+            self.respond(404)
+        elif method == 'DELETE':
+            del store[self.url]
+            self.respond(200)
+        elif method == 'POST':
+            self.respond(200)
+        else:
+            self.__get(obj)
+
+    def __get(self, obj):
+        """
+        Send an object (or a byte range of it).
+        """
+        headers = {'Content-Type': 'application/octet-stream',
+                   'X-HCP-Type': 'object',
+                   'X-HCP-Size': str(len(obj.data)),
+                   'X-HCP-Hash': 'SHA-256 ' + obj.hash,
+                   'X-HCP-IngestTime': str(int(obj.ingested)),
+                   'ETag': '"{}"'.format(obj.hash[:32]),
+                   'Last-Modified': formatdate(obj.ingested, usegmt=True),
+                   'Accept-Ranges': 'bytes'}
+        rng = self.headers.get('Range')
+        if not rng:
+            self.respond(200, obj.data, headers=headers)
+            return
+        size = len(obj.data)
+        try:
+            first, last = rng.split('=', 1)[1].split('-')
+            if first:
+                first, last = int(first), min(int(last or size - 1), size - 1)
+            else:
+                first, last = max(0, size - int(last)), size - 1
+            if first > last:
+                raise ValueError
+        except ValueError:
+            self.respond(416, headers={'Content-Range':
+                                       'bytes */{}'.format(size)})
+            return
+        headers['Content-Range'] = 'bytes {}-{}/{}'.format(first, last, size)
+        self.respond(206, obj.data[first:last + 1], headers=headers)
+
+    def __proc(self, method):
+        """
+        The namespace information interface.
+        """
+        if method != 'GET':
+            self.respond(405)
+        elif self.url == '/proc':
+            root = Et.Element('namespaces')
+            ns = Et.SubElement(root, 'namespace',
+                               {'name': 'n', 'nameIDNA': 'n',
+                                'versioningEnabled': 'false',
+                                'searchEnabled': 'true',
+                                'retentionMode': 'enterprise',
+                                'defaultShredValue': 'false',
+                                'defaultIndexValue': 'true',
+                                'defaultRetentionValue': '0',
+                                'hashScheme': 'SHA-256', 'dpl': '1'})
+            Et.SubElement(ns, 'description').text = 'hcpsdk emulator'
+            self.__xml(root)
+        elif self.url == '/proc/statistics':
+            store = list(self.emulator.store.values())
+            used = sum(len(o.data) for o in store)
+            self.__xml(Et.Element('statistics',
+                                  {'namespaceName': 'n',
+                                   'totalCapacityBytes': str(2**40),
+                                   'usedCapacityBytes': str(used),
+                                   'softQuotaPercent': '85',
+                                   'objectCount': str(len(store)),
+                                   'shredObjectCount': '0',
+                                   'shredObjectBytes': '0',
+                                   'customMetadataObjectCount': '0',
+                                   'customMetadataObjectBytes': '0'}))
+        elif self.url == '/proc/retentionClasses':
+            root = Et.Element('retentionClasses')
+            rc = Et.SubElement(root, 'retentionClass',
+                               {'name': 'hcpsdk', 'value': 'A+7y',
+                                'autoDelete': 'false'})
+            Et.SubElement(rc, 'description').text = 'hcpsdk emulator'
+            self.__xml(root)
+        elif self.url == '/proc/permissions':
+            root = Et.Element('permissions')
+            perms = {p: 'true' for p in ['browse', 'read', 'write', 'delete',
+                                         'purge', 'privileged', 'search',
+                                         'readAcl', 'writeAcl',
+                                         'changeOwner']}
+            for tag in ['namespacePermissions',
+                        'namespaceEffectivePermissions', 'userPermissions',
+                        'userEffectivePermissions']:
+                Et.SubElement(root, tag, perms)
+            self.__xml(root)
+        else:
+            self.respond(404)
+
+    def __mapi(self, method):
+        """
+        The management interface, as far as used by *hcpsdk.mapi*.
+        """
+        parts = self.url.strip('/').split('/')[1:]
+        if parts == ['tenants'] and method == 'GET':
+            self.respond(200, json.dumps({'name': list(TENANTS)}).encode(),
+                         headers={'Content-Type': 'application/json'})
+        elif parts[:1] == ['tenants'] and len(parts) == 2 and \
+                method == 'GET':
+            if parts[1] not in TENANTS:
+                self.respond(404)
+            else:
+                self.respond(200, json.dumps(TENANTS[parts[1]]).encode(),
+                             headers={'Content-Type': 'application/json'})
+        elif parts[:1] == ['tenants'] and parts[2:] == ['chargebackReport']:
+            self.__chargeback(parts[1])
+        elif parts[:2] == ['services', 'replication']:
+            self.__replication(method, parts[2:])
+        elif parts[:1] == ['logs']:
+            self.__logs(method, parts[1:])
+        else:
+            self.respond(404)
+
+    def __chargeback(self, tenant):
+        """
+        A chargeback report (with a single, empty record).
+        """
+        if tenant not in TENANTS:
+            self.respond(404)
+            return
+        record = {'systemName': 'hcp.emulator', 'tenantName': tenant,
+                  'startTime': self.params.get('start', ''),
+                  'endTime': self.params.get('end', ''),
+                  'objectCount': len(self.emulator.store),
+                  'ingestedVolume': sum(len(o.data) for o in
+                                        list(self.emulator.store.values())),
+                  'reads': 0, 'writes': 0, 'deletes': 0, 'valid': True}
+        accept = self.headers.get('Accept', 'application/json')
+        if accept == 'text/csv':
+            body = '{}\n{}\n'.format(','.join(record),
+                                     ','.join(str(v) for v in
+                                              record.values()))
+        elif accept == 'application/xml':
+            root = Et.Element('chargebackReport')
+            cb = Et.SubElement(root, 'chargebackData')
+            for k, v in record.items():
+                Et.SubElement(cb, k).text = str(v)
+            body = Et.tostring(root, encoding='unicode')
+        else:
+            accept = 'application/json'
+            body = json.dumps({'chargebackData': [record]}, indent=2)
+        self.respond(200, body.encode(), headers={'Content-Type': accept})
+
+    def __replication(self, method, parts):
+        """
+        Replication settings and links.
+        """
+        if not parts and method == 'GET':
+            root = Et.Element('replicationService')
+            for k, v in [('allowTenantsToMonitorNamespaces', 'true'),
+                         ('enableDNSFailover', 'true'),
+                         ('enableDomainAndCertificateSynchronization',
+                          'true'),
+                         ('network', '[None]'), ('status', 'ENABLED')]:
+                Et.SubElement(root, k).text = v
+            self.__xml(root)
+        elif parts == ['links'] and method == 'GET':
+            root = Et.Element('links')
+            for name in LINKS:
+                Et.SubElement(root, 'name').text = name
+            self.__xml(root)
+        elif len(parts) == 2 and parts[0] == 'links':
+            link = LINKS.get(parts[1])
+            if not link:
+                self.respond(404)
+            elif method == 'POST':
+                self.respond(200)
+            else:
+                root = Et.Element('link')
+                for k, v in link.items():
+                    e = Et.SubElement(root, k)
+                    if isinstance(v, dict):
+                        for k1, v1 in v.items():
+                            Et.SubElement(e, k1).text = v1
+                    else:
+                        e.text = v
+                self.__xml(root)
+        else:
+            self.respond(404)
+
+    def __logs(self, method, parts):
+        """
+        Log download: mark, prepare, status, download, cancel.
+        """
+        em = self.emulator
+        if not parts and method == 'POST':
+            if 'cancel' in self.params:
+                em.logsprepared = False
+            self.respond(200)
+        elif not parts and method == 'GET':
+            root = Et.Element('logDownloadStatus')
+            for k, v in [('readyForStreaming', em.logsprepared),
+                         ('streamingInProgress', False),
+                         ('started', em.logsprepared), ('error', False)]:
+                Et.SubElement(root, k).text = 'true' if v else 'false'
+            Et.SubElement(root, 'content').text = \
+                'ACCESS,SYSTEM,SERVICE,APPLICATION'
+            self.__xml(root)
+        elif parts == ['prepare'] and method == 'POST':
+            em.logsprepared = True
+            self.respond(200)
+        elif parts == ['download'] and method == 'POST':
+            if not em.logsprepared:
+                self.respond(400, headers={'X-HCP-ErrorMessage':
+                                           'Logs not prepared'})
+                return
+            block = (b'hcpsdk emulator log line\n' * (SLICE // 25 + 1))[:SLICE]
+            self.respond(200, (block[:min(SLICE, em.logsize - i)]
+                               for i in range(0, em.logsize, SLICE)),
+                         length=em.logsize,
+                         headers={'Content-Type': 'application/zip',
+                                  'Content-Disposition':
+                                      'attachment; filename=HCPLogs-'
+                                      'emulator.zip'})
+        else:
+            self.respond(404)
+
+
+class Emulator(object):
+    """
+    A local stand-in for HCP, implementing the REST data access interface
+    (*/rest*), the namespace information interface (*/proc*) and the parts of
+    the management API (*/mapi*) used by *hcpsdk.mapi*. Objects are stored in
+    memory.
+
+    To make retry paths and throughput measurable reproducibly, the Emulator
+    can be told to misbehave: delay responses, cap the throughput per
+    connection, reset connections, answer *503 Service Unavailable* and close
+    connections that are idle for too long.
+    """
+
+    def __init__(self, address='127.0.0.1', port=0, latency=0.0,
+                 throughput=0, resetrate=0.0, busyrate=0.0, idletimeout=30,
+                 sslcontext=None, seed=None, logsize=2**20):
+        """
+        :param address:     the IP address to listen on
+        :param port:        the port to listen on (0 picks a free port)
+        :param latency:     the time (secs) to wait before responding
+        :param throughput:  the max. throughput per connection (bytes/sec,
+                            in both directions); 0 means unlimited
+        :param resetrate:   the share of requests (0..1) answered by a
+                            connection reset
+        :param busyrate:    the share of requests (0..1) answered by *503
+                            Service Unavailable*
+        :param idletimeout: the time (secs) after which idle connections are
+                            closed; 0 means never
+        :param sslcontext:  an *ssl.SSLContext* (with a certificate loaded)
+                            to serve https
+        :param seed:        seed for the random decisions about resets and
+                            503s, to make them reproducible
+        :param logsize:     the size of the logs downloaded from */mapi/logs*
+        """
+        self.logger = logging.getLogger(__name__ + '.Emulator')
+        self.__address = address
+        self.__port = port
+        self.latency = latency
+        self.throughput = throughput
+        self.resetrate = resetrate
+        self.busyrate = busyrate
+        self.idletimeout = idletimeout
+        self.__sslcontext = sslcontext
+        self.__random = random.Random(seed)
+        self.logsize = logsize
+        self.logsprepared = False
+        self.store = {}  # the objects stored, by path
+        self.requests = 0  # the number of requests received
+        self.resets = 0  # the number of connections reset
+        self.connections = 0  # the number of connections accepted
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__thread = None
+
+    def start(self):
+        """
+        Start serving (in a background thread).
+
+        :return:    the Emulator
+        :raises:    *EmulatorError* if the server can't be started
+        """
+        if self.__server:
+            raise EmulatorError('already started')
+        try:
+            self.__server = _Server(self, (self.__address, self.__port),
+                                    _Handler)
+        except OSError as e:
+            raise EmulatorError('unable to listen on {}:{} ({})'
+                                .format(self.__address, self.__port, e))
+        if self.__sslcontext:
+            self.__server.socket = self.__sslcontext.wrap_socket(
+                self.__server.socket, server_side=True)
+        self.__address, self.__port = self.__server.server_address[:2]
+        self.__thread = threading.Thread(target=self.__server.serve_forever,
+                                         name='hcpsdk-emulator', daemon=True)
+        self.__thread.start()
+        self.logger.debug('serving on {}:{}'.format(self.__address,
+                                                    self.__port))
+        return self
+
+    def stop(self):
+        """
+        Stop serving.
+        """
+        if self.__server:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__thread.join()
+            self.__server = self.__thread = None
+            self.logger.debug('stopped')
+
+    def _dice(self, rate):
+        """
+        Decide if a misbehaviour with *rate* is due.
+        """
+        if not rate:
+            return False
+        with self.__lock:
+            return self.__random.random() < rate
+
+    def _count(self, counter):
+        """
+        Increment a counter.
+        """
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __getaddress(self):
+        return self.__address
+    address = property(__getaddress, None, None,
+                       'The IP address listened on (r/o)')
+
+    def __getport(self):
+        return self.__port
+    port = property(__getport, None, None,
+                    'The port listened on (r/o)')
+
+    def __repr__(self):
+        return ('{}(address={}, port={}, latency={}, throughput={}, '
+                'resetrate={}, busyrate={}, idletimeout={})'
+                .format(__class__.__name__, self.__address, self.__port,
+                        self.latency, self.throughput, self.resetrate,
+                        self.busyrate, self.idletimeout))
+
+    def __str__(self):
+        return '{} on {}:{}'.format(__class__.__name__, self.__address,
+                                    self.__port)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import argparse
+import ssl
+import time
+import logging
+from hcpsdk.emulator import Emulator
+
+
+def main():
+    """
+    Run the Emulator until interrupted.
+    """
+    parser = argparse.ArgumentParser(prog='python -m hcpsdk.emulator',
+                                     description='A local stand-in for HCP')
+    parser.add_argument('--address', default='127.0.0.1',
+                        help='the IP address to listen on (%(default)s)')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='the port to listen on (%(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='the time (secs) to wait before responding')
+    parser.add_argument('--throughput', type=int, default=0,
+                        help='the max. throughput per connection (bytes/sec)')
+    parser.add_argument('--resetrate', type=float, default=0.0,
+                        help='the share of requests (0..1) answered by a '
+                             'connection reset')
+    parser.add_argument('--busyrate', type=float, default=0.0,
+                        help='the share of requests (0..1) answered by 503')
+    parser.add_argument('--idletimeout', type=float, default=30,
+                        help='close connections idle for that long (secs; '
+                             '%(default)s)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for resets and 503s')
+    parser.add_argument('--certfile', help='certificate to serve https')
+    parser.add_argument('--keyfile', help='the certificate\'s private key')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='log each request')
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    sslcontext = None
+    if args.certfile:
+        sslcontext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        sslcontext.load_cert_chain(args.certfile, args.keyfile)
+
+    em = Emulator(address=args.address, port=args.port,
+                  latency=args.latency, throughput=args.throughput,
+                  resetrate=args.resetrate, busyrate=args.busyrate,
+                  idletimeout=args.idletimeout, sslcontext=sslcontext,
+                  seed=args.seed)
+    with em:
+        print('{} - press Ctrl-C to stop'.format(em))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print('{} requests on {} connections, {} resets'
+          .format(em.requests, em.connections, em.resets))
+
+
+if __name__ == '__main__':
+    main()
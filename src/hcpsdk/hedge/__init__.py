@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import logging
+from ..metrics import Histogram
+
+
+__all__ = ['HedgePolicy']
+
+logging.getLogger('hcpsdk.hedge').addHandler(logging.NullHandler())
+
+
+class HedgePolicy(object):
+    """
+    Decides when a Request is hedged - that is, sent to a second IP address
+    because the first one is slow to answer. The *Connection* goes on with
+    whatever connection answers first, and closes the other one (which is
+    the only way to cancel a Request with HTTP/1.1).
+
+    A Request is hedged if its first byte hasn't arrived within *delay*
+    seconds - or, if *delay* isn't given, within the *percentile* of the
+    times to first byte observed over the last *window* Requests (no
+    hedging until *window* Requests have been observed).
+
+    As each hedge puts an additional Request on HCP, hedges are limited by
+    a budget: each Request adds *budget* tokens to a bucket holding up to
+    *burst* tokens; each hedge takes one token.
+
+    ..  versionadded:: 0.9.6.0
+    """
+
+    def __init__(self, delay=None, percentile=95, window=200, mindelay=0.005,
+                 budget=0.05, burst=5, methods=('GET', 'HEAD')):
+        """
+        :param delay:       a fixed hedging delay (secs), *None* to use the
+                            *percentile* of the observed times to first byte
+        :param percentile:  the percentile used to derive the delay
+        :param window:      the number of Requests the delay is derived from
+                            (it is derived again after each *window*
+                            Requests)
+        :param mindelay:    the delay will never be shorter than this (secs)
+        :param budget:      tokens added per Request (i.e. the share of
+                            Requests that may be hedged)
+        :param burst:       the maximum number of tokens in the bucket (it
+                            starts full)
+        :param methods:     the HTTP methods that are hedged - idempotent
+                            ones, only!
+        """
+        self.logger = logging.getLogger(__name__ + '.HedgePolicy')
+        self.__delay = delay
+        self.__percentile = percentile
+        self.__window = window
+        self.__mindelay = mindelay
+        self.__budget = budget
+        self.__burst = burst
+        self.__methods = frozenset(methods)
+        self.__lock = threading.Lock()
+        self.__tokens = float(burst)
+        self.__histogram = Histogram()
+        self.__derived = None  # the delay derived from the last window
+        self.__hedged = 0
+        self.__won = 0
+
+    def _request(self):
+        """
+        Called by *Connection* once per hedgeable Request, to fill the
+        budget.
+        """
+        if self.__tokens < self.__burst:
+            with self.__lock:
+                self.__tokens = min(self.__burst,
+                                    self.__tokens + self.__budget)
+
+    def _hedge(self):
+        """
+        Called by *Connection* before it hedges a Request; takes a token
+        from the budget.
+
+        :return:    *True* if the Request may be hedged
+        """
+        with self.__lock:
+            if self.__tokens >= 1.0:
+                self.__tokens -= 1.0
+                self.__hedged += 1
+                return True
+        return False
+
+    def _won(self):
+        """
+        Called by *Connection* if the hedged Request won.
+        """
+        with self.__lock:
+            self.__won += 1
+
+    def record(self, ttfb):
+        """
+        Record the time to first byte of a hedgeable Request.
+
+        :param ttfb:    the time to first byte (secs)
+        """
+        if self.__delay is not None:
+            return
+        with self.__lock:
+            self.__histogram.record(ttfb)
+            if self.__histogram.count >= self.__window:
+                self.__derived = max(self.__mindelay,
+                                     self.__histogram.percentile(
+                                         self.__percentile))
+                self.__histogram = Histogram()
+                self.logger.debug('hedging delay is {:0.6f} secs'
+                                  .format(self.__derived))
+
+    def __getdelay(self):
+        if self.__delay is not None:
+            return self.__delay
+        return self.__derived
+    delay = property(__getdelay, None, None,
+                     'The hedging delay (secs), *None* if not yet known '
+                     '(r/o)')
+
+    def __getmethods(self):
+        return self.__methods
+    methods = property(__getmethods, None, None,
+                       'The HTTP methods that are hedged (r/o)')
+
+    def __gettokens(self):
+        return self.__tokens
+    tokens = property(__gettokens, None, None,
+                      'The tokens left in the hedge budget (r/o)')
+
+    def __gethedged(self):
+        return self.__hedged
+    hedged = property(__gethedged, None, None,
+                      'The number of Requests hedged (r/o)')
+
+    def __getwon(self):
+        return self.__won
+    won = property(__getwon, None, None,
+                   'The number of hedged Requests that won (r/o)')
+
+    def __repr__(self):
+        return ('{}(delay={}, percentile={}, window={}, mindelay={}, '
+                'budget={}, burst={}, methods={})'
+                .format(__class__.__name__, self.__delay, self.__percentile,
+                        self.__window, self.__mindelay, self.__budget,
+                        self.__burst, tuple(sorted(self.__methods))))
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import ssl
+import socket
+import http.client
+import threading
+import logging
+import hcpsdk
+
+
+__all__ = ['EVENTS', 'Event', 'Hooks', 'classify']
+
+logging.getLogger('hcpsdk.hooks').addHandler(logging.NullHandler())
+
+EVENTS = ('on_connect', 'on_request', 'on_response', 'on_retry', 'on_error')
+
+
+def classify(error):
+    """
+    Classify an error raised during a Request.
+
+    :param error:   an exception
+    :return:        one of ``'tls'``, ``'refused'``, ``'reset'``,
+                    ``'timeout'``, ``'dns'``, ``'protocol'``, ``'network'``,
+                    ``'connect'`` or ``'other'``
+    """
+    if isinstance(error, hcpsdk.HcpsdkError) and error.__context__:
+        # an hcpsdk exception raised while handling the original one
+        error = error.__context__
+    if isinstance(error, (ssl.SSLError, hcpsdk.HcpsdkCertificateError)):
+        return 'tls'
+    elif isinstance(error, ConnectionRefusedError):
+        return 'refused'
+    elif isinstance(error, (ConnectionResetError, ConnectionAbortedError,
+                            BrokenPipeError)):
+        return 'reset'
+    elif isinstance(error, (TimeoutError, socket.timeout,
+                            hcpsdk.HcpsdkTimeoutError)):
+        return 'timeout'
+    elif isinstance(error, hcpsdk.ips.IpsError):
+        return 'dns'
+    elif isinstance(error, http.client.HTTPException):
+        return 'protocol'
+    elif isinstance(error, OSError):
+        return 'network'
+    elif isinstance(error, hcpsdk.HcpsdkCantConnectError):
+        return 'connect'
+    return 'other'
+
+
+class Event(object):
+    """
+    An event in the lifecycle of a Request, handed over to the hooks.
+    Attributes that don't apply to an event are *None*.
+    """
+
+    def __init__(self, name, connection, method=None, url=None,
+                 address=None, attempt=0, elapsed=None, status=None,
+                 error=None, timings=None):
+        """
+        :param name:        the event (one of *EVENTS*)
+        :param connection:  the *hcpsdk.Connection* firing the event
+        :param method:      the Request's http method
+        :param url:         the Request's url
+        :param address:     the IP address in use
+        :param attempt:     0 for the initial attempt, 1.. for retries
+        :param elapsed:     the time since the Request started (secs);
+                            the time the connect took with *on_connect*
+        :param status:      the HTTP status (*on_response*, and *on_retry*
+                            if a status like 503 is retried)
+        :param error:       the exception (*on_retry*, *on_error*)
+        :param timings:     the Request's *hcpsdk.Timings* object
+        """
+        self.name = name
+        self.connection = connection
+        self.method = method
+        self.url = url
+        self.address = address
+        self.attempt = attempt
+        self.elapsed = elapsed
+        self.status = status
+        self.error = error
+        self.kind = classify(error) if error else None
+        self.timings = timings
+
+    def __repr__(self):
+        return ('{}({}, {} {} @ {}, attempt={}, elapsed={}, status={}, '
+                'kind={}, error={!r})'
+                .format(__class__.__name__, self.name, self.method, self.url,
+                        self.address, self.attempt, self.elapsed,
+                        self.status, self.kind, self.error))
+
+
+class Hooks(object):
+    """
+    The callbacks registered per event. Each *hcpsdk.Target* and each
+    *hcpsdk.Connection* has its own *Hooks* object as *.hooks*; the
+    callbacks registered with a *Target* are called for all its
+    *Connection*\\ s, before those registered with the *Connection*.
+
+    Callbacks are called with an *Event* object, in the thread running the
+    Request - they should return quickly. Exceptions raised by callbacks are
+    logged and ignored.
+
+    ..  Note::
+
+        Firing an event costs next to nothing as long as no callback has
+        been registered for it.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        for name in EVENTS:
+            setattr(self, name, ())  # replaced as a whole when changed
+
+    def register(self, event, callback):
+        """
+        Register a callback for an event.
+
+        :param event:       one of *EVENTS*
+        :param callback:    a callable, called with an *Event* object
+        :raises:            *ValueError* on an unknown event
+        """
+        if event not in EVENTS:
+            raise ValueError('unknown event: {}'.format(event))
+        with self.__lock:
+            setattr(self, event, getattr(self, event) + (callback,))
+
+    def unregister(self, event, callback):
+        """
+        Remove a callback registered for an event.
+
+        :param event:       one of *EVENTS*
+        :param callback:    the callable registered before
+        :raises:            *ValueError* if *callback* isn't registered
+        """
+        if event not in EVENTS:
+            raise ValueError('unknown event: {}'.format(event))
+        with self.__lock:
+            callbacks = list(getattr(self, event))
+            callbacks.remove(callback)
+            setattr(self, event, tuple(callbacks))
+
+    def __repr__(self):
+        return '{}({})'.format(__class__.__name__,
+                               ', '.join('{}={}'.format(name,
+                                                        len(getattr(self,
+                                                                    name)))
+                                         for name in EVENTS))
@@ -21,7 +21,15 @@
 
 import logging
 import socket
-from http.client import HTTPConnection as _HTTPConnection, HTTPS_PORT
+import selectors
+import time
+import functools
+import io
+import os
+import stat
+import mmap
+from http.client import HTTPConnection as _HTTPConnection, HTTPResponse, \
+    HTTPS_PORT
 
 __all__ = ['HTTPConnection']
 
@@ -45,20 +53,289 @@ TCP_KEEPINTVL = 0x101
 #   responding. After this many probes, the connection will be closed.
 TCP_KEEPCNT = 0x102
 
+# The default size of the blocks a request body is sent in.
+BLOCKSIZE = 2**18
+
 logging.getLogger('hcpsdk.httpclient').addHandler(logging.NullHandler())
 
 
-class HTTPConnection(_HTTPConnection):
+def _bodysize(body):
+    """
+    Get the number of bytes left to send from a binary file-like *body*.
+
+    :param body:    a request body
+    :return:        a tuple (the number of bytes left or None if unknown,
+                    True if *body* is a regular file)
+    """
+    if not hasattr(body, 'read') or isinstance(body, io.TextIOBase):
+        return None, False
+    try:
+        st = os.fstat(body.fileno())
+        if stat.S_ISREG(st.st_mode):
+            return max(0, st.st_size - body.tell()), True
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        if body.seekable():
+            pos = body.tell()
+            size = body.seek(0, io.SEEK_END) - pos
+            body.seek(pos)
+            return size, False
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None, False
+
+
+def _bodylength(body):
+    """
+    Get the number of bytes a request *body* will take on the wire.
+
+    :param body:    a request body
+    :return:        the number of bytes, 0 if unknown
+    """
+    if body is None:
+        return 0
+    elif isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    elif isinstance(body, memoryview):
+        return body.nbytes
+    return _bodysize(body)[0] or 0
+
+
+def _readable(socks, timeout):
+    """
+    Wait for sockets to become readable. Unlike *select.select()*, this works
+    with file descriptors beyond FD_SETSIZE, too.
+
+    :param socks:   a list of (SSL) sockets
+    :param timeout: the max. time to wait (secs)
+    :return:        the list of readable sockets (empty if timed out)
+    :raises:        *OSError* or *ValueError* if the sockets can't be waited
+                    for
+    """
+    with selectors.DefaultSelector() as sel:
+        for sock in socks:
+            sel.register(sock, selectors.EVENT_READ)
+        return [key.fileobj for key, events in sel.select(timeout)]
+
+
+def _recv1(sock):
+    """
+    Read one byte from a readable SSL socket, without blocking. TLS records
+    without application data (session tickets, for example) make a socket
+    readable, too - they are consumed.
+
+    :param sock:    a readable SSL socket
+    :return:        the byte read (*b''* on EOF or error), *None* if there
+                    was no application data
+    """
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        return sock.recv(1)
+    except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+        return None
+    except OSError:
+        return b''
+    finally:
+        sock.settimeout(timeout)
+
+
+def _arrived(socks, timeout):
+    """
+    Wait for a response to arrive on any of the sockets. Unlike
+    *_readable()*, SSL sockets that received TLS records without application
+    data don't count; to tell, a byte is read ahead from them, which has to
+    be handed to the response by *HTTP[S]Connection.unread()*.
+
+    :param socks:   a list of (SSL) sockets
+    :param timeout: the max. time to wait (secs), *None* to wait forever
+    :return:        a dict {socket: the bytes read ahead} of the sockets a
+                    response arrived on (empty if timed out)
+    :raises:        *OSError* or *ValueError* if the sockets can't be waited
+                    for
+    """
+    end = None if timeout is None else time.monotonic() + timeout
+    while True:
+        arrived = {}
+        left = None if end is None else max(0.0, end - time.monotonic())
+        for sock in _readable(socks, left):
+            if not hasattr(sock, 'pending'):  # a plain socket
+                arrived[sock] = b''
+            else:
+                data = _recv1(sock)
+                if data is not None:
+                    arrived[sock] = data
+        if arrived or (end is not None and time.monotonic() >= end):
+            return arrived
+
+
+def _stale(sock):
+    """
+    Check if the socket of an idle connection has been closed by the peer,
+    without blocking. An idle socket that's readable has either seen EOF or
+    holds data nobody asked for - both make it unusable. On SSL sockets,
+    TLS records without application data (session tickets, for example)
+    are consumed, as they make the socket readable, too. Works with file
+    descriptors beyond FD_SETSIZE, too.
+
+    :param sock:    a (SSL) socket
+    :return:        True if the socket can't be used for another request
+    """
+    try:
+        if not _readable([sock], 0):
+            return False
+    except (OSError, ValueError):  # i.e. closed
+        return True
+    if not hasattr(sock, 'pending'):  # a plain socket
+        return True
+    return _recv1(sock) is not None  # EOF or unexpected data
+
+
+class _ReadAhead(io.RawIOBase):
+    """
+    A raw stream that returns the bytes read ahead from a socket first, then
+    reads on from the socket's file object.
+    """
+
+    def __init__(self, data, fp):
+        super().__init__()
+        self.__data = data
+        self.__fp = fp
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.__data:
+            n = min(len(b), len(self.__data))
+            b[:n] = self.__data[:n]
+            self.__data = self.__data[n:]
+            return n
+        return self.__fp.readinto1(b)
+
+    def fileno(self):
+        return self.__fp.fileno()
+
+    def close(self):
+        self.__fp.close()
+        super().close()
+
+
+class _HTTPResponse(HTTPResponse):
+    """
+    A *http.client.HTTPResponse* that starts with the bytes read ahead.
+    """
+
+    def __init__(self, sock, debuglevel=0, method=None, url=None,
+                 readahead=b''):
+        super().__init__(sock, debuglevel=debuglevel, method=method, url=url)
+        if readahead:
+            self.fp = io.BufferedReader(_ReadAhead(readahead, self.fp))
+
+
+class _ReadAheadMixin(object):
+    """
+    Allows to hand the bytes *_arrived()* read ahead from the socket to the
+    next response.
+    """
+
+    def unread(self, data):
+        """
+        Make the next response start with *data*.
+
+        :param data:    the bytes read ahead from the socket
+        """
+        if data:
+            self.response_class = functools.partial(_HTTPResponse,
+                                                    readahead=data)
+
+    def getresponse(self):
+        try:
+            return super().getresponse()
+        finally:
+            self.__dict__.pop('response_class', None)
+
+
+class _SendBodyMixin(object):
+    """
+    Sends file bodies without copying them through Python's memory: using
+    *socket.sendfile()* (i.e. *os.sendfile()*) on plain sockets, and in
+    slices of a memory map on SSL sockets (which can't use *sendfile()*).
+    Other file-like bodies are read into a re-used buffer of *blocksize*.
+
+    File bodies are sent with a *Content-Length* header (taken from the
+    file's size) instead of chunked encoding, which is what *http.client*
+    would use. The same applies to seekable file-like bodies.
+    """
+
+    def request(self, method, url, body=None, headers={}, **kwargs):
+        size = _bodysize(body)[0]
+        if size is not None and \
+                'content-length' not in {k.lower() for k in headers}:
+            headers = dict(headers)
+            headers['Content-Length'] = str(size)
+        super().request(method, url, body=body, headers=headers, **kwargs)
+
+    def _send_output(self, message_body=None, encode_chunked=False):
+        if encode_chunked or not hasattr(message_body, 'read') or \
+                isinstance(message_body, io.TextIOBase):
+            return super()._send_output(message_body,
+                                        encode_chunked=encode_chunked)
+        super()._send_output(None)  # the headers
+        size, regular = _bodysize(message_body)
+        if not regular:
+            self.__sendreadable(message_body)
+        elif not size:
+            pass
+        elif not hasattr(self.sock, 'context'):  # not an SSLSocket
+            offset = message_body.tell()
+            self.sock.sendfile(message_body, offset=offset, count=size)
+            message_body.seek(offset + size)
+        else:
+            offset = message_body.tell()
+            with mmap.mmap(message_body.fileno(), 0,
+                           access=mmap.ACCESS_READ) as m:
+                with memoryview(m) as view:
+                    for i in range(offset, offset + size, self.blocksize):
+                        self.sock.sendall(view[i:min(i + self.blocksize,
+                                                     offset + size)])
+            message_body.seek(offset + size)
+
+    def __sendreadable(self, body):
+        """
+        Send a file-like object, read into a re-used buffer.
+        """
+        if not hasattr(body, 'readinto'):
+            while True:
+                data = body.read(self.blocksize)
+                if not data:
+                    break
+                self.sock.sendall(data)
+            return
+        buf = bytearray(self.blocksize)
+        with memoryview(buf) as view:
+            while True:
+                n = body.readinto(buf)
+                if not n:
+                    break
+                self.sock.sendall(view[:n])
+
+
+class HTTPConnection(_ReadAheadMixin, _SendBodyMixin, _HTTPConnection):
     """
     Subclass of http.client.HTTPConnection that allows for TCP keep-alive.
 
     This copies the *__init__()* and *connect()* methods, adding in the
-    necessary code to enable TCP keep-alive.
+    necessary code to enable TCP keep-alive. *connect()* records the time
+    the TCP connect took in *tcp_time* (and the time the TLS handshake took
+    in *tls_time*, with *HTTPSConnection*).
     """
 
     def __init__(self, host, port=None, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
                  source_address=None, sock_keepalive=False,
-                 tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3):
+                 tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3,
+                 blocksize=BLOCKSIZE):
         """
         :param host:            target host (fqdn or ip-address
         :param port:            target port
@@ -68,6 +345,8 @@ class HTTPConnection(_HTTPConnection):
         :param tcp_keepalive:   idle time used when SO_KEEPALIVE is enable
         :param tcp_keepintvl:   interval between keepalives
         :param tcp_keepcnt:     number of keepalives before close
+        :param blocksize:       the size of the blocks a request body is
+                                sent in
         """
 
         self.logger = logging.getLogger(__name__ + '.HTTPConnection')
@@ -77,14 +356,20 @@ class HTTPConnection(_HTTPConnection):
         self.tcp_keepcnt = tcp_keepcnt
         super().__init__(host, port, timeout=timeout,
                          source_address=source_address)
+        self.blocksize = blocksize
+        self.tcp_time = 0.0  # the time the TCP connect took
+        self.tls_time = 0.0  # the time the TLS handshake took
 
     def connect(self):
         """
         Connect to the host and port specified in __init__, using the
         keep-alive settings specified there as well.
         """
+        c_t = time.perf_counter()
         self.sock = self._create_connection(
             (self.host,self.port), self.timeout, self.source_address)
+        self.tcp_time = time.perf_counter() - c_t
+        self.tls_time = 0.0
 
         # added to standard method:
         if self.sock_keepalive:
@@ -93,14 +378,15 @@ class HTTPConnection(_HTTPConnection):
             self.sock.setsockopt(socket.SOL_TCP, TCP_KEEPINTVL, self.tcp_keepintvl)
             self.sock.setsockopt(socket.SOL_TCP, TCP_KEEPCNT, self.tcp_keepcnt)
 
-            self.logger.debug('enabled TCP keep-alive (TCP_KEEPALIVE = {}, '
-                              'TCP_KEEPINTVL = {}, TCP_KEEPCNT = {})'
-                              .format(self.sock.getsockopt(socket.SOL_TCP,
-                                                           TCP_KEEPALIVE),
-                                      self.sock.getsockopt(socket.SOL_TCP,
-                                                           TCP_KEEPINTVL),
-                                      self.sock.getsockopt(socket.SOL_TCP,
-                                                           TCP_KEEPCNT)))
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug('enabled TCP keep-alive (TCP_KEEPALIVE = {}, '
+                                  'TCP_KEEPINTVL = {}, TCP_KEEPCNT = {})'
+                                  .format(self.sock.getsockopt(socket.SOL_TCP,
+                                                               TCP_KEEPALIVE),
+                                          self.sock.getsockopt(socket.SOL_TCP,
+                                                               TCP_KEEPINTVL),
+                                          self.sock.getsockopt(socket.SOL_TCP,
+                                                               TCP_KEEPCNT)))
         # end of addition
 
         self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
@@ -114,7 +400,8 @@ try:
 except ImportError:
     pass
 else:
-    class HTTPSConnection(_HTTPConnection):
+    class HTTPSConnection(_ReadAheadMixin, _SendBodyMixin,
+                          _HTTPConnection):
         "This class allows communication via SSL."
 
         default_port = HTTPS_PORT
@@ -125,7 +412,8 @@ else:
                      timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
                      source_address=None, *, context=None,
                      check_hostname=None, sock_keepalive=False,
-                     tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3):
+                     tcp_keepalive=60, tcp_keepintvl=60, tcp_keepcnt=3,
+                     blocksize=BLOCKSIZE, session=None):
             """
             :param host:            target host (fqdn or ip-address
             :param port:            target port
@@ -135,6 +423,11 @@ else:
             :param tcp_keepalive:   idle time used when SO_KEEPALIVE is enable
             :param tcp_keepintvl:   interval between keepalives
             :param tcp_keepcnt:     number of keepalives before close
+            :param blocksize:       the size of the blocks a request body is
+                                    sent in
+            :param session:         an *ssl.SSLSession* of an earlier
+                                    connection to *host*, offered for
+                                    resumption during the TLS handshake
             """
             # added to standard method:
             self.logger = logging.getLogger(__name__ + '.HTTPConnection')
@@ -146,6 +439,11 @@ else:
 
             super(HTTPSConnection, self).__init__(host, port, timeout,
                                                   source_address)
+            self.blocksize = blocksize
+            self.tcp_time = 0.0  # the time the TCP connect took
+            self.tls_time = 0.0  # the time the TLS handshake took
+            self.session = session  # the SSLSession offered for resumption
+            self.session_reused = False  # if the handshake resumed it
             self.key_file = key_file
             self.cert_file = cert_file
             if context is None:
@@ -164,7 +462,9 @@ else:
         def connect(self):
             "Connect to a host on a given (SSL) port."
 
+            c_t = time.perf_counter()
             super().connect()
+            self.tcp_time = time.perf_counter() - c_t
 
             # added to standard method:
             if self.sock_keepalive:
@@ -173,14 +473,15 @@ else:
                 self.sock.setsockopt(socket.SOL_TCP, TCP_KEEPINTVL, self.tcp_keepintvl)
                 self.sock.setsockopt(socket.SOL_TCP, TCP_KEEPCNT, self.tcp_keepcnt)
 
-                self.logger.debug('enabled TCP keep-alive (TCP_KEEPALIVE = {}, '
-                                  'TCP_KEEPINTVL = {}, TCP_KEEPCNT = {})'
-                                  .format(self.sock.getsockopt(socket.SOL_TCP,
-                                                               TCP_KEEPALIVE),
-                                          self.sock.getsockopt(socket.SOL_TCP,
-                                                               TCP_KEEPINTVL),
-                                          self.sock.getsockopt(socket.SOL_TCP,
-                                                               TCP_KEEPCNT)))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug('enabled TCP keep-alive (TCP_KEEPALIVE = {}, '
+                                      'TCP_KEEPINTVL = {}, TCP_KEEPCNT = {})'
+                                      .format(self.sock.getsockopt(socket.SOL_TCP,
+                                                                   TCP_KEEPALIVE),
+                                              self.sock.getsockopt(socket.SOL_TCP,
+                                                                   TCP_KEEPINTVL),
+                                              self.sock.getsockopt(socket.SOL_TCP,
+                                                                   TCP_KEEPCNT)))
             # end of addition
 
             if self._tunnel_host:
@@ -188,8 +489,12 @@ else:
             else:
                 server_hostname = self.host
 
+            c_t = time.perf_counter()
             self.sock = self._context.wrap_socket(self.sock,
-                                                  server_hostname=server_hostname)
+                                                  server_hostname=server_hostname,
+                                                  session=self.session)
+            self.tls_time = time.perf_counter() - c_t
+            self.session_reused = self.sock.session_reused
             if not self._context.check_hostname and self._check_hostname:
                 try:
                     ssl.match_hostname(self.sock.getpeercert(), server_hostname)
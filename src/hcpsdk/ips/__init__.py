@@ -22,17 +22,32 @@
 
 import threading
 import socket
+import time
+import random
 import logging
+from copy import copy
+from weakref import WeakSet
 # noinspection PyPackageRequirements
 import dns
 # noinspection PyPackageRequirements
 import dns.resolver
 
 
-__all__ = ['IpsError', 'Circle', 'Request', 'Response', 'query']
+__all__ = ['IpsError', 'Circle', 'Request', 'Response', 'query', 'Strategy',
+           'RoundRobin', 'LeastOutstanding', 'Ewma', 'PowerOfTwoChoices',
+           'AddressStats', 'CircuitBreaker']
 
 logging.getLogger('hcpsdk.ips').addHandler(logging.NullHandler())
 
+# The TTL (secs) assumed for IP addresses acquired from the system resolver,
+# which doesn't reveal the TTL of the records.
+SYSTEM_TTL = 60
+# The min. interval (secs) between refreshes of an FQDN, to protect DNS from
+# records with very short TTLs.
+MIN_TTL = 5
+# Cached IP addresses are refreshed when this share of their TTL has passed.
+REFRESH_AHEAD = 0.8
+
 
 class IpsError(Exception):
     """
@@ -46,82 +61,432 @@ class IpsError(Exception):
         self.args = (reason,)
 
 
+class AddressStats(object):
+    """
+    Load and latency statistics of a single IP address, collected by
+    *Circle* from the reports of the *hcpsdk.Connection*\\ s using it.
+    """
+
+    def __init__(self):
+        self.outstanding = 0  # the number of requests in flight
+        self.ewma = None  # the EWMA of the service times observed (secs)
+        self.requests = 0  # the number of finished requests
+        self.failures = 0  # the number of consecutive failures
+        self.opened = None  # when the circuit has been opened (monotonic)
+        self.probing = False  # True while a half-open probe is underway
+
+    def __getstate(self):
+        if self.opened is None:
+            return 'closed'
+        return 'half-open' if self.probing else 'open'
+    state = property(__getstate, None, None,
+                     'The circuit state: *closed*, *open* or *half-open* (r/o)')
+
+    def __repr__(self):
+        return ('{}(outstanding={}, ewma={}, requests={}, failures={}, '
+                'state={})'
+                .format(__class__.__name__, self.outstanding, self.ewma,
+                        self.requests, self.failures, self.state))
+
+
+class CircuitBreaker(object):
+    """
+    Temporarily evict IP addresses that failed repeatedly from the set of IP
+    addresses *Circle* hands out.
+
+    After *maxfailures* consecutive failures, the circuit of an IP address
+    opens and the IP address isn't handed out for *cooloff* seconds. After
+    that, it is handed out once again, as a probe (the circuit is
+    *half-open*); if the probe succeeds, the circuit closes, if it fails,
+    the circuit opens for another *cooloff* seconds.
+
+    If the circuits of all IP addresses are open, *Circle* ignores them, as
+    trying a possibly broken IP address is better than having nothing to
+    try at all.
+    """
+
+    def __init__(self, maxfailures=3, cooloff=30):
+        """
+        :param maxfailures: the number of consecutive failures that open the
+                            circuit; 0 disables the circuit breaker
+        :param cooloff:     the time (secs) an IP address is evicted
+        """
+        self.maxfailures = maxfailures
+        self.cooloff = cooloff
+
+    def available(self, stats, now):
+        """
+        Check if an IP address may be handed out.
+
+        :param stats:   the *AddressStats* for the IP address
+        :param now:     the current *time.monotonic()*
+        :return:        True if the circuit is closed or due to be probed
+        """
+        return stats.opened is None or now - stats.opened >= self.cooloff
+
+    def handedout(self, stats, now):
+        """
+        Record that an IP address has been handed out; if its circuit isn't
+        closed, this is the half-open probe.
+
+        :param stats:   the *AddressStats* for the IP address
+        :param now:     the current *time.monotonic()*
+        """
+        if stats.opened is not None:
+            stats.opened = now  # no more probes until this one is done
+            stats.probing = True
+
+    def failed(self, stats, now):
+        """
+        Record a failure.
+
+        :param stats:   the *AddressStats* for the IP address
+        :param now:     the current *time.monotonic()*
+        :return:        True if this opened the circuit
+        """
+        stats.failures += 1
+        if not self.maxfailures or (stats.opened is None and
+                                    stats.failures < self.maxfailures):
+            return False
+        reopened = stats.opened is None
+        stats.opened = now
+        stats.probing = False
+        return reopened
+
+    def succeeded(self, stats):
+        """
+        Record a success, closing the circuit.
+
+        :param stats:   the *AddressStats* for the IP address
+        """
+        stats.failures = 0
+        stats.opened = None
+        stats.probing = False
+
+    def __repr__(self):
+        return ('{}(maxfailures={}, cooloff={})'
+                .format(self.__class__.__name__, self.maxfailures,
+                        self.cooloff))
+
+
+class Strategy(object):
+    """
+    Base class for the strategies *Circle* uses to select the IP address
+    handed out next. Sub-classes need to overwrite *select()*.
+    """
+
+    def __init__(self, alpha=0.3):
+        """
+        :param alpha:   the weight of a new service time in the EWMA
+                        (0 < alpha <= 1)
+        """
+        self.alpha = alpha
+
+    def select(self, addresses, stats):
+        """
+        Select an IP address.
+
+        :param addresses:   the list of candidate IP addresses (never empty)
+        :param stats:       a dict of *AddressStats* per IP address
+        :return:            one out of *addresses*
+        """
+        raise NotImplementedError
+
+    def record(self, stats, service_time):
+        """
+        Fold a service time observed into an IP address's statistics.
+
+        :param stats:           the *AddressStats* for the IP address
+        :param service_time:    the service time observed (secs)
+        """
+        if stats.ewma is None:
+            stats.ewma = service_time
+        else:
+            stats.ewma += self.alpha * (service_time - stats.ewma)
+
+    def _load(self, stats):
+        """
+        The load of an IP address: the expected service time, times the
+        number of requests in flight (plus the one to come). Not yet
+        measured IP addresses are preferred, to get them measured.
+        """
+        return (stats.ewma or 0.0) * (stats.outstanding + 1)
+
+    def __repr__(self):
+        return '{}(alpha={})'.format(self.__class__.__name__, self.alpha)
+
+
+class RoundRobin(Strategy):
+    """
+    Hand out the IP addresses round-robin, blind to their load (the
+    default).
+    """
+
+    def __init__(self, alpha=0.3):
+        super().__init__(alpha=alpha)
+        self.__next = 0
+
+    def select(self, addresses, stats):
+        self.__next %= len(addresses)
+        address = addresses[self.__next]
+        self.__next += 1
+        return address
+
+
+class LeastOutstanding(Strategy):
+    """
+    Hand out the IP address with the least number of requests in flight;
+    ties are resolved round-robin.
+    """
+
+    def __init__(self, alpha=0.3):
+        super().__init__(alpha=alpha)
+        self.__next = 0
+
+    def select(self, addresses, stats):
+        self.__next = (self.__next + 1) % len(addresses)
+        rotated = addresses[self.__next:] + addresses[:self.__next]
+        return min(rotated, key=lambda a: stats[a].outstanding)
+
+
+class Ewma(Strategy):
+    """
+    Hand out the IP address with the lowest expected service time (the
+    EWMA of the service times observed, weighted by the number of requests
+    in flight); ties are resolved round-robin.
+    """
+
+    def __init__(self, alpha=0.3):
+        super().__init__(alpha=alpha)
+        self.__next = 0
+
+    def select(self, addresses, stats):
+        self.__next = (self.__next + 1) % len(addresses)
+        rotated = addresses[self.__next:] + addresses[:self.__next]
+        return min(rotated, key=lambda a: self._load(stats[a]))
+
+
+class PowerOfTwoChoices(Strategy):
+    """
+    Pick two IP addresses by random and hand out the one with the lower
+    load (as for *Ewma*). Close to *Ewma*, but avoids herding all new
+    connections onto the single fastest IP address.
+    """
+
+    def select(self, addresses, stats):
+        if len(addresses) == 1:
+            return addresses[0]
+        a, b = random.sample(addresses, 2)
+        return a if self._load(stats[a]) <= self._load(stats[b]) else b
+
+
 # noinspection PyTypeChecker
 class Circle(object):
     """
     Resolve an FQDN (using **query()**), cache the acquired IP addresses and
-    yield them round-robin.
+    hand them out, round-robin or as defined by a *Strategy*. IP addresses
+    that keep failing are evicted for a while by a *CircuitBreaker*.
     """
     __EMPTY_ADDRLIST = []
 
-    def __init__(self, fqdn, port=443, dnscache=False):
+    def __init__(self, fqdn, port=443, dnscache=False, strategy=None,
+                 breaker=None):
         """
         :param fqdn:        the FQDN to be resolved
         :param port:        the port to be used by the **hcpsdk.Target** object
         :param dnscache:    if True, use the system resolver (which **might** do
                             local caching), else use an internal resolver,
                             bypassing any cache available
+        :param strategy:    a *Strategy* object used to select the IP address
+                            handed out next; defaults to *RoundRobin()*
+        :param breaker:     a *CircuitBreaker* object; defaults to
+                            *CircuitBreaker()*
         :returns:           an *hcpsdk.ips.Response* object
         """
         self.logger = logging.getLogger(__name__ + '.Circle')
         self.__authority = fqdn
         self.__port = port
         self.__dnscache = dnscache
+        self.__strategy = strategy or RoundRobin()
+        self.__breaker = breaker or CircuitBreaker()
         self._cLock = threading.Lock()
-        self.__generator = None
         self._addresses = Circle.__EMPTY_ADDRLIST.copy()
+        self._stats = {}  # AddressStats per IP address
         self.logger = logging.getLogger('hcpsdk.ips.Circle')
 
         # initial lookup, build the address cache
         self._addr(fqdn=self.__authority)
 
-    def _addr(self, fqdn=None):
+    def _addr(self, fqdn=None, among=None):
         """
         If called with a dnsname (FQDN), query DNS for that name,
         cache the acquired IP addresses.
-        If called without dnsname, work as a generator that yields the
-        cached IP addresses in a round-robin fashion.
+        Return one of the cached IP addresses, as selected by the *Strategy*
+        (round-robin, per default).
 
         .. Warning::
             This method is intended to be internal to **hcpsdk** and may be used
             from the outside *without* parameters, only.
 
         :param fqdn:    the FQDN
+        :param among:   restrict the choice to these IP addresses (which need
+                        to be a non-empty subset of the cached ones)
         :return:        an IP address (as string)
+        :raises:        *IpsError* if there are no IP addresses cached (i.e.
+                        the last DNS query failed)
         """
+        if fqdn:
+            self.__load(fqdn)
 
-        def __addr(dnsname, dnscache=False):
-            """
-            resolve HCPs IP addresses and build a list with all IPs gathered
-            """
-            self._addresses = Circle.__EMPTY_ADDRLIST.copy()
-            result = query(dnsname, cache=dnscache)
-            if result.raised:
-                raise IpsError(result.raised)
-            self._addresses = result.ips.copy()
+        # acquire a lock to make sure that one Request gets serviced at a time
+        with self._cLock:
+            now = time.monotonic()
+            addresses = self._addresses if among is None else \
+                [a for a in among if a in self._stats]
+            candidates = [a for a in addresses
+                          if self.__breaker.available(self._stats[a], now)]
+            candidates = candidates or addresses or self._addresses
+            if not candidates:
+                raise IpsError('no IP addresses available')
+            myaddr = self.__strategy.select(candidates, self._stats)
+            self.__breaker.handedout(self._stats[myaddr], now)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('issued IP address: {}'.format(myaddr))
+        return myaddr
 
-            while True:
-                for ipadr in self._addresses:
-                    yield str(ipadr)
+    def __load(self, fqdn, force=False, timeout=None):
+        """
+        Resolve *fqdn* (through the process-wide TTL cache) and rebuild the
+        cached list of IP addresses.
+        """
+        result = _ttlcache.resolve(fqdn, self.__dnscache, circle=self,
+                                   force=force, timeout=timeout)
+        if result.raised:
+            with self._cLock:
+                self._addresses = Circle.__EMPTY_ADDRLIST.copy()
+            raise IpsError(result.raised)
+        self._update(result)
+
+    def _update(self, response):
+        """
+        Rebuild the cached list of IP addresses from a DNS query *Response*;
+        called by the TTL cache's refresh thread, too.
 
-        # acquire a lock to make sure that one Request gets serviced at a time
-        self._cLock.acquire()
-        if fqdn:
-            self.__generator = __addr(fqdn, dnscache=self.__dnscache)
-        myaddr = next(self.__generator)
-        self._cLock.release()
-        if fqdn:
+        :param response:    an *hcpsdk.ips.Response* object
+        """
+        addresses = [str(ip) for ip in response.ips]
+        with self._cLock:
+            changed = addresses != self._addresses
+            self._addresses = addresses
+            # keep the statistics of IP addresses we already know
+            self._stats = {a: self._stats.get(a) or AddressStats()
+                           for a in self._addresses}
+        if changed:
             self.logger.debug('(re-) loaded IP address cache: {}, dnscache = {}'
-                              .format(self._addresses, self.__dnscache))
-        self.logger.debug('issued IP address: {}'.format(myaddr))
-        return myaddr
+                              .format(addresses, self.__dnscache))
 
-    def refresh(self):
+    def refresh(self, wait=True, timeout=None):
         """
         Force a fresh DNS query and rebuild the cached list of IP addresses
+
+        :param wait:    if False, just urge the TTL cache to refresh the IP
+                        addresses in the background, instead of waiting for
+                        the DNS query
+        :param timeout: the max. time (secs) to wait for the DNS query (see
+                        *query()*)
+        :raises:        *IpsError* if the DNS query fails (if *wait* is True)
+
+        ..  versionchanged:: 0.9.6.0
+            added *wait* and *timeout*
         """
-        self._addr(fqdn=self.__authority)
-        self.logger.debug('IP address cache refreshed')
+        if wait:
+            self.__load(self.__authority, force=True, timeout=timeout)
+            self.logger.debug('IP address cache refreshed')
+        else:
+            _ttlcache.refreshsoon(self.__authority, self.__dnscache)
+
+    def started(self, address):
+        """
+        Report that a request to *address* has been started.
+
+        :param address: the IP address used
+        """
+        with self._cLock:
+            stats = self._stats.get(address)
+            if stats:
+                stats.outstanding += 1
+
+    def finished(self, address, service_time=None):
+        """
+        Report that a request to *address* has been finished.
+
+        :param address:         the IP address used
+        :param service_time:    the time the request took (secs); *None* if
+                                it failed
+        """
+        with self._cLock:
+            stats = self._stats.get(address)
+            if stats:
+                stats.outstanding = max(0, stats.outstanding - 1)
+                if service_time is not None:
+                    stats.requests += 1
+                    self.__strategy.record(stats, service_time)
+
+    def failed(self, address):
+        """
+        Report that connecting to or talking to *address* failed.
+
+        :param address: the IP address used
+        """
+        with self._cLock:
+            stats = self._stats.get(address)
+            if stats and self.__breaker.failed(stats, time.monotonic()):
+                self.logger.debug('circuit opened for IP address {} ({} '
+                                  'failures)'.format(address, stats.failures))
+
+    def succeeded(self, address):
+        """
+        Report that *address* delivered a response.
+
+        :param address: the IP address used
+        """
+        stats = self._stats.get(address)
+        if stats and stats.failures:  # keep the hot path lock-free
+            with self._cLock:
+                if stats.opened is not None:
+                    self.logger.debug('circuit closed for IP address {}'
+                                      .format(address))
+                self.__breaker.succeeded(stats)
+
+    def available(self):
+        """
+        Check if any IP address is available, that is, if at least one
+        circuit is closed or due to be probed. If not, the target is
+        considered to be down.
+
+        :return:    True if there is an available IP address
+        """
+        now = time.monotonic()
+        with self._cLock:
+            return any(self.__breaker.available(s, now)
+                       for s in self._stats.values())
+
+    def __getstrategy(self):
+        return self.__strategy
+    strategy = property(__getstrategy, None, None,
+                        'The *Strategy* used to select IP addresses (r/o)')
+
+    def __getbreaker(self):
+        return self.__breaker
+    breaker = property(__getbreaker, None, None,
+                       'The *CircuitBreaker* used to evict failing IP '
+                       'addresses (r/o)')
+
+    def __getstats(self):
+        with self._cLock:
+            return {a: copy(s) for a, s in self._stats.items()}
+    stats = property(__getstats, None, None,
+                     'A snapshot of the *AddressStats* per IP address (r/o)')
 
     def __getattr__(self, item):
         """
@@ -161,10 +526,11 @@ class Response(object):
         self.fqdn = fqdn
         self.cache = cache
         self.ips = []
+        self.ttl = SYSTEM_TTL  # the TTL of the records (secs)
         self.raised = ''
 
 
-def query(fqdn, cache=False):
+def query(fqdn, cache=False, timeout=None):
     """
     Submit a DNS query, using *socket.getaddrinfo()* if cache=True, or
     *dns.resolver.query()* if cache=False.
@@ -172,6 +538,8 @@ def query(fqdn, cache=False):
     :param fqdn:    a FQDN to query DNS -or- a *Request* object
     :param cache:   if True, use the system resolver (which might do local caching),
                     else use an internal resolver, bypassing any cache available
+    :param timeout: the max. time (secs) the internal resolver may take;
+                    the system resolver can't be limited
     :return:        an **hcpsdk.ips.Response** object
     :raises:        should never raise, as Exceptions are signaled through
                     the **Response.raised** attribute
@@ -192,7 +560,13 @@ def query(fqdn, cache=False):
                     _response.ips.append(a[4][0])
     else:
         try:
-            ips = dns.resolver.query(_response.fqdn, raise_on_no_answer=True)
+            if timeout is None:
+                ips = dns.resolver.query(_response.fqdn,
+                                         raise_on_no_answer=True)
+            else:
+                ips = dns.resolver.query(_response.fqdn,
+                                         raise_on_no_answer=True,
+                                         lifetime=timeout)
         except dns.resolver.NXDOMAIN:
             _response.raised = 'Err: NXDOMAIN - The query name does not exist.'
         except dns.resolver.YXDOMAIN:
@@ -220,8 +594,164 @@ def query(fqdn, cache=False):
                     ip = '{}.{}.{}.{}'.format(int(hx[:2], 16), int(hx[2:4], 16),
                                               int(hx[4:6], 16), int(hx[6:], 16))
                 _response.ips.append(str(ip))
+            _response.ttl = ips.rrset.ttl
             if not len(_response.ips):
                 _response.raised = 'Err: no Response'
 
     return _response
 
+
+
+class _CacheEntry(object):
+    """
+    An entry in the *_TtlCache*.
+    """
+
+    def __init__(self):
+        self.response = None  # the latest Response
+        self.expires = 0.0  # when the Response expires (monotonic)
+        self.refresh = 0.0  # when to refresh the Response (monotonic)
+        self.circles = WeakSet()  # the Circles using this entry
+
+
+class _TtlCache(object):
+    """
+    A process-wide cache of DNS query *Response*\\ s, keyed by FQDN and
+    resolver, honouring the TTL of the records.
+
+    A single thread refreshes the entries used by *Circle*\\ s ahead of their
+    expiry and hands the new IP addresses over to these *Circle*\\ s. So,
+    *Circle*\\ s never wait for DNS after their initial lookup, and HCP nodes
+    added to or removed from DNS are picked up without a failure first.
+    Entries no longer used by any *Circle* are dropped once expired.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__ + '._TtlCache')
+        self.__cond = threading.Condition()
+        self.__entries = {}  # {(fqdn, cache): _CacheEntry}
+        self.__thread = None
+
+    def resolve(self, fqdn, cache, circle=None, force=False, timeout=None):
+        """
+        Get the IP addresses of *fqdn*, from the cache as long as they
+        haven't expired.
+
+        :param fqdn:    the FQDN to resolve
+        :param cache:   the resolver to use (see *query()*)
+        :param circle:  a *Circle* to be updated by background refreshes
+        :param force:   if True, bypass the cache
+        :param timeout: the max. time a DNS query may take (see *query()*)
+        :return:        an *hcpsdk.ips.Response* object (failed queries are
+                        not cached)
+        """
+        key = (fqdn, cache)
+        with self.__cond:
+            entry = self.__entries.get(key)
+            if entry:
+                if circle is not None:
+                    entry.circles.add(circle)
+                if not force and time.monotonic() < entry.expires:
+                    return entry.response
+        response = query(fqdn, cache=cache, timeout=timeout)
+        if not response.raised:
+            self.__store(key, response, circle)
+        return response
+
+    def refreshsoon(self, fqdn, cache):
+        """
+        Urge the refresh thread to refresh the IP addresses of *fqdn* (but
+        not earlier than *MIN_TTL* seconds after the last refresh).
+
+        :param fqdn:    the FQDN to resolve
+        :param cache:   the resolver to use (see *query()*)
+        """
+        with self.__cond:
+            entry = self.__entries.get((fqdn, cache))
+            if entry:
+                entry.refresh = min(entry.refresh, entry.expires -
+                                    entry.response.ttl + MIN_TTL)
+                self.__cond.notify()
+
+    def flush(self):
+        """
+        Drop all entries.
+        """
+        with self.__cond:
+            self.__entries.clear()
+
+    def __store(self, key, response, circle=None):
+        """
+        Cache a *Response*, hand it over to the *Circle*\\ s using it.
+        """
+        now = time.monotonic()
+        with self.__cond:
+            entry = self.__entries.get(key)
+            if not entry:
+                entry = self.__entries[key] = _CacheEntry()
+            entry.response = response
+            entry.expires = now + response.ttl
+            entry.refresh = now + max(response.ttl * REFRESH_AHEAD, MIN_TTL)
+            if circle is not None:
+                entry.circles.add(circle)
+            circles = [c for c in entry.circles if c is not circle]
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__run,
+                                                 name='hcpsdk-dnsrefresh',
+                                                 daemon=True)
+                self.__thread.start()
+            self.__cond.notify()
+        for c in circles:
+            # noinspection PyProtectedMember
+            c._update(response)
+
+    def __run(self):
+        """
+        The refresh thread - wait for the next entry to become due for a
+        refresh, refresh it.
+        """
+        with self.__cond:
+            while True:
+                now = time.monotonic()
+                for key in [k for k, e in self.__entries.items()
+                            if not e.circles and e.expires <= now]:
+                    del self.__entries[key]
+                due = [k for k, e in self.__entries.items()
+                       if e.circles and e.refresh <= now]
+                if not due:
+                    nxt = [e.refresh if e.circles else e.expires
+                           for e in self.__entries.values()]
+                    self.__cond.wait(min(nxt) - now if nxt else None)
+                    continue
+                self.__cond.release()
+                try:
+                    for key in due:
+                        self.__refresh(key)
+                finally:
+                    self.__cond.acquire()
+
+    def __refresh(self, key):
+        """
+        Refresh a single entry; if DNS fails, the *Circle*\\ s keep the IP
+        addresses they have.
+        """
+        response = query(key[0], cache=key[1])
+        if response.raised:
+            self.logger.debug('refreshing {} failed: {}'
+                              .format(key[0], response.raised))
+            with self.__cond:
+                entry = self.__entries.get(key)
+                if entry:
+                    entry.refresh = time.monotonic() + MIN_TTL
+        else:
+            self.logger.debug('refreshed {}: {} (TTL {})'
+                              .format(key[0], response.ips, response.ttl))
+            self.__store(key, response)
+
+    def __len__(self):
+        with self.__cond:
+            return len(self.__entries)
+
+
+# the process-wide DNS cache
+_ttlcache = _TtlCache()
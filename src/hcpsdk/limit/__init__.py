@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+import threading
+import logging
+
+
+__all__ = ['Limiter', 'AIMD', 'Gradient']
+
+logging.getLogger('hcpsdk.limit').addHandler(logging.NullHandler())
+
+
+class Limiter(object):
+    """
+    Base class for the concurrency limiters of a *Target*: a semaphore with
+    a limit that adapts to the load HCP can take. Sub-classes need to
+    overwrite *_adjust()* and may overwrite *_overloaded()*; if they take
+    more arguments, they need to overwrite *_settings()*, too.
+
+    Each Request holds a permit from the time it is sent until its Response
+    has been read completely (or it failed). Once released, the Request's
+    latency (time to first byte) and whether it signaled overload (*503
+    Service Unavailable*, a timeout) are fed back to adapt the limit.
+    Overload reduces the limit by *backoff* - once per round trip, not once
+    per Request that was already in flight.
+
+    ..  versionadded:: 0.9.6.0
+    """
+
+    def __init__(self, initial=20, minlimit=1, maxlimit=200, backoff=0.9):
+        """
+        :param initial:     the initial limit
+        :param minlimit:    the limit will never drop below this
+        :param maxlimit:    the limit will never grow beyond this
+        :param backoff:     the factor the limit is multiplied with on
+                            overload (0 < backoff < 1)
+        """
+        self.logger = logging.getLogger(__name__ + '.' +
+                                        self.__class__.__name__)
+        self.initial = initial
+        self.minlimit = minlimit
+        self.maxlimit = maxlimit
+        self.backoff = backoff
+        self.__limit = float(max(minlimit, min(maxlimit, initial)))
+        self.__inflight = 0
+        self.__generation = 0  # bumped each time the limit is reduced
+        self.__cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Acquire a permit, waiting until the number of Requests in flight
+        drops below the limit.
+
+        :param timeout: the max. time to wait (secs), *None* to wait forever
+        :return:        the permit, *None* if none could be acquired in time
+        """
+        with self.__cond:
+            if not self.__cond.wait_for(
+                    lambda: self.__inflight < int(self.__limit), timeout):
+                return None
+            self.__inflight += 1
+            return self.__generation
+
+    def release(self, permit, rtt=None, overload=False):
+        """
+        Release a permit.
+
+        :param permit:      the permit returned by *acquire()*
+        :param rtt:         the Request's latency (secs), *None* if unknown
+        :param overload:    *True* if the Request signaled overload
+        """
+        with self.__cond:
+            self.__inflight -= 1
+            old = limit = self.__limit
+            if overload or (rtt is not None and self._overloaded(rtt)):
+                if permit >= self.__generation:
+                    limit *= self.backoff
+                    self.__generation += 1
+            elif rtt is not None:
+                limit = self._adjust(limit, self.__inflight + 1, rtt)
+            self.__limit = float(max(self.minlimit, min(self.maxlimit, limit)))
+            self.__cond.notify_all()
+        if int(self.__limit) != int(old) and \
+                self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('limit changed to {}'.format(int(self.__limit)))
+
+    def _adjust(self, limit, inflight, rtt):
+        """
+        Calculate a new limit from a Request's latency.
+
+        :param limit:       the current limit
+        :param inflight:    the Requests in flight (incl. this one)
+        :param rtt:         the Request's latency (secs)
+        :return:            the new limit
+        """
+        raise NotImplementedError
+
+    def _overloaded(self, rtt):
+        """
+        Decide if a Request's latency signals overload.
+
+        :param rtt:     the Request's latency (secs)
+        :return:        *True* or *False*
+        """
+        return False
+
+    def _settings(self):
+        """
+        Get the arguments this *Limiter* was created with.
+
+        :return:    a dict of keyword arguments
+        """
+        return {'initial': self.initial, 'minlimit': self.minlimit,
+                'maxlimit': self.maxlimit, 'backoff': self.backoff}
+
+    def __copy__(self):
+        """
+        Get a new *Limiter* with the same settings, starting at the initial
+        limit with no Requests in flight (for the replica of a *Target*,
+        which is another HCP).
+        """
+        return self.__class__(**self._settings())
+
+    def __getlimit(self):
+        return int(self.__limit)
+    limit = property(__getlimit, None, None,
+                     'The current limit (r/o)')
+
+    def __getinflight(self):
+        return self.__inflight
+    inflight = property(__getinflight, None, None,
+                        'The number of permits handed out (r/o)')
+
+    def __repr__(self):
+        return ('{}(limit={}, minlimit={}, maxlimit={}, backoff={})'
+                .format(self.__class__.__name__, self.limit, self.minlimit,
+                        self.maxlimit, self.backoff))
+
+
+class AIMD(Limiter):
+    """
+    Additive increase, multiplicative decrease: the limit grows by about
+    one per round trip as long as Requests succeed, and drops by *backoff*
+    on overload - *503*, timeouts or (if given) a latency above *latency*.
+    """
+
+    def __init__(self, initial=20, minlimit=1, maxlimit=200, backoff=0.9,
+                 latency=None):
+        """
+        :param initial:     the initial limit
+        :param minlimit:    the limit will never drop below this
+        :param maxlimit:    the limit will never grow beyond this
+        :param backoff:     the factor the limit is multiplied with on
+                            overload (0 < backoff < 1)
+        :param latency:     a latency (secs) signaling overload, *None* to
+                            react on *503* and timeouts only
+        """
+        super().__init__(initial=initial, minlimit=minlimit,
+                         maxlimit=maxlimit, backoff=backoff)
+        self.latency = latency
+
+    def _adjust(self, limit, inflight, rtt):
+        # grow only if the limit is actually used - an application that
+        # doesn't send enough Requests tells nothing about HCP's capacity
+        if inflight * 2 >= limit:
+            return limit + 1.0 / limit
+        return limit
+
+    def _overloaded(self, rtt):
+        return self.latency is not None and rtt > self.latency
+
+    def _settings(self):
+        return dict(super()._settings(), latency=self.latency)
+
+    def __repr__(self):
+        return ('{}(limit={}, minlimit={}, maxlimit={}, backoff={}, '
+                'latency={})'.format(__class__.__name__, self.limit,
+                                     self.minlimit, self.maxlimit,
+                                     self.backoff, self.latency))
+
+
+class Gradient(Limiter):
+    """
+    Latency gradient (Vegas-style): the limit follows the ratio of the
+    minimum latency observed (HCP not queueing) to the current, smoothed
+    latency. Growing latency means Requests queue up in HCP, so the limit
+    shrinks before HCP answers *503*; a small headroom of *sqrt(limit)*
+    allows the limit to grow while latency stays low.
+    """
+
+    def __init__(self, initial=20, minlimit=1, maxlimit=200, backoff=0.9,
+                 tolerance=1.5, smoothing=0.2, window=1000):
+        """
+        :param initial:     the initial limit
+        :param minlimit:    the limit will never drop below this
+        :param maxlimit:    the limit will never grow beyond this
+        :param backoff:     the factor the limit is multiplied with on
+                            overload (0 < backoff < 1)
+        :param tolerance:   the factor the latency may grow over the
+                            minimum before the limit is reduced
+        :param smoothing:   the weight of a new sample in the smoothed
+                            latency and limit (0 < smoothing <= 1)
+        :param window:      forget the minimum latency after this many
+                            samples, to follow changes in HCP
+        """
+        super().__init__(initial=initial, minlimit=minlimit,
+                         maxlimit=maxlimit, backoff=backoff)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window = window
+        self.__minrtt = math.inf
+        self.__rtt = None
+        self.__samples = 0
+
+    def _adjust(self, limit, inflight, rtt):
+        self.__samples += 1
+        if self.__samples > self.window:
+            self.__samples = 1
+            self.__minrtt = math.inf
+        self.__minrtt = min(self.__minrtt, rtt)
+        if self.__rtt is None:
+            self.__rtt = rtt
+        else:
+            self.__rtt += self.smoothing * (rtt - self.__rtt)
+        gradient = max(0.5, min(1.0, self.tolerance * self.__minrtt /
+                                self.__rtt))
+        newlimit = limit * gradient + math.sqrt(limit)
+        if inflight * 2 < limit:  # application limited, don't grow
+            newlimit = min(newlimit, limit)
+        return limit + self.smoothing * (newlimit - limit)
+
+    def _settings(self):
+        return dict(super()._settings(), tolerance=self.tolerance,
+                    smoothing=self.smoothing, window=self.window)
+
+    def __repr__(self):
+        return ('{}(limit={}, minlimit={}, maxlimit={}, backoff={}, '
+                'tolerance={}, smoothing={}, window={})'
+                .format(__class__.__name__, self.limit, self.minlimit,
+                        self.maxlimit, self.backoff, self.tolerance,
+                        self.smoothing, self.window))
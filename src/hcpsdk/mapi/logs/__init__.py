@@ -313,15 +313,13 @@ class Logs(object):
         if self.con.response_status == 200:
             numbytes = 0
             try:
-                while True:
-                    d = self.con.read(amt=2**18)
+                for d in self.con.iter_chunks(2**18):
                     numbytes += len(d)
                     if progresshook:
                         progresshook(numbytes)
-                    if d:
-                        self.hdl.write(d)
-                    else:
-                        break
+                    self.hdl.write(d)
+                if progresshook:
+                    progresshook(numbytes)
             except Exception as e:
                 raise LogsError(e)
         else:
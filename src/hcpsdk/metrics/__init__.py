@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+import threading
+import logging
+from collections import OrderedDict
+
+
+__all__ = ['Histogram', 'Metrics', 'prometheus']
+
+logging.getLogger('hcpsdk.metrics').addHandler(logging.NullHandler())
+
+# Histogram buckets grow logarithmically, SUBBUCKETS per power of two,
+# starting at MINVALUE secs - which makes for a relative error of less than
+# 19% over a range of 1 µs to about 18 minutes in 121 buckets.
+MINVALUE = 1e-6
+SUBBUCKETS = 4
+NBUCKETS = 121
+BOUNDS = [MINVALUE * 2 ** (i / SUBBUCKETS) for i in range(NBUCKETS)]
+BOUNDS[-1] = math.inf
+
+# the bucket bounds used for the Prometheus text exposition
+LE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+      5.0, 10.0, 30.0, 60.0)
+
+# the counters kept per Target
+COUNTERS = ('bytes_sent', 'bytes_received', 'retries', 'connects',
+            'reconnects', 'stale', 'tls_handshakes', 'tls_resumptions',
+            'timeouts', 'errors')
+
+
+class Histogram(object):
+    """
+    A latency histogram with logarithmic buckets. Histograms are cheap to
+    update, have a fixed size and can be merged.
+    """
+
+    def __init__(self):
+        self.counts = [0] * NBUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value):
+        """
+        Record a single value.
+
+        :param value:   the value (secs)
+        """
+        if value > MINVALUE:
+            i = min(NBUCKETS - 1,
+                    math.ceil(math.log2(value / MINVALUE) * SUBBUCKETS))
+        else:
+            i = 0
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """
+        Add the values recorded by another *Histogram* to this one.
+
+        :param other:   a *Histogram* object
+        """
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self):
+        """
+        Get a copy of this *Histogram*.
+        """
+        h = Histogram()
+        h.merge(self)
+        return h
+
+    def percentile(self, p):
+        """
+        Get the (approximate) *p*-th percentile of the recorded values.
+
+        :param p:   the percentile (0 < p <= 100)
+        :return:    the upper bound of the bucket holding the percentile
+                    (but never more than the max. value recorded), or 0.0
+                    if no values have been recorded
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(round(p * self.count / 100, 6)) or 1
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(BOUNDS[i], self.max)
+        return self.max
+
+    def cumulative(self, le):
+        """
+        Get the number of values recorded in buckets with an upper bound of
+        *le* or less.
+
+        :param le:  the upper bound (secs)
+        """
+        return sum(c for b, c in zip(BOUNDS, self.counts) if b <= le)
+
+    def __getmean(self):
+        return self.sum / self.count if self.count else 0.0
+    mean = property(__getmean, None, None, 'The mean value (r/o)')
+
+    def __repr__(self):
+        return ('{}(count={}, mean={:.6f}, p50={:.6f}, p99={:.6f}, '
+                'max={:.6f})'.format(__class__.__name__, self.count,
+                                     self.mean, self.percentile(50),
+                                     self.percentile(99), self.max))
+
+
+class Metrics(object):
+    """
+    Latency histograms of the completed Requests, broken down by method,
+    status class and IP address, plus counters for the bytes sent and
+    received, retries, connects, reconnects, stale connections (closed by
+    HCP while idle), TLS handshakes (and how many of them resumed a cached
+    TLS session), timeouts and errors.
+
+    Each *hcpsdk.Target* holds a *Metrics* object as *Target.metrics*,
+    which is updated by all *Connection*\\ s using that *Target*.
+    """
+
+    def __init__(self, fqdn=None):
+        """
+        :param fqdn:    the FQDN of the *Target*, used as label in
+                        *prometheus()*
+        """
+        self.fqdn = fqdn
+        self.__lock = threading.Lock()
+        self.__histograms = {}  # (method, status class, address): Histogram
+        self.__counters = OrderedDict((c, 0) for c in COUNTERS)
+
+    def record(self, timings, status, sent=0, received=0):
+        """
+        Record a completed Request.
+
+        :param timings:     the Request's *hcpsdk.Timings* object
+        :param status:      the Response's HTTP status code
+        :param sent:        the number of body bytes sent
+        :param received:    the number of body bytes received
+        """
+        key = (timings.method, '{}xx'.format(status // 100),
+               timings.address)
+        with self.__lock:
+            h = self.__histograms.get(key)
+            if not h:
+                h = self.__histograms[key] = Histogram()
+            h.record(timings.total)
+            self.__counters['bytes_sent'] += sent
+            self.__counters['bytes_received'] += received
+            self.__counters['retries'] += timings.retries
+
+    def failed(self, timings, timeout=False):
+        """
+        Record a failed Request.
+
+        :param timings: the Request's *hcpsdk.Timings* object
+        :param timeout: True if it failed due to a timeout
+        """
+        with self.__lock:
+            self.__counters['errors'] += 1
+            self.__counters['timeouts'] += bool(timeout)
+            self.__counters['retries'] += timings.retries
+
+    def count(self, name, n=1):
+        """
+        Add *n* to counter *name*.
+        """
+        with self.__lock:
+            self.__counters[name] += n
+
+    def merge(self, other):
+        """
+        Add the histograms and counters of another *Metrics* object.
+
+        :param other:   a *Metrics* object (a snapshot, for example)
+        """
+        histograms, counters = other._export()
+        with self.__lock:
+            for key, h in histograms.items():
+                if key in self.__histograms:
+                    self.__histograms[key].merge(h)
+                else:
+                    self.__histograms[key] = h
+            for name, n in counters.items():
+                self.__counters[name] += n
+
+    def snapshot(self, reset=False):
+        """
+        Get a consistent copy of the histograms and counters.
+
+        :param reset:   reset the histograms and counters to zero
+        :return:        a new *Metrics* object
+        """
+        m = Metrics(self.fqdn)
+        m.__histograms, counters = self._export(reset=reset)
+        m.__counters.update(counters)
+        return m
+
+    def _export(self, reset=False):
+        """
+        Get copies of the histograms and the counters.
+        """
+        with self.__lock:
+            histograms = {k: h.copy() for k, h in self.__histograms.items()}
+            counters = self.__counters.copy()
+            if reset:
+                self.__histograms = {}
+                self.__counters = OrderedDict((c, 0) for c in COUNTERS)
+        return histograms, counters
+
+    def reset(self):
+        """
+        Reset the histograms and counters to zero.
+        """
+        self._export(reset=True)
+
+    def histogram(self, method=None, status=None, address=None):
+        """
+        Get a single *Histogram* holding all Requests matching the given
+        method, status class (``'2xx'``, ...) and IP address.
+
+        :return:    a new *Histogram* object
+        """
+        h = Histogram()
+        for (m, s, a), _h in self._export()[0].items():
+            if method in (None, m) and status in (None, s) and \
+                    address in (None, a):
+                h.merge(_h)
+        return h
+
+    def __gethistograms(self):
+        return self._export()[0]
+    histograms = property(__gethistograms, None, None,
+                          'A dict of copies of the *Histogram*\\ s, keyed by '
+                          '(method, status class, IP address) (r/o)')
+
+    def __getcounters(self):
+        return self._export()[1]
+    counters = property(__getcounters, None, None,
+                        'A dict of the counters (r/o)')
+
+    def __gettlshitrate(self):
+        with self.__lock:
+            handshakes = self.__counters['tls_handshakes']
+            resumptions = self.__counters['tls_resumptions']
+        return resumptions / handshakes if handshakes else None
+    tlshitrate = property(__gettlshitrate, None, None,
+                          'The share of TLS handshakes that resumed a '
+                          'cached TLS session, *None* if there were no TLS '
+                          'handshakes (r/o)')
+
+    def prometheus(self, prefix='hcpsdk'):
+        """
+        Render the histograms and counters in the Prometheus text
+        exposition format.
+
+        :param prefix:  the prefix of the metric names
+        :return:        a string
+        """
+        return prometheus(self, prefix=prefix)
+
+    def __repr__(self):
+        return '{}({})'.format(__class__.__name__, self.fqdn)
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\')
+                                     .replace('"', '\\"'))
+                    for k, v in labels.items() if v is not None)
+
+
+def prometheus(*metrics, prefix='hcpsdk'):
+    """
+    Render the histograms and counters of one or more *Metrics* objects
+    (of different *Target*\\ s, for example) in the Prometheus text
+    exposition format. The latency histograms are exposed with the bucket
+    bounds in *LE*, with a relative error given by the logarithmic buckets
+    they are recorded in.
+
+    :param metrics: *Metrics* objects
+    :param prefix:  the prefix of the metric names
+    :return:        a string
+    """
+    exports = [(m.fqdn, m._export()) for m in metrics]
+    name = prefix + '_request_duration_seconds'
+    lines = ['# HELP {} Duration of completed requests.'.format(name),
+             '# TYPE {} histogram'.format(name)]
+    for fqdn, (histograms, counters) in exports:
+        for (method, status, address), h in sorted(histograms.items(),
+                                                   key=str):
+            labels = dict(fqdn=fqdn, method=method, status=status,
+                          address=address)
+            for le in LE:
+                lines.append('{}_bucket{{{}}} {}'
+                             .format(name, _labels(**labels, le=le),
+                                     h.cumulative(le)))
+            lines.append('{}_bucket{{{}}} {}'
+                         .format(name, _labels(**labels, le='+Inf'),
+                                 h.count))
+            labels = _labels(**labels)
+            lines.append('{}_sum{{{}}} {}'.format(name, labels, h.sum))
+            lines.append('{}_count{{{}}} {}'.format(name, labels, h.count))
+    for counter in COUNTERS:
+        name = '{}_{}_total'.format(prefix, counter)
+        lines.extend(['# TYPE {} counter'.format(name)])
+        for fqdn, (histograms, counters) in exports:
+            lines.append('{}{{{}}} {}'.format(name, _labels(fqdn=fqdn),
+                                              counters[counter]))
+    return '\n'.join(lines) + '\n'
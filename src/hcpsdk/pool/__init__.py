@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import time
+import logging
+from collections import deque, Counter
+from contextlib import contextmanager
+from threading import Condition, Event, Thread
+import hcpsdk
+
+__all__ = ['ConnectionPool']
+
+logging.getLogger('hcpsdk.pool').addHandler(logging.NullHandler())
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of persistent *hcpsdk.Connection* objects for a single
+    *hcpsdk.Target*, allowing many threads to share a bounded set of
+    connections to HCP.
+
+    With *minidle*, the pool keeps *Connection*\\ s open and ready in the
+    background, so that checked out *Connection*\\ s don't need to connect
+    (and do the TLS handshake) before sending their first Request.
+    """
+
+    def __init__(self, target, maxsize=10, maxperip=0, idletime=30,
+                 minidle=0, **conargs):
+        """
+        :param target:      an initialized *hcpsdk.Target* object
+        :param maxsize:     the max. number of *Connection*\\ s in the pool
+        :param maxperip:    the max. number of *Connection*\\ s per IP address
+                            of the *Target* (0 = unlimited)
+        :param idletime:    the time an unused *Connection* stays in the pool
+                            (secs); also handed over to the *Connection*\\ s
+        :param minidle:     the number of idle, connected *Connection*\\ s
+                            kept ready by a background thread (0 = none)
+        :param conargs:     more keyword arguments handed over to
+                            *hcpsdk.Connection()* (timeout, retries,
+                            sock_keepalive, ...)
+        """
+        self.logger = logging.getLogger(__name__ + '.ConnectionPool')
+        self.__target = target
+        self.__maxsize = maxsize
+        self.__maxperip = maxperip
+        self.__idletime = float(idletime)
+        self.__conargs = conargs
+        self.__conargs['idletime'] = idletime
+
+        self.__cond = Condition()
+        self.__idle = deque()  # (Connection, time of checkin), oldest left
+        self.__inuse = set()  # the Connections checked out
+        self.__opening = Counter()  # IP addresses being connected to
+        self.__closed = False
+        self.__minidle = min(minidle, maxsize)
+        self.__wake = Event()  # wakes up the warmer thread
+        self.__warmer = None
+
+        if self.__minidle:
+            self.__warmer = Thread(target=self.__warm, daemon=True,
+                                   name='hcpsdk-pool-warmer')
+            self.__warmer.start()
+
+        self.logger.debug('ConnectionPool initialized for {} - maxsize: {} - '
+                          'maxperip: {} - idletime: {} - minidle: {}'
+                          .format(self.__target.fqdn, self.__maxsize,
+                                  self.__maxperip, self.__idletime,
+                                  self.__minidle))
+
+    def checkout(self, timeout=None):
+        """
+        Get a *Connection* out of the pool. An idle *Connection* is re-used,
+        if available, otherwise a new one will be opened, as long as the
+        pool isn't exhausted. If it is, wait for another thread to check in
+        a *Connection*.
+
+        :param timeout: the max. time to wait for a *Connection* (secs),
+                        wait forever if *None*
+        :return:        an *hcpsdk.Connection* object
+        :raises:        *hcpsdk.HcpsdkTimeoutError* if no *Connection* became
+                        available in time, *hcpsdk.HcpsdkError* if the pool
+                        has been closed or one of the exceptions raised by
+                        *hcpsdk.Connection.connect()*
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__cond:
+            while True:
+                if self.__closed:
+                    raise hcpsdk.HcpsdkError('ConnectionPool is closed')
+                self._evict()
+
+                while self.__idle:
+                    con = self.__idle.pop()[0]  # most recently used first
+                    if self._healthy(con):
+                        self.__inuse.add(con)
+                        if self.__minidle:
+                            self.__wake.set()  # replenish the standbys
+                        return con
+                    con.close()
+                    self.logger.debug('discarded unhealthy Connection: IP {}'
+                                      .format(con.address))
+
+                if len(self.__inuse) + sum(self.__opening.values()) < \
+                        self.__maxsize:
+                    address = self._pickaddress()
+                    if address:
+                        self.__opening[address] += 1
+                        break
+
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise hcpsdk.HcpsdkTimeoutError(
+                            'ConnectionPool exhausted ({} Connections in use)'
+                            .format(len(self.__inuse)))
+                self.__cond.wait(remaining)
+
+        # connect outside of the lock, as this might take some time
+        try:
+            con = hcpsdk.Connection(self.__target, **self.__conargs)
+            con.connect(address)
+        except Exception:
+            with self.__cond:
+                self.__opening[address] -= 1
+                self.__cond.notify()
+            raise
+        with self.__cond:
+            self.__opening[address] -= 1
+            self.__inuse.add(con)
+        self.logger.debug('opened Connection: IP {} ({} in use)'
+                          .format(address, len(self.__inuse)))
+        return con
+
+    def checkin(self, con, discard=False):
+        """
+        Return a *Connection* to the pool.
+
+        A *Connection* with a *Response* that hasn't been read completely
+        will be closed, as it can't serve another request.
+
+        :param con:     an *hcpsdk.Connection* taken from this pool
+        :param discard: close the *Connection* and remove it from the pool
+        """
+        with self.__cond:
+            if con not in self.__inuse:
+                raise hcpsdk.HcpsdkError('Connection not checked out from '
+                                         'this pool')
+            self.__inuse.discard(con)
+            if discard or self.__closed:
+                con.close()
+            else:
+                if con.response and not con.response.isclosed():
+                    # unread Response data - the connection is unusable
+                    con.close()
+                self.__idle.append((con, time.monotonic()))
+            self.__cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager that checks out a *Connection* and checks it in when
+        leaving the context. If the context is left with an exception, the
+        *Connection* is discarded.
+
+        ::
+
+            >>> with t.pool.connection() as con:
+            ...     r = con.PUT('/rest/hcpsdk/test1.txt', body='...')
+
+        :param timeout: see *checkout()*
+        """
+        con = self.checkout(timeout=timeout)
+        try:
+            yield con
+        except BaseException:
+            self.checkin(con, discard=True)
+            raise
+        else:
+            self.checkin(con)
+
+    def close(self):
+        """
+        Close all idle *Connection*\\ s and the pool itself. *Connection*\\ s in
+        use will be closed when checked in.
+        """
+        with self.__cond:
+            self.__closed = True
+            while self.__idle:
+                self.__idle.popleft()[0].close()
+            self.__cond.notify_all()
+        self.__wake.set()
+        self.logger.debug('ConnectionPool closed for {}'
+                          .format(self.__target.fqdn))
+
+    def prewarm(self, n, wait=False):
+        """
+        Open *Connection*\\ s in the background, until *n* idle ones are
+        connected and ready to be checked out. New *Connection*\\ s are
+        spread across the IP addresses of the *Target*; the pool won't grow
+        beyond *maxsize*, though.
+
+        :param n:       the number of connected, idle *Connection*\\ s wanted
+        :param wait:    if True, return not before the *Connection*\\ s are
+                        open
+        :return:        the number of *Connection*\\ s opened if *wait* is
+                        True, else *None*
+        """
+        if wait:
+            return self._prewarm(n)
+        Thread(target=self._prewarm, args=(n,), daemon=True,
+               name='hcpsdk-pool-prewarm').start()
+
+    def _prewarm(self, n):
+        """
+        Open *Connection*\\ s until *n* idle ones are connected.
+
+        :param n:   the number of connected, idle *Connection*\\ s wanted
+        :return:    the number of *Connection*\\ s opened
+        """
+        opened = 0
+        while True:
+            with self.__cond:
+                if self.__closed:
+                    break
+                self._evict()
+                opening = sum(self.__opening.values())
+                if self._standby() + opening >= n or \
+                        len(self.__inuse) + len(self.__idle) + opening >= \
+                        self.__maxsize:
+                    break
+                address = self._spreadaddress()
+                if not address:
+                    break
+                self.__opening[address] += 1
+
+            try:
+                con = hcpsdk.Connection(self.__target, **self.__conargs)
+                con.connect(address)
+            except Exception as e:
+                self.logger.debug('prewarming a Connection to IP {} failed '
+                                  '({})'.format(address, e))
+                with self.__cond:
+                    self.__opening[address] -= 1
+                    self.__cond.notify()
+                break
+            with self.__cond:
+                self.__opening[address] -= 1
+                if self.__closed:
+                    con.close()
+                    break
+                self.__idle.append((con, time.monotonic()))
+                self.__cond.notify()
+            opened += 1
+            self.logger.debug('prewarmed Connection: IP {}'.format(address))
+        return opened
+
+    def __warm(self):
+        """
+        The warmer thread, keeping *minidle* *Connection*\\ s ready.
+        """
+        interval = min(1.0, self.__idletime / 2)
+        while not self.__closed:
+            self._prewarm(self.__minidle)
+            self.__wake.wait(interval)
+            self.__wake.clear()
+
+    def _evict(self):
+        """
+        Close and remove *Connection*\\ s idle for longer than *idletime*.
+        Needs to be called with the lock held.
+        """
+        limit = time.monotonic() - self.__idletime
+        while self.__idle and self.__idle[0][1] < limit:
+            con = self.__idle.popleft()[0]
+            con.close()
+            self.logger.debug('evicted idle Connection: IP {}'
+                              .format(con.address))
+
+    def _healthy(self, con):
+        """
+        Check if an idle *Connection* can be re-used. A *Connection* whose
+        underlying connection has been closed meanwhile is fine, as it will
+        re-connect on next use; one that HCP has closed (or half-closed)
+        while it was idle is not.
+        """
+        sock = con.con.sock if con.con else None
+        if sock and (sock.fileno() == -1 or hcpsdk.httpclient._stale(sock)):
+            return False
+        return True
+
+    def _standby(self):
+        """
+        Count the idle *Connection*\\ s that are connected. Needs to be called
+        with the lock held.
+        """
+        return sum(1 for con, t in self.__idle if con.con and con.con.sock)
+
+    def _spreadaddress(self):
+        """
+        Get the IP address of the *Target* with the least *Connection*\\ s
+        (considering *maxperip*), out of those with a closed circuit. No IP
+        address is handed out by the *Target* for this, so neither is its
+        strategy turned, nor a half-open probe used up. Needs to be called
+        with the lock held.
+
+        :return:    an IP address or *None*, if all are exhausted
+        """
+        used = Counter(self.__opening)
+        for con in list(self.__inuse) + [c for c, t in self.__idle]:
+            if con.address:
+                used[con.address] += 1
+        stats = self.__target.ipaddrqry.stats
+        candidates = [a for a in self.__target.addresses
+                      if a in stats and stats[a].state == 'closed']
+        address = min(candidates, key=lambda a: used[a], default=None)
+        if address and self.__maxperip and used[address] >= self.__maxperip:
+            return None
+        return address
+
+    def _pickaddress(self):
+        """
+        Get an IP address from the *Target* that hasn't reached *maxperip*
+        yet. Needs to be called with the lock held.
+
+        :return:    an IP address or *None*, if all are exhausted
+        """
+        if not self.__maxperip:
+            return self.__target.getaddr()
+
+        used = Counter(self.__opening)
+        for con in list(self.__inuse) + [c for c, t in self.__idle]:
+            if con.address:
+                used[con.address] += 1
+        eligible = [a for a in self.__target.addresses
+                    if used[a] < self.__maxperip]
+        if not eligible:
+            return None
+        # noinspection PyProtectedMember
+        return self.__target.ipaddrqry._addr(among=eligible)
+
+    # properties for externally visible attributes
+    def __gettarget(self):
+        return self.__target
+    target = property(__gettarget, None, None,
+                      'The *hcpsdk.Target* this pool is serving (r/o)')
+
+    def __getmaxsize(self):
+        return self.__maxsize
+    maxsize = property(__getmaxsize, None, None,
+                       'The max. number of *Connection*\\ s (r/o)')
+
+    def __getmaxperip(self):
+        return self.__maxperip
+    maxperip = property(__getmaxperip, None, None,
+                        'The max. number of *Connection*\\ s per IP address '
+                        '(r/o)')
+
+    def __getminidle(self):
+        return self.__minidle
+    minidle = property(__getminidle, None, None,
+                       'The number of connected, idle *Connection*\\ s '
+                       'kept ready (r/o)')
+
+    def __getidle(self):
+        return len(self.__idle)
+    idle = property(__getidle, None, None,
+                    'The number of idle *Connection*\\ s in the pool (r/o)')
+
+    def __getinuse(self):
+        return len(self.__inuse)
+    inuse = property(__getinuse, None, None,
+                     'The number of *Connection*\\ s checked out (r/o)')
+
+    def __repr__(self):
+        return ('{}({}, maxsize={}, maxperip={}, idletime={}, minidle={})'
+                .format(__class__.__name__, repr(self.__target),
+                        self.__maxsize, self.__maxperip, self.__idletime,
+                        self.__minidle))
+
+    def __str__(self):
+        return ('{} initialized for {} ({} in use, {} idle)'
+                .format(__class__.__name__, self.__target.fqdn,
+                        len(self.__inuse), len(self.__idle)))
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import time
+import random
+import http.client
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+
+
+__all__ = ['RETRYABLE', 'RetryPolicy', 'parseretryafter']
+
+logging.getLogger('hcpsdk.retry').addHandler(logging.NullHandler())
+
+# the exceptions retried by default - timeouts, aborted and reset
+# connections, broken pipes, and HCP having closed a persistent connection.
+# Errors that can't be cured by a retry (refused connections, certificate
+# errors, ...) are never retried, whatever a RetryPolicy says.
+RETRYABLE = (OSError, EOFError, asyncio.TimeoutError,
+             http.client.HTTPException)
+
+
+def parseretryafter(value):
+    """
+    Parse the value of a *Retry-After* header.
+
+    :param value:   the header's value - either a number of seconds or an
+                    HTTP date
+    :return:        the number of seconds to wait (>= 0.0), *None* if the
+                    value can't be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+    Decides if and when a failed Request is retried. A *RetryPolicy* is
+    shared by all *Connection*\\ s of a *Target* (and can be shared by
+    several *Target*\\ s, as well), while the number of retries is set per
+    *Connection*.
+
+    Retries wait for an exponentially growing delay (*backoff*, 2 \\*
+    *backoff*, 4 \\* *backoff*, ... up to *maxbackoff*), with full jitter.
+
+    To avoid retry storms against an overloaded HCP, retries are limited by
+    a budget: each Request adds *budget* tokens to a bucket holding up to
+    *burst* tokens; each retry takes one token. With the bucket empty,
+    failed Requests aren't retried anymore.
+
+    ..  versionadded:: 0.9.6.0
+    """
+
+    def __init__(self, backoff=0.05, maxbackoff=2.0, jitter=True, budget=0.2,
+                 burst=10, exceptions=RETRYABLE, statuses=(),
+                 maxretryafter=30.0, seed=None):
+        """
+        :param backoff:         the delay before the first retry (secs)
+        :param maxbackoff:      the maximum delay between retries (secs)
+        :param jitter:          randomize the delay between 0 and the
+                                calculated backoff, to spread retries of
+                                concurrent Requests
+        :param budget:          tokens added per Request (i.e. the share of
+                                Requests that may be retried), *None* for an
+                                unlimited budget
+        :param burst:           the maximum number of tokens in the bucket
+                                (it starts full)
+        :param exceptions:      a tuple of the exceptions that are retried
+        :param statuses:        a tuple of HTTP status codes that are retried
+                                (e.g. *(503,)*); the *Retry-After* header of
+                                such a Response is honored
+        :param maxretryafter:   the longest *Retry-After* honored (secs)
+        :param seed:            seed for the jitter, to make delays
+                                reproducible
+        """
+        self.logger = logging.getLogger(__name__ + '.RetryPolicy')
+        self.__backoff = backoff
+        self.__maxbackoff = maxbackoff
+        self.__jitter = jitter
+        self.__budget = budget
+        self.__burst = burst
+        self.__exceptions = tuple(exceptions)
+        self.__statuses = frozenset(statuses)
+        self.__maxretryafter = maxretryafter
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__tokens = float(burst)
+        self.__denied = 0
+
+    def _request(self):
+        """
+        Called by *Connection* once per Request, to fill the budget.
+        """
+        if self.__budget is not None and self.__tokens < self.__burst:
+            with self.__lock:
+                self.__tokens = min(self.__burst,
+                                    self.__tokens + self.__budget)
+
+    def retryable(self, error=None, status=None):
+        """
+        Check if an exception or HTTP status is to be retried at all.
+
+        :param error:   an exception
+        :param status:  an HTTP status code
+        :return:        *True* or *False*
+        """
+        if error is not None:
+            return isinstance(error, self.__exceptions)
+        return status in self.__statuses
+
+    def retry(self, error=None, status=None):
+        """
+        Check if a failed attempt shall be retried, and take a token from
+        the budget if so.
+
+        :param error:   the exception the attempt failed with
+        :param status:  the HTTP status the attempt has been answered with
+        :return:        *True* if the attempt shall be retried
+        """
+        if not self.retryable(error, status):
+            return False
+        if self.__budget is None:
+            return True
+        with self.__lock:
+            if self.__tokens >= 1.0:
+                self.__tokens -= 1.0
+                return True
+            self.__denied += 1
+        self.logger.debug('retry budget exhausted - not retrying {}'
+                          .format(repr(error) if error else status))
+        return False
+
+    def delay(self, attempt, retryafter=None):
+        """
+        Calculate the time to wait before a retry.
+
+        :param attempt:     the retry (1..)
+        :param retryafter:  the value of a *Retry-After* header, if any
+        :return:            the delay (secs)
+        """
+        delay = min(self.__maxbackoff,
+                    self.__backoff * 2 ** (attempt - 1)) if self.__backoff \
+            else 0.0
+        if self.__jitter and delay:
+            delay = self.__random.uniform(0.0, delay)
+        if retryafter is not None and self.__maxretryafter:
+            retryafter = parseretryafter(retryafter)
+            if retryafter is not None:
+                delay = max(delay, min(retryafter, self.__maxretryafter))
+        return delay
+
+    def __getstatuses(self):
+        return self.__statuses
+    statuses = property(__getstatuses, None, None,
+                        'The HTTP status codes that are retried (r/o)')
+
+    def __gettokens(self):
+        return self.__tokens
+    tokens = property(__gettokens, None, None,
+                      'The tokens left in the retry budget (r/o)')
+
+    def __getdenied(self):
+        return self.__denied
+    denied = property(__getdenied, None, None,
+                      'The number of retries denied by the budget (r/o)')
+
+    def __repr__(self):
+        return ('{}(backoff={}, maxbackoff={}, jitter={}, budget={}, '
+                'burst={}, exceptions={}, statuses={}, maxretryafter={})'
+                .format(__class__.__name__, self.__backoff, self.__maxbackoff,
+                        self.__jitter, self.__budget, self.__burst,
+                        tuple(e.__name__ for e in self.__exceptions),
+                        tuple(sorted(self.__statuses)),
+                        self.__maxretryafter))
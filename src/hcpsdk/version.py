@@ -27,8 +27,8 @@ class _Version(object):
     """
     release = 0
     major = 9
-    minor = 5
-    build = 1
+    minor = 6
+    build = 0
 
     fullversion = '{}.{}.{}-{}'.format(release, major, minor, build)
 
@@ -69,7 +69,15 @@ setup(
 
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
 
         # more...
         'Operating System :: OS Independent',
@@ -89,6 +97,9 @@ setup(
     # https://packaging.python.org/en/latest/technical.html#install-requires-vs-requirements-files
     install_requires = ['dnspython>=1.15.0'],
 
+    # hcpsdk.aio needs Python 3.7, but isn't imported by ``import hcpsdk``
+    python_requires='>=3.6',
+
     # List additional groups of dependencies here (e.g. development dependencies).
     # You can install these using the following syntax, for example:
     # $ pip install -e .[dev,test]
@@ -113,7 +124,7 @@ setup(
     # To provide executable scripts, use entry points in preference to the
     # "scripts" keyword. Entry points provide cross-platform support and allow
     # pip to create the appropriate form of executable for the Target platform.
-    # entry_points={
-    #               'console_scripts': ['sample=sample:main',],
-    #               },
+    entry_points={
+                  'console_scripts': ['hcpsdk-bench=hcpsdk.bench:main',],
+                  },
 )
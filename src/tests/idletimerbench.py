@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Compares the cost of handling the Connection idle time per request:
+#   before: a threading.Timer started (and canceled) per request
+#   after:  a single, process-wide idle reaper (hcpsdk._reaper)
+
+import sys
+import os.path
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import threading
+import hcpsdk
+
+T_REQUESTS = 20000  # no. of simulated requests
+T_IDLECONS = 500  # no. of idle connections waiting for their idle time
+T_IDLETIME = 30.0
+
+
+class _Con(object):
+    """
+    Stand-in for hcpsdk.Connection, as far as the idle reaper is concerned
+    """
+    def _idletimeout(self, entry):
+        pass
+
+
+def t_timer(requests):
+    '''
+    Start and cancel a threading.Timer per request (the former way)
+    '''
+    s_t = time.perf_counter()
+    for i in range(requests):
+        t = threading.Timer(T_IDLETIME, lambda: None)
+        t.start()
+        t.cancel()
+    return time.perf_counter() - s_t
+
+
+def t_reaper(requests):
+    '''
+    Schedule and cancel an idle reaper entry per request
+    '''
+    con = _Con()
+    s_t = time.perf_counter()
+    for i in range(requests):
+        # noinspection PyProtectedMember
+        e = hcpsdk._reaper.schedule(con, T_IDLETIME)
+        # noinspection PyProtectedMember
+        hcpsdk._reaper.cancel(e)
+    return time.perf_counter() - s_t
+
+
+if __name__ == '__main__':
+    print('--> {} requests, start/cancel of the idle timer:'
+          .format(T_REQUESTS))
+    for name, func in [('threading.Timer', t_timer),
+                       ('idle reaper', t_reaper)]:
+        st = func(T_REQUESTS)
+        print('\t{:16s} {:8.3f} secs ({:8.2f} usecs/request)'
+              .format(name, st, st / T_REQUESTS * 1000000))
+
+    print('--> {} idle connections waiting for their idle time:'
+          .format(T_IDLECONS))
+    threads = threading.active_count()
+    timers = [threading.Timer(T_IDLETIME, lambda: None)
+              for i in range(T_IDLECONS)]
+    for t in timers:
+        t.start()
+    print('\t{:16s} {:8d} threads'.format('threading.Timer',
+                                          threading.active_count() - threads))
+    for t in timers:
+        t.cancel()
+    for t in timers:
+        t.join()
+
+    threads = threading.active_count()
+    # noinspection PyProtectedMember
+    entries = [hcpsdk._reaper.schedule(_Con(), T_IDLETIME)
+               for i in range(T_IDLECONS)]
+    print('\t{:16s} {:8d} threads'.format('idle reaper',
+                                          threading.active_count() - threads))
+    for e in entries:
+        # noinspection PyProtectedMember
+        hcpsdk._reaper.cancel(e)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Compares the cost of the debug logging on the request path, with DEBUG
+# logging disabled:
+#   before: every message formatted, then dropped by logger.log()
+#   after:  a single logger.isEnabledFor() check, nothing formatted
+# and shows what a real request against the emulator pays for its logging.
+
+import sys
+import os.path
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import logging
+import hcpsdk
+import hcpsdk.emulator
+
+T_REQUESTS = 100000  # no. of simulated requests
+T_GETS = 2000  # no. of real requests against the emulator
+T_URL = '/rest/hcpsdk/loggingbench/object'
+
+logger = logging.getLogger('hcpsdk.loggingbench')
+
+
+def t_eager(requests):
+    '''
+    Format the per-request messages, then let logger.log() drop them
+    (the former way)
+    '''
+    method, url, address, st = 'GET', T_URL, '127.0.0.1', 0.000123
+    s_t = time.perf_counter()
+    for i in range(requests):
+        logger.log(logging.DEBUG, 'issued IP address: {}'.format(address))
+        logger.log(logging.DEBUG, 'url ({}) doesn\'t need quoting'.format(url))
+        logger.log(logging.DEBUG, 'URL = {}'.format(url))
+        logger.log(logging.DEBUG, '{}: About to request for {}'
+                   .format(method, url))
+        logger.log(logging.DEBUG, '{} Request for {} - service_time1&2 = '
+                   '{:0.17f}'.format(method, url, st))
+        logger.log(logging.DEBUG, '{} Request for {} - after getResponse(): '
+                   'service_time2 = {:0.17f}'.format(method, url, st))
+        logger.log(logging.DEBUG, 'final read: service_time1/2 = {:0.17f}/'
+                   '{:0.17f} secs'.format(st, st))
+    return time.perf_counter() - s_t
+
+
+def t_guarded(requests):
+    '''
+    Check logger.isEnabledFor() the way the request path does now
+    '''
+    method, url, address, st = 'GET', T_URL, '127.0.0.1', 0.000123
+    s_t = time.perf_counter()
+    for i in range(requests):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.log(logging.DEBUG, 'issued IP address: {}'.format(address))
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.log(logging.DEBUG, 'URL = {}'.format(url))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.log(logging.DEBUG, 'final read: service_time1/2 = '
+                       '{:0.17f}/{:0.17f} secs'.format(st, st))
+    return time.perf_counter() - s_t
+
+
+def t_requests(requests, level):
+    '''
+    GET an object from the emulator, with the hcpsdk loggers set to *level*
+    '''
+    logging.getLogger('hcpsdk').setLevel(level)
+    em = hcpsdk.emulator.Emulator(seed=0).start()
+    try:
+        t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=em.port, dnscache=True)
+        con = hcpsdk.Connection(t)
+        con.PUT(T_URL, body=b'x' * 1024)
+        con.read()
+        s_t = time.perf_counter()
+        for i in range(requests):
+            con.GET(T_URL)
+            con.read()
+        st = time.perf_counter() - s_t
+        con.close()
+    finally:
+        em.stop()
+        logging.getLogger('hcpsdk').setLevel(logging.NOTSET)
+    return st
+
+
+if __name__ == '__main__':
+    # no handler but the NullHandlers - just like an application that doesn't
+    # care about hcpsdk's logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print('--> {} requests, debug logging disabled:'.format(T_REQUESTS))
+    for name, func in [('eager format', t_eager),
+                       ('isEnabledFor', t_guarded)]:
+        st = func(T_REQUESTS)
+        print('\t{:16s} {:8.3f} secs ({:8.2f} usecs/request)'
+              .format(name, st, st / T_REQUESTS * 1000000))
+
+    print('--> {} GET requests against the emulator:'.format(T_GETS))
+    for name, level in [('logging disabled', logging.WARNING),
+                        ('DEBUG enabled', logging.DEBUG)]:
+        st = t_requests(T_GETS, level)
+        print('\t{:16s} {:8.3f} secs ({:8.2f} usecs/request)'
+              .format(name, st, st / T_GETS * 1000000))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Compares the cost of preparing a Request (headers and url quoting):
+#   before: Target.headers copied and merged per Request (into the caller's
+#           headers), url checked by encoding and scanning per reserved char
+#   after:  a read-only mapping of headers built once per Target, a single
+#           pass check of the url, and cached quoting of the path
+
+import sys
+import os.path
+sys.path.insert(0, os.path.abspath('..'))
+import time
+from urllib.parse import quote
+import hcpsdk
+from hcpsdk.pathbuilder import PathBuilder
+
+T_REQUESTS = 200000  # no. of simulated requests
+
+
+def _oldquoteurl(url):
+    try:
+        url.encode("ascii")
+    except UnicodeEncodeError:
+        return quote(url), True
+    if any([x in url for x in hcpsdk.RFC3986_reserved_chars]):
+        return quote(url), True
+    return url, False
+
+
+def t_before(target, urls):
+    '''
+    Prepare the Requests the former way
+    '''
+    s_t = time.perf_counter()
+    for url in urls:
+        headers = target.headers
+        url, quoted = _oldquoteurl(url)
+    return time.perf_counter() - s_t
+
+
+def t_after(target, urls):
+    '''
+    Prepare the Requests the way Connection.request() does now
+    '''
+    s_t = time.perf_counter()
+    for url in urls:
+        # noinspection PyProtectedMember
+        headers = target._baseheaders
+        # noinspection PyProtectedMember
+        url, quoted = hcpsdk._quoteurl(url)
+    return time.perf_counter() - s_t
+
+
+if __name__ == '__main__':
+    t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                      port=80, dnscache=True)
+    p = PathBuilder(initialpath='/rest/hcpsdk/preparebench')
+    for title, names in [('unique object names', ['']),
+                         ('object names with blanks', [' ', 'ä'])]:
+        urls = [p.getpath(p.getunique('file')[1]) + names[i % len(names)]
+                for i in range(T_REQUESTS)]
+        print('--> {} requests, {}:'.format(T_REQUESTS, title))
+        for name, func in [('before', t_before),
+                           ('after', t_after)]:
+            st = func(t, urls)
+            print('\t{:16s} {:8.3f} secs ({:8.2f} usecs/request)'
+                  .format(name, st, st / T_REQUESTS * 1000000))
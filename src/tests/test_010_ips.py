@@ -21,6 +21,7 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import unittest
+import time
 
 import sys
 import os.path
@@ -63,5 +64,184 @@ class TestHcpsdk_10_1_Ips(unittest.TestCase):
             ips.Circle(fqdn=it.P_NS_BAD, port=it.P_PORT, dnscache=it.P_DNSCACHE)
 
 
+class TestHcpsdk_10_2_Strategies(unittest.TestCase):
+    def setUp(self):
+        self.T_ADDRS = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+        self.T_STATS = {a: ips.AddressStats() for a in self.T_ADDRS}
+
+    def test_2_10_roundrobin(self):
+        """
+        Make sure RoundRobin hands out all addresses in turn
+        """
+        s = ips.RoundRobin()
+        self.assertEqual([s.select(self.T_ADDRS, self.T_STATS)
+                          for i in range(6)], self.T_ADDRS * 2)
+
+    def test_2_20_leastoutstanding(self):
+        """
+        Make sure LeastOutstanding picks the least busy address
+        """
+        self.T_STATS['10.0.0.1'].outstanding = 3
+        self.T_STATS['10.0.0.3'].outstanding = 1
+        s = ips.LeastOutstanding()
+        for i in range(3):
+            self.assertEqual(s.select(self.T_ADDRS, self.T_STATS), '10.0.0.2')
+
+    def test_2_30_ewma(self):
+        """
+        Make sure Ewma avoids the slow address
+        """
+        s = ips.Ewma(alpha=0.5)
+        for a, t in zip(self.T_ADDRS, [0.01, 0.5, 0.02]):
+            s.record(self.T_STATS[a], t)
+        s.record(self.T_STATS['10.0.0.1'], 0.05)
+        self.assertAlmostEqual(self.T_STATS['10.0.0.1'].ewma, 0.03)
+        for i in range(3):
+            self.assertEqual(s.select(self.T_ADDRS, self.T_STATS), '10.0.0.3')
+
+    def test_2_40_poweroftwochoices(self):
+        """
+        Make sure PowerOfTwoChoices never picks the slowest address
+        """
+        s = ips.PowerOfTwoChoices()
+        for a, t in zip(self.T_ADDRS, [0.01, 0.5, 0.02]):
+            s.record(self.T_STATS[a], t)
+        for i in range(20):
+            self.assertNotEqual(s.select(self.T_ADDRS, self.T_STATS),
+                                '10.0.0.2')
+
+    def test_2_50_circle_reports(self):
+        """
+        Make sure Circle keeps track of the reported requests
+        """
+        c = ips.Circle(fqdn='localhost', port=80, dnscache=True,
+                       strategy=ips.Ewma())
+        a = c._addr()
+        c.started(a)
+        self.assertEqual(c.stats[a].outstanding, 1)
+        c.finished(a, 0.25)
+        self.assertEqual(c.stats[a].outstanding, 0)
+        self.assertEqual(c.stats[a].ewma, 0.25)
+        self.assertEqual(c.stats[a].requests, 1)
+
+
+class TestHcpsdk_10_3_CircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.T_ADDRS = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+        self.c = ips.Circle(fqdn='localhost', port=80, dnscache=True,
+                            breaker=ips.CircuitBreaker(maxfailures=2,
+                                                       cooloff=0.2))
+        # replace the resolved addresses by some fake ones
+        self.c._addresses = self.T_ADDRS.copy()
+        self.c._stats = {a: ips.AddressStats() for a in self.T_ADDRS}
+
+    def test_3_10_open(self):
+        """
+        Make sure an address is evicted after maxfailures failures
+        """
+        self.c.failed('10.0.0.2')
+        self.assertEqual(self.c.stats['10.0.0.2'].state, 'closed')
+        self.c.failed('10.0.0.2')
+        self.assertEqual(self.c.stats['10.0.0.2'].state, 'open')
+        for i in range(6):
+            self.assertNotEqual(self.c._addr(), '10.0.0.2')
+
+    def test_3_20_halfopen(self):
+        """
+        Make sure an evicted address is probed once after the cool-off, and
+        gets re-admitted if the probe succeeds
+        """
+        self.c.failed('10.0.0.2')
+        self.c.failed('10.0.0.2')
+        time.sleep(0.25)
+        issued = [self.c._addr() for i in range(6)]
+        self.assertEqual(issued.count('10.0.0.2'), 1)
+        self.assertEqual(self.c.stats['10.0.0.2'].state, 'half-open')
+        self.c.succeeded('10.0.0.2')
+        self.assertEqual(self.c.stats['10.0.0.2'].state, 'closed')
+        self.assertEqual(self.c.stats['10.0.0.2'].failures, 0)
+        issued = [self.c._addr() for i in range(6)]
+        self.assertEqual(issued.count('10.0.0.2'), 2)
+
+    def test_3_30_probe_fails(self):
+        """
+        Make sure a failing probe re-opens the circuit
+        """
+        self.c.failed('10.0.0.2')
+        self.c.failed('10.0.0.2')
+        time.sleep(0.25)
+        while self.c._addr() != '10.0.0.2':
+            pass
+        self.c.failed('10.0.0.2')
+        self.assertEqual(self.c.stats['10.0.0.2'].state, 'open')
+        for i in range(6):
+            self.assertNotEqual(self.c._addr(), '10.0.0.2')
+
+    def test_3_40_all_open(self):
+        """
+        Make sure addresses are still handed out if all circuits are open
+        """
+        for a in self.T_ADDRS:
+            self.c.failed(a)
+            self.c.failed(a)
+        self.assertIn(self.c._addr(), self.T_ADDRS)
+
+    def test_3_50_no_addresses(self):
+        """
+        Make sure IpsError is raised if there are no addresses (i.e. after a
+        failed DNS query), whatever the strategy
+        """
+        for strategy in [ips.RoundRobin(), ips.LeastOutstanding(), ips.Ewma(),
+                         ips.PowerOfTwoChoices()]:
+            c = ips.Circle(fqdn='localhost', port=80, dnscache=True,
+                           strategy=strategy)
+            c._addresses = []
+            with self.assertRaises(ips.IpsError):
+                c._addr()
+
+
+class TestHcpsdk_10_4_TtlCache(unittest.TestCase):
+    def setUp(self):
+        self.ttls = (ips.SYSTEM_TTL, ips.MIN_TTL)
+        ips._ttlcache.flush()
+
+    def tearDown(self):
+        ips.SYSTEM_TTL, ips.MIN_TTL = self.ttls
+        ips._ttlcache.flush()
+
+    def test_4_10_shared(self):
+        """
+        Make sure Circles for the same FQDN share a single cache entry, and
+        a refresh by one of them updates the others
+        """
+        c1 = ips.Circle(fqdn='localhost', port=80, dnscache=True)
+        c2 = ips.Circle(fqdn='localhost', port=80, dnscache=True)
+        self.assertEqual(len(ips._ttlcache), 1)
+        self.assertEqual(c1._addresses, c2._addresses)
+        c1._update(ips.Response('localhost', True))  # no addresses
+        c2.refresh()
+        self.assertEqual(c1._addresses, c2._addresses)
+
+    def test_4_20_background_refresh(self):
+        """
+        Make sure the IP addresses get refreshed in the background, ahead of
+        their TTL
+        """
+        ips.SYSTEM_TTL, ips.MIN_TTL = 0.5, 0.1
+        c = ips.Circle(fqdn='localhost', port=80, dnscache=True)
+        addresses = c._addresses
+        c._update(ips.Response('localhost', True))  # no addresses
+        time.sleep(0.7)
+        self.assertEqual(c._addresses, addresses)
+
+    def test_4_30_ttl(self):
+        """
+        Make sure the TTL is taken from DNS
+        """
+        r = ips.query(it.P_NS_GOOD, cache=False)
+        self.assertFalse(r.raised)
+        self.assertGreaterEqual(r.ttl, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -29,6 +29,7 @@ import unittest
 import ssl
 import socket
 import http.client
+import tempfile
 from pprint import pprint
 
 import init_tests as it
@@ -89,6 +90,39 @@ class TestHcpsdk_02_Access_http(unittest.TestCase):
         r = self.con.PUT(self.T_HCPFILE, T_BUF)
         self.assertEqual(r.status, 201)
 
+    def test_02_15_put_file(self):
+        """
+        Ingest a file from a file object (sent using sendfile())
+        """
+        # noinspection PyPep8Naming
+        T_BUF = os.urandom(3 * 2**20 + 5)
+        with tempfile.TemporaryFile() as f:
+            f.write(T_BUF)
+            f.seek(0)
+            r = self.con.PUT(self.T_HCPFILE + '_file', f)
+        self.assertEqual(r.status, 201)
+        r = self.con.GET(self.T_HCPFILE + '_file')
+        self.assertEqual(self.con.read(), T_BUF)
+        r = self.con.DELETE(self.T_HCPFILE + '_file')
+        self.assertEqual(r.status, 200)
+
+    def test_02_16_iter_chunks(self):
+        """
+        Read an object chunk by chunk into a re-used buffer
+        """
+        # noinspection PyPep8Naming
+        T_BUF = os.urandom(2**20 + 3)
+        r = self.con.PUT(self.T_HCPFILE + '_chunks', T_BUF)
+        self.assertEqual(r.status, 201)
+        self.con.GET(self.T_HCPFILE + '_chunks')
+        buf = bytearray()
+        for chunk in self.con.iter_chunks(2**16):
+            self.assertLessEqual(len(chunk), 2**16)
+            buf += chunk
+        self.assertEqual(buf, T_BUF)
+        r = self.con.DELETE(self.T_HCPFILE + '_chunks')
+        self.assertEqual(r.status, 200)
+
     def test_02_20_head(self):
         """
         Delete a file
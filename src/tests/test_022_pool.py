@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os.path
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import init_tests as it
+
+
+# @unittest.skip("skip TestHcpsdk_22_1_Pool")
+class TestHcpsdk_22_1_Pool(unittest.TestCase):
+    '''
+    Make sure the ConnectionPool hands out, re-uses and limits Connections
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_22_pool'
+        self.hcptarget = hcpsdk.Target(it.P_NS_GOOD, it.P_AUTH, it.P_PORT,
+                                       dnscache=it.P_DNSCACHE)
+        self.hcptarget.pool = hcpsdk.pool.ConnectionPool(self.hcptarget,
+                                                         maxsize=4)
+
+    def tearDown(self):
+        self.hcptarget.pool.close()
+        del self.hcptarget
+
+    def test_1_10_reuse(self):
+        """
+        Make sure a checked in Connection is handed out again
+        """
+        with self.hcptarget.pool.connection() as con1:
+            r = con1.PUT(self.T_HCPFILE, '0123456789ABCDEF' * 64)
+            self.assertEqual(r.status, 201)
+        with self.hcptarget.pool.connection() as con2:
+            r = con2.DELETE(self.T_HCPFILE)
+            self.assertEqual(r.status, 200)
+        self.assertIs(con1, con2)
+        self.assertEqual(self.hcptarget.pool.idle, 1)
+
+    def test_1_20_exhausted(self):
+        """
+        Make sure we time out if the pool is exhausted
+        """
+        cons = [self.hcptarget.pool.checkout() for i in range(4)]
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError):
+            self.hcptarget.pool.checkout(timeout=0.5)
+        for con in cons:
+            self.hcptarget.pool.checkin(con)
+        self.assertEqual(self.hcptarget.pool.inuse, 0)
+
+    def test_1_30_threads(self):
+        """
+        Make sure many threads can share a few Connections
+        """
+        def put(i):
+            with self.hcptarget.pool.connection() as con:
+                r = con.PUT('{}_{}'.format(self.T_HCPFILE, i), 'x' * 1024)
+                self.assertEqual(r.status, 201)
+                r = con.DELETE('{}_{}'.format(self.T_HCPFILE, i))
+                self.assertEqual(r.status, 200)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(put, range(64)))
+        self.assertLessEqual(self.hcptarget.pool.idle, 4)
+
+
+class TestHcpsdk_22_2_Prewarm(unittest.TestCase):
+    '''
+    Make sure Connections get opened ahead of time (no HCP needed) - two
+    emulators on 127.0.0.1 and 127.0.0.2
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_22_prewarm'
+        self.em1 = Emulator(seed=0).start()
+        try:
+            self.em2 = Emulator(address='127.0.0.2',
+                                port=self.em1.port).start()
+        except hcpsdk.emulator.EmulatorError as e:
+            self.em1.stop()
+            self.skipTest(str(e))
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em1.port, dnscache=True)
+        self.pin(self.hcptarget.ipaddrqry, ['127.0.0.1', '127.0.0.2'])
+
+    def pin(self, circle, addresses):
+        """
+        Make *circle* use *addresses*, and keep the DNS cache's background
+        refresh from overwriting them
+        """
+        circle._addresses = list(addresses)
+        circle._stats = {a: hcpsdk.ips.AddressStats() for a in addresses}
+        patcher = mock.patch.object(circle, '_update')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.hcptarget.pool.close()
+        self.em1.stop()
+        self.em2.stop()
+
+    def connections(self, expected):
+        """
+        Get the connections accepted by the emulators, giving them a moment
+        to count the ones just opened.
+        """
+        deadline = time.monotonic() + 2
+        while (self.em1.connections, self.em2.connections) != expected and \
+                time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.em1.connections, self.em2.connections
+
+    def test_2_10_prewarm(self):
+        """
+        Make sure prewarm() opens Connections, spread across the IP
+        addresses, that don't need to connect when used
+        """
+        self.hcptarget.pool = hcpsdk.pool.ConnectionPool(self.hcptarget,
+                                                         maxsize=6)
+        self.assertEqual(self.hcptarget.prewarm(4, wait=True), 4)
+        self.assertEqual(self.hcptarget.prewarm(4, wait=True), 0)
+        self.assertEqual(self.connections((2, 2)), (2, 2))
+        self.assertEqual(self.hcptarget.pool.idle, 4)
+        with self.hcptarget.pool.connection() as con:
+            self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+            self.assertEqual(con.timings.connect, 0.0)
+        self.assertEqual(self.hcptarget.prewarm(10, wait=True), 2)
+
+    def test_2_20_minidle(self):
+        """
+        Make sure the pool keeps minidle Connections ready
+        """
+        self.hcptarget.pool = hcpsdk.pool.ConnectionPool(self.hcptarget,
+                                                         maxsize=6, minidle=2)
+        cons = []
+        for i in range(4):
+            deadline = time.time() + 5
+            while self.hcptarget.pool.idle < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            con = self.hcptarget.pool.checkout()
+            self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+            self.assertEqual(con.timings.connect, 0.0)
+            cons.append(con)
+        for con in cons:
+            self.hcptarget.pool.checkin(con)
+        self.assertLessEqual(self.hcptarget.pool.idle, 6)
+
+    def test_2_30_breaker(self):
+        """
+        Make sure prewarming doesn't hand out IP addresses, and skips IP
+        addresses with an open circuit, without probing them
+        """
+        self.hcptarget.pool = hcpsdk.pool.ConnectionPool(self.hcptarget,
+                                                         maxsize=6)
+        circle = self.hcptarget.ipaddrqry
+        stats = circle._stats['127.0.0.2']
+        stats.opened = opened = time.monotonic() - 3600  # due to be probed
+        with mock.patch.object(circle, '_addr',
+                               side_effect=AssertionError('handed out')):
+            self.assertEqual(self.hcptarget.prewarm(3, wait=True), 3)
+        self.assertEqual(self.connections((3, 0)), (3, 0))
+        self.assertEqual((stats.opened, stats.probing), (opened, False))
+
+
+class TestHcpsdk_22_3_Healthy(unittest.TestCase):
+    '''
+    Make sure the ConnectionPool doesn't hand out Connections closed by HCP
+    while idle (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_22_healthy'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+
+    def tearDown(self):
+        self.hcptarget.pool.close()
+        self.em.stop()
+
+    def test_3_10_stale(self):
+        """
+        Make sure an idle Connection closed by HCP is discarded on checkout
+        """
+        self.em.idletimeout = 0.2
+        with self.hcptarget.pool.connection() as con1:
+            self.assertEqual(con1.HEAD(self.T_HCPFILE).status, 404)
+        time.sleep(0.5)
+        with self.hcptarget.pool.connection() as con2:
+            self.assertEqual(con2.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIsNot(con1, con2)
+        self.assertEqual(self.em.connections, 2)
+
+    def test_3_20_kept(self):
+        """
+        Make sure an idle Connection still open is re-used
+        """
+        with self.hcptarget.pool.connection() as con1:
+            self.assertEqual(con1.HEAD(self.T_HCPFILE).status, 404)
+        with self.hcptarget.pool.connection() as con2:
+            self.assertEqual(con2.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIs(con1, con2)
+        self.assertEqual(self.em.connections, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
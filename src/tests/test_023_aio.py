@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os.path
+sys.path.insert(0, os.path.abspath('..'))
+import io
+import asyncio
+import hcpsdk
+import hcpsdk.aio
+from hcpsdk.emulator import Emulator
+import unittest
+
+import init_tests as it
+
+
+# @unittest.skip("skip TestHcpsdk_23_1_Aio")
+class TestHcpsdk_23_1_Aio(unittest.TestCase):
+    '''
+    Make sure we can write/head/read/delete a file using hcpsdk.aio
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_23_aio'
+        self.hcptarget = hcpsdk.aio.AsyncTarget(it.P_NS_GOOD, it.P_AUTH,
+                                                it.P_PORT,
+                                                dnscache=it.P_DNSCACHE,
+                                                maxconnections=8)
+
+    def test_1_10_put_get_delete(self):
+        """
+        Ingest a file, read it back and delete it
+        """
+        T_BUF = b'0123456789ABCDEF' * 64
+
+        async def run():
+            async with self.hcptarget.connection() as con:
+                r = await con.PUT(self.T_HCPFILE, T_BUF)
+                self.assertEqual(r.status, 201)
+                r = await con.HEAD(self.T_HCPFILE)
+                self.assertEqual(r.status, 200)
+                r = await con.GET(self.T_HCPFILE)
+                self.assertEqual(r.status, 200)
+                self.assertEqual(await con.read(), T_BUF)
+                r = await con.DELETE(self.T_HCPFILE)
+                self.assertEqual(r.status, 200)
+            await self.hcptarget.close()
+
+        asyncio.run(run())
+
+    def test_1_20_concurrent(self):
+        """
+        Make sure many concurrent requests share the pooled Connections
+        """
+        async def put(i):
+            async with self.hcptarget.connection() as con:
+                r = await con.PUT('{}_{}'.format(self.T_HCPFILE, i), b'x' * 1024)
+                self.assertEqual(r.status, 201)
+                r = await con.DELETE('{}_{}'.format(self.T_HCPFILE, i))
+                self.assertEqual(r.status, 200)
+
+        async def run():
+            await asyncio.gather(*[put(i) for i in range(64)])
+            await self.hcptarget.close()
+
+        asyncio.run(run())
+
+
+
+class TestHcpsdk_23_2_AioOffline(unittest.TestCase):
+    '''
+    Make sure hcpsdk.aio handles bodies and headers like hcpsdk.Connection
+    (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_23_aio_offline'
+        self.em = Emulator(seed=0).start()
+        self.auth = hcpsdk.NativeAuthorization('n', 'n01')
+
+    def tearDown(self):
+        self.em.stop()
+
+    def test_2_10_bytesio(self):
+        """
+        Make sure in-memory streams can be sent as body
+        """
+        T_BUF = b'0123456789ABCDEF' * 64
+        hcptarget = hcpsdk.aio.AsyncTarget('localhost', self.auth,
+                                           port=self.em.port, dnscache=True)
+
+        async def run():
+            async with hcptarget.connection() as con:
+                body = io.BytesIO(T_BUF)
+                body.seek(16)
+                r = await con.PUT(self.T_HCPFILE, body)
+                self.assertEqual(r.status, 201)
+                await con.read()
+                r = await con.GET(self.T_HCPFILE)
+                self.assertEqual(r.status, 200)
+                self.assertEqual(await con.read(), T_BUF[16:])
+            await hcptarget.close()
+
+        asyncio.run(run())
+
+    def test_2_20_header_precedence(self):
+        """
+        Make sure the caller's headers don't override the Target's
+        """
+        heads = []
+
+        async def handle(reader, writer):
+            heads.append(await reader.readuntil(b'\r\n\r\n'))
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            hcptarget = hcpsdk.aio.AsyncTarget('localhost', self.auth,
+                                               port=port, dnscache=True)
+            async with hcptarget.connection() as con:
+                r = await con.HEAD(self.T_HCPFILE,
+                                   headers={'Host': 'elsewhere',
+                                            'Authorization': 'HCP x:y',
+                                            'X-Test': 'yes'})
+                self.assertEqual(r.status, 200)
+            await hcptarget.close()
+            server.close()
+            await server.wait_closed()
+            return hcptarget.headers
+
+        headers = asyncio.run(run())
+        head = heads[0].decode('iso-8859-1')
+        self.assertIn('\r\nHost: localhost\r\n', head)
+        self.assertIn('\r\nAuthorization: {}\r\n'
+                      .format(headers['Authorization']), head)
+        self.assertIn('\r\nX-Test: yes\r\n', head)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.download import download, DownloadError
+import unittest
+import tempfile
+
+import init_tests as it
+
+
+# @unittest.skip("skip TestHcpsdk_24_1_Download")
+class TestHcpsdk_24_1_Download(unittest.TestCase):
+    '''
+    Make sure objects are downloaded correctly by parallel ranged GETs
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_24_download'
+        cls.T_BUF = os.urandom(5 * 2**20 + 17)
+        cls.hcptarget = hcpsdk.Target(it.P_NS_GOOD, it.P_AUTH, it.P_PORT,
+                                      dnscache=it.P_DNSCACHE)
+        con = hcpsdk.Connection(cls.hcptarget)
+        r = con.PUT(cls.T_HCPFILE, cls.T_BUF)
+        con.close()
+        assert r.status == 201
+
+    @classmethod
+    def tearDownClass(cls):
+        con = hcpsdk.Connection(cls.hcptarget)
+        con.DELETE(cls.T_HCPFILE)
+        con.close()
+
+    def test_1_10_file(self):
+        """
+        Download into a file
+        """
+        with tempfile.TemporaryDirectory() as d:
+            fn = os.path.join(d, 'download')
+            size = download(self.hcptarget, self.T_HCPFILE, fn, parallel=4,
+                            chunksize=2**20)
+            self.assertEqual(size, len(self.T_BUF))
+            with open(fn, 'rb') as f:
+                self.assertEqual(f.read(), self.T_BUF)
+
+    def test_1_20_buffer(self):
+        """
+        Download into a preallocated buffer
+        """
+        buf = bytearray(len(self.T_BUF))
+        download(self.hcptarget, self.T_HCPFILE, buf, parallel=3,
+                 chunksize=3 * 2**20)
+        self.assertEqual(buf, self.T_BUF)
+
+    def test_1_30_buffer_too_small(self):
+        """
+        Make sure a buffer too small is refused
+        """
+        with self.assertRaises(DownloadError):
+            download(self.hcptarget, self.T_HCPFILE, bytearray(10))
+
+    def test_1_40_not_found(self):
+        """
+        Make sure a missing object raises DownloadError
+        """
+        with self.assertRaises(DownloadError):
+            download(self.hcptarget, self.T_HCPFILE + '_missing',
+                     bytearray(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+import time
+
+
+class TestHcpsdk_60_1_Emulator(unittest.TestCase):
+    '''
+    Make sure hcpsdk works against the HCP emulator (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_60_emulator'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.con = hcpsdk.Connection(self.hcptarget, retries=3)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_1_10_access(self):
+        """
+        Make sure we can write/read/head/delete an object
+        """
+        T_BUF = os.urandom(100000)
+        self.assertEqual(self.con.PUT(self.T_HCPFILE, T_BUF).status, 201)
+        self.assertEqual(self.con.PUT(self.T_HCPFILE, T_BUF).status, 409)
+        self.assertEqual(self.con.GET(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.read(), T_BUF)
+        self.con.GET(self.T_HCPFILE, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(self.con.response_status, 206)
+        self.assertEqual(self.con.read(), T_BUF[10:20])
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.getheader('X-HCP-Size'), str(len(T_BUF)))
+        self.assertEqual(self.con.DELETE(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+
+    def test_1_20_proc(self):
+        """
+        Make sure the namespace information interface works
+        """
+        self.con.PUT(self.T_HCPFILE, b'0123456789')
+        info = hcpsdk.namespace.Info(self.hcptarget)
+        self.assertEqual(info.nsstatistics()['objectCount'], 1)
+        self.assertEqual(info.nsstatistics()['usedCapacityBytes'], 10)
+        self.assertIn('n', info.listaccessiblens())
+        self.assertTrue(info.listretentionclasses())
+        self.assertTrue(info.listpermissions()['userPermissions']['read'])
+
+    def test_1_30_resets(self):
+        """
+        Make sure connection resets are retried
+        """
+        self.em.resetrate = 0.3
+        for i in range(20):
+            self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertGreater(self.em.resets, 0)
+
+    def test_1_40_busy(self):
+        """
+        Make sure the emulator answers 503 if asked for
+        """
+        self.em.busyrate = 1.0
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 503)
+        self.assertEqual(self.con.getheader('Retry-After'), '1')
+
+    def test_1_50_latency_throughput(self):
+        """
+        Make sure latency and throughput cap are applied
+        """
+        self.con.PUT(self.T_HCPFILE, b'x' * 2**17)
+        self.em.latency = 0.2
+        self.em.throughput = 2**19
+        s_t = time.time()
+        self.con.GET(self.T_HCPFILE)
+        self.con.read()
+        self.assertGreaterEqual(time.time() - s_t, 0.2 + 0.25)
+
+    def test_1_60_idletimeout(self):
+        """
+        Make sure idle connections get closed
+        """
+        self.em.idletimeout = 0.2
+        con = hcpsdk.Connection(self.hcptarget, retries=1)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        time.sleep(0.5)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        con.close()
+        self.assertEqual(self.em.connections, 2)
+
+    def test_1_70_mapi(self):
+        """
+        Make sure the MAPI endpoints respond
+        """
+        self.con.GET('/mapi/tenants', headers={'Accept': 'application/json'})
+        self.assertEqual(self.con.response_status, 200)
+        self.assertIn(b'"m"', self.con.read())
+        self.con.GET('/mapi/services/replication/links')
+        self.assertIn(b'<name>link1</name>', self.con.read())
+        self.con.POST('/mapi/logs/prepare', body=b'<logPrepare/>')
+        self.con.read()
+        self.con.POST('/mapi/logs/download', body=b'<logDownload/>')
+        self.assertEqual(self.con.response_status, 200)
+        self.assertEqual(sum(len(c) for c in self.con.iter_chunks()),
+                         self.em.logsize)
+
+
+if __name__ == '__main__':
+    unittest.main()
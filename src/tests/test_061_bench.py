@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk import bench
+from hcpsdk.emulator import Emulator
+import unittest
+import asyncio
+import io
+from contextlib import redirect_stdout
+import json
+
+
+class TestHcpsdk_61_1_Bench(unittest.TestCase):
+    '''
+    Make sure the benchmark runs against the HCP emulator (no HCP needed)
+    '''
+    def setUp(self):
+        self.em = Emulator(seed=0).start()
+        self.auth = hcpsdk.NativeAuthorization('n', 'n01')
+
+    def tearDown(self):
+        self.em.stop()
+
+    def test_1_10_percentile(self):
+        """
+        Make sure percentiles are calculated by nearest rank
+        """
+        values = list(range(1, 1001))
+        self.assertEqual(bench.percentile(values, 50), 500)
+        self.assertEqual(bench.percentile(values, 99.9), 999)
+        self.assertEqual(bench.percentile(values, 100), 1000)
+        self.assertEqual(bench.percentile([], 50), 0.0)
+
+    def test_1_20_parse(self):
+        """
+        Make sure mixes and sizes are parsed
+        """
+        self.assertEqual(dict(bench.parsemix('put:1,GET:4,head')),
+                         {'PUT': 1.0, 'GET': 4.0, 'HEAD': 1.0})
+        self.assertEqual(bench.parsesize('4k'), 4096)
+        self.assertEqual(bench.parsesize('1.5MB'), 1572864)
+        self.assertEqual(bench.parsesize('100'), 100)
+        with self.assertRaises(bench.BenchError):
+            bench.parsemix('COPY:1')
+
+    def test_1_30_threads(self):
+        """
+        Make sure a threaded run issues the requested number of requests
+        and cleans up after itself
+        """
+        t = hcpsdk.Target('localhost', self.auth, port=self.em.port,
+                          dnscache=True)
+        r = bench.run(t, sizes=[1000, 20000], concurrency=4, requests=200,
+                      objects=20, seed=0).summary()
+        self.assertEqual(r['requests'], 200)
+        self.assertEqual(r['errors'], 0)
+        self.assertEqual(r['connects']['count'], 4)
+        self.assertGreater(r['ops']['GET']['bytes'], 0)
+        self.assertLessEqual(r['ops']['GET']['p50'],
+                             r['ops']['GET']['p99.9'])
+        self.assertEqual(len(self.em.store), 0)
+
+    def test_1_40_async(self):
+        """
+        Make sure an async run works the same way
+        """
+        from hcpsdk.aio import AsyncTarget
+        t = AsyncTarget('localhost', self.auth, port=self.em.port,
+                        dnscache=True, maxconnections=4)
+        r = asyncio.run(bench.run_async(t, concurrency=4, requests=200,
+                                        objects=20, seed=0)).summary()
+        self.assertEqual(r['requests'], 200)
+        self.assertEqual(r['errors'], 0)
+        self.assertEqual(r['mode'], 'async')
+        self.assertEqual(len(self.em.store), 0)
+
+    def test_1_50_cli(self):
+        """
+        Make sure the command runs against a local emulator
+        """
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(bench.main(['--emulator', '-d', '0.5', '-c', '2',
+                                         '--mix', 'PUT:1,GET:1', '--json']),
+                             0)
+        r = json.loads(out.getvalue())
+        self.assertEqual(set(r['ops']), {'PUT', 'GET'})
+        self.assertGreater(r['req/s'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
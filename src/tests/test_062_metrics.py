@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk import metrics
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_62_1_Histogram(unittest.TestCase):
+
+    def test_1_10_percentile(self):
+        """
+        Make sure percentiles are accurate within a bucket's width
+        """
+        h = metrics.Histogram()
+        for i in range(1, 1001):
+            h.record(i / 1000)
+        self.assertEqual(h.count, 1000)
+        self.assertAlmostEqual(h.mean, 0.5005)
+        for p in (50, 90, 99):
+            self.assertGreaterEqual(h.percentile(p), p / 100)
+            self.assertLess(h.percentile(p), p / 100 * 1.19)
+        self.assertEqual(h.percentile(100), 1.0)
+        self.assertEqual(metrics.Histogram().percentile(50), 0.0)
+
+    def test_1_20_merge(self):
+        """
+        Make sure merged Histograms equal a single one holding all values
+        """
+        h1, h2, h = metrics.Histogram(), metrics.Histogram(), \
+            metrics.Histogram()
+        for i in range(1, 200):
+            (h1 if i % 3 else h2).record(i / 7000)
+            h.record(i / 7000)
+        h1.merge(h2)
+        self.assertEqual(h1.counts, h.counts)
+        self.assertEqual((h1.min, h1.max), (h.min, h.max))
+        self.assertEqual(h1.percentile(99), h.percentile(99))
+
+
+class TestHcpsdk_62_2_Metrics(unittest.TestCase):
+    '''
+    Make sure Connections update their Target's metrics (no HCP needed)
+    '''
+    def setUp(self):
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.con = hcpsdk.Connection(self.hcptarget, retries=3)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_2_10_record(self):
+        """
+        Make sure Requests are recorded by method and status class
+        """
+        for i in range(10):
+            self.con.PUT('/rest/hcpsdk/metrics{}'.format(i), b'x' * 1000)
+            self.con.GET('/rest/hcpsdk/metrics{}'.format(i))
+            self.con.read()
+        self.con.HEAD('/rest/hcpsdk/missing')
+        m = self.hcptarget.metrics
+        self.assertEqual(m.histogram(method='PUT').count, 10)
+        self.assertEqual(m.histogram(status='2xx').count, 20)
+        self.assertEqual(m.histogram(method='HEAD', status='4xx',
+                                     address='127.0.0.1').count, 1)
+        c = m.counters
+        self.assertEqual((c['bytes_sent'], c['bytes_received']),
+                         (10000, 10000))
+        self.assertEqual((c['connects'], c['reconnects']), (1, 0))
+
+    def test_2_20_errors(self):
+        """
+        Make sure retries, reconnects and errors are counted
+        """
+        self.em.resetrate = 1.0
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            self.con.HEAD('/rest/hcpsdk/missing')
+        c = self.hcptarget.metrics.counters
+        self.assertEqual(c['errors'], 1)
+        self.assertEqual(c['retries'], 3)
+        self.assertEqual(c['reconnects'], 3)
+
+    def test_2_30_snapshot(self):
+        """
+        Make sure a snapshot can reset the metrics, and gets exposed for
+        Prometheus
+        """
+        self.con.HEAD('/rest/hcpsdk/missing')
+        s = self.hcptarget.metrics.snapshot(reset=True)
+        self.assertEqual(self.hcptarget.metrics.histogram().count, 0)
+        self.assertEqual(s.histogram().count, 1)
+        text = metrics.prometheus(s, self.hcptarget.metrics)
+        self.assertIn('hcpsdk_request_duration_seconds_count{fqdn="localhost",'
+                      'method="HEAD",status="4xx",address="127.0.0.1"} 1\n',
+                      text)
+        self.assertIn('hcpsdk_connects_total{fqdn="localhost"} 1\n', text)
+        self.assertIn('hcpsdk_connects_total{fqdn="localhost"} 0\n', text)
+
+    def test_2_40_disabled(self):
+        """
+        Make sure metrics can be disabled
+        """
+        t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=self.em.port, dnscache=True, metrics=False)
+        self.assertIsNone(t.metrics)
+        con = hcpsdk.Connection(t)
+        self.assertEqual(con.HEAD('/rest/hcpsdk/missing').status, 404)
+        con.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk import hooks
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_63_1_Hooks(unittest.TestCase):
+    '''
+    Make sure the lifecycle hooks fire (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_63_hooks'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.events = []
+        for name in hooks.EVENTS:
+            self.hcptarget.hooks.register(name, self.events.append)
+        self.con = hcpsdk.Connection(self.hcptarget, retries=2)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_1_10_success(self):
+        """
+        Make sure a plain Request fires on_connect, on_request and
+        on_response
+        """
+        self.con.PUT(self.T_HCPFILE, b'x' * 1000)
+        self.con.HEAD(self.T_HCPFILE)
+        self.assertEqual([e.name for e in self.events],
+                         ['on_connect', 'on_request', 'on_response',
+                          'on_request', 'on_response'])
+        e = self.events[2]
+        self.assertEqual((e.method, e.url, e.address, e.status, e.attempt),
+                         ('PUT', self.T_HCPFILE, '127.0.0.1', 201, 0))
+        self.assertGreater(e.elapsed, self.events[1].elapsed)
+        self.assertIs(e.connection, self.con)
+
+    def test_1_20_retry(self):
+        """
+        Make sure retries and a final error are classified
+        """
+        self.em.resetrate = 1.0
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            self.con.HEAD(self.T_HCPFILE)
+        retries = [e for e in self.events if e.name == 'on_retry']
+        self.assertEqual([e.attempt for e in retries], [1, 2])
+        self.assertEqual({e.kind for e in retries}, {'reset'})
+        self.assertEqual(self.events[-1].name, 'on_error')
+        self.assertEqual(self.events[-1].kind, 'reset')
+
+    def test_1_30_connection_hooks(self):
+        """
+        Make sure Connection hooks fire after Target hooks, and failing
+        hooks don't break the Request
+        """
+        def fail(event):
+            raise RuntimeError('hook failed')
+        self.con.hooks.register('on_response', fail)
+        self.con.hooks.register('on_response', self.events.append)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual([e.name for e in self.events][-2:],
+                         ['on_response', 'on_response'])
+        self.con.hooks.unregister('on_response', fail)
+        with self.assertRaises(ValueError):
+            self.con.hooks.register('on_whatever', fail)
+
+    def test_1_40_classify(self):
+        """
+        Make sure errors are classified
+        """
+        self.assertEqual(hooks.classify(ConnectionRefusedError()), 'refused')
+        self.assertEqual(hooks.classify(TimeoutError()), 'timeout')
+        self.assertEqual(hooks.classify(hcpsdk.ips.IpsError('x')), 'dns')
+        self.assertEqual(hooks.classify(hcpsdk.HcpsdkTimeoutError('x')),
+                         'timeout')
+        self.assertEqual(hooks.classify(ValueError()), 'other')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import hcpsdk
+from hcpsdk.retry import RetryPolicy, parseretryafter
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_64_1_RetryPolicy(unittest.TestCase):
+    '''
+    Make sure RetryPolicy calculates delays and keeps the budget
+    '''
+    def test_1_10_backoff(self):
+        """
+        Make sure the backoff grows exponentially, up to maxbackoff
+        """
+        p = RetryPolicy(backoff=0.1, maxbackoff=0.3, jitter=False)
+        self.assertEqual([p.delay(i) for i in range(1, 5)],
+                         [0.1, 0.2, 0.3, 0.3])
+        p = RetryPolicy(backoff=0.1, maxbackoff=0.3, seed=0)
+        for i in range(1, 5):
+            d = p.delay(i)
+            self.assertTrue(0.0 <= d <= min(0.3, 0.1 * 2 ** (i - 1)))
+        self.assertEqual(RetryPolicy(backoff=0).delay(3), 0.0)
+
+    def test_1_20_retryafter(self):
+        """
+        Make sure Retry-After is honored, up to maxretryafter
+        """
+        p = RetryPolicy(backoff=0.1, jitter=False, maxretryafter=5)
+        self.assertEqual(p.delay(1, '2'), 2.0)
+        self.assertEqual(p.delay(1, '3600'), 5)
+        self.assertEqual(p.delay(1, 'whatever'), 0.1)
+        self.assertEqual(parseretryafter('Wed, 21 Oct 2015 07:28:00 GMT'),
+                         0.0)
+        self.assertIsNone(parseretryafter('soon'))
+
+    def test_1_30_budget(self):
+        """
+        Make sure retries are denied if the budget is exhausted, and
+        Requests refill it
+        """
+        p = RetryPolicy(budget=0.5, burst=2)
+        self.assertTrue(p.retry(TimeoutError()))
+        self.assertTrue(p.retry(TimeoutError()))
+        self.assertFalse(p.retry(TimeoutError()))
+        self.assertEqual(p.denied, 1)
+        p._request()
+        p._request()
+        self.assertTrue(p.retry(TimeoutError()))
+        self.assertTrue(RetryPolicy(budget=None, burst=0)
+                        .retry(TimeoutError()))
+
+    def test_1_40_retryable(self):
+        """
+        Make sure only the given exceptions and statuses are retried
+        """
+        p = RetryPolicy(exceptions=(TimeoutError,))
+        self.assertTrue(p.retryable(TimeoutError()))
+        self.assertFalse(p.retryable(ConnectionAbortedError()))
+        self.assertFalse(p.retryable(status=503))
+        self.assertTrue(RetryPolicy(statuses=(503,)).retryable(status=503))
+
+
+class TestHcpsdk_64_2_Retry(unittest.TestCase):
+    '''
+    Make sure Connection retries the way the policy says (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_64_retry'
+        self.em = Emulator(seed=0).start()
+        self.events = []
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def _connection(self, policy, retries=2):
+        t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=self.em.port, dnscache=True,
+                          retrypolicy=policy)
+        t.hooks.register('on_retry', self.events.append)
+        self.target = t
+        self.con = hcpsdk.Connection(t, retries=retries)
+        return self.con
+
+    def test_2_10_backoff(self):
+        """
+        Make sure failed attempts are retried after the backoff
+        """
+        con = self._connection(RetryPolicy(backoff=0.1, jitter=False))
+        self.em.resetrate = 1.0
+        s_t = time.perf_counter()
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            con.HEAD(self.T_HCPFILE)
+        self.assertGreaterEqual(time.perf_counter() - s_t, 0.3)
+        self.assertEqual([e.attempt for e in self.events], [1, 2])
+
+    def test_2_20_budget(self):
+        """
+        Make sure retries stop once the budget is exhausted
+        """
+        con = self._connection(RetryPolicy(backoff=0, budget=0.1, burst=1))
+        self.em.resetrate = 1.0
+        for i in range(3):
+            with self.assertRaises(hcpsdk.HcpsdkError):
+                con.HEAD(self.T_HCPFILE)
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.target.retrypolicy.denied, 3)
+
+    def test_2_30_not_retryable(self):
+        """
+        Make sure errors the policy doesn't list aren't retried
+        """
+        con = self._connection(RetryPolicy(exceptions=(TimeoutError,)))
+        self.em.resetrate = 1.0
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            con.HEAD(self.T_HCPFILE)
+        self.assertEqual(self.events, [])
+
+    def test_2_40_status(self):
+        """
+        Make sure 503 is retried after Retry-After (if asked for), and
+        returned if it persists
+        """
+        con = self._connection(RetryPolicy(statuses=(503,),
+                                           maxretryafter=0.1))
+        self.em.busyrate = 1.0
+        s_t = time.perf_counter()
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 503)
+        self.assertGreaterEqual(time.perf_counter() - s_t, 0.2)
+        self.assertEqual([(e.attempt, e.status) for e in self.events],
+                         [(1, 503), (2, 503)])
+
+        def cured(event):
+            self.em.busyrate = 0.0
+        self.events.clear()
+        self.target.hooks.register('on_retry', cured)
+        self.em.busyrate = 1.0
+        self.assertEqual(con.PUT(self.T_HCPFILE, b'x' * 1000).status, 201)
+        self.assertEqual(len(self.events), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
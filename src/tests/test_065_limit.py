@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+from copy import copy
+import hcpsdk
+from hcpsdk.limit import AIMD, Gradient
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_65_1_Limiter(unittest.TestCase):
+    '''
+    Make sure the limiters adapt their limit
+    '''
+    def test_1_10_aimd(self):
+        """
+        Make sure AIMD hands out up to limit permits, backs off once per
+        round trip on overload and grows while Requests succeed
+        """
+        l = AIMD(initial=4, backoff=0.5)
+        permits = [l.acquire() for i in range(4)]
+        self.assertEqual(l.inflight, 4)
+        self.assertIsNone(l.acquire(timeout=0.05))
+        l.release(permits.pop(), overload=True)
+        self.assertEqual(l.limit, 2)
+        l.release(permits.pop(), overload=True)  # same round trip
+        self.assertEqual(l.limit, 2)
+        self.assertIsNone(l.acquire(timeout=0.05))
+        for i in range(10):
+            l.release(permits.pop(0), rtt=0.01)
+            permits.append(l.acquire())
+        self.assertGreater(l.limit, 2)
+        self.assertEqual(l.inflight, 2)
+
+    def test_1_20_aimd_latency(self):
+        """
+        Make sure AIMD treats latency above its threshold as overload
+        """
+        l = AIMD(initial=10, latency=0.1)
+        l.release(l.acquire(), rtt=0.5)
+        self.assertEqual(l.limit, 9)
+        l = AIMD(initial=1, minlimit=1)
+        l.release(l.acquire(), overload=True)
+        self.assertEqual(l.limit, 1)
+
+    def test_1_30_gradient(self):
+        """
+        Make sure Gradient grows while latency is flat, and shrinks when
+        latency grows
+        """
+        l = Gradient(initial=10)
+        for i in range(20):
+            permits = [l.acquire() for j in range(l.limit)]
+            for p in permits:
+                l.release(p, rtt=0.01)
+        grown = l.limit
+        self.assertGreater(grown, 10)
+        for i in range(20):
+            l.release(l.acquire(), rtt=0.1)
+        self.assertLess(l.limit, grown)
+
+    def test_1_40_copy(self):
+        """
+        Make sure a copy has the same settings, but a limit and permits of
+        its own
+        """
+        l = AIMD(initial=2, maxlimit=10, backoff=0.5, latency=0.1)
+        permit = l.acquire()
+        l.release(l.acquire(), overload=True)
+        c = copy(l)
+        self.assertIsInstance(c, AIMD)
+        self.assertEqual((c.limit, c.inflight), (2, 0))
+        self.assertEqual((c.maxlimit, c.backoff, c.latency), (10, 0.5, 0.1))
+        self.assertIsNotNone(c.acquire(timeout=0.05))
+        self.assertIsNotNone(c.acquire(timeout=0.05))
+        self.assertEqual((l.limit, l.inflight), (1, 1))
+        l.release(permit)
+        c = copy(Gradient(initial=5, tolerance=2.0, smoothing=0.5, window=10))
+        self.assertIsInstance(c, Gradient)
+        self.assertEqual((c.limit, c.tolerance, c.smoothing, c.window),
+                         (5, 2.0, 0.5, 10))
+
+
+class TestHcpsdk_65_2_Limit(unittest.TestCase):
+    '''
+    Make sure Connections are limited by the Target's limiter (no HCP
+    needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_65_limit'
+        self.em = Emulator(seed=0).start()
+        self.limiter = AIMD(initial=2)
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True,
+                                       limiter=self.limiter)
+        self.cons = [hcpsdk.Connection(self.hcptarget, timeout=0.2)
+                     for i in range(3)]
+        self.cons[0].PUT(self.T_HCPFILE, b'x' * 1000)
+
+    def tearDown(self):
+        for con in self.cons:
+            con.close()
+        self.em.stop()
+
+    def test_2_10_limit(self):
+        """
+        Make sure a Request waits for a permit until a Response has been
+        read completely
+        """
+        self.cons[0].GET(self.T_HCPFILE)
+        self.cons[1].GET(self.T_HCPFILE)
+        self.assertEqual(self.limiter.inflight, 2)
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError):
+            self.cons[2].HEAD(self.T_HCPFILE)
+        self.cons[0].read()
+        self.assertEqual(self.cons[2].HEAD(self.T_HCPFILE).status, 200)
+        self.cons[1].close()
+        self.assertEqual(self.limiter.inflight, 0)
+
+    def test_2_20_overload(self):
+        """
+        Make sure 503 reduces the limit
+        """
+        self.limiter.backoff = 0.5
+        self.em.busyrate = 1.0
+        self.assertEqual(self.cons[0].HEAD(self.T_HCPFILE).status, 503)
+        self.assertEqual(self.limiter.limit, 1)
+        self.assertEqual(self.limiter.inflight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
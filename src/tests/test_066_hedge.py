@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import ssl
+import shutil
+import tempfile
+import subprocess
+import hcpsdk
+from hcpsdk.hedge import HedgePolicy
+from hcpsdk.emulator import Emulator
+import unittest
+from unittest import mock
+
+
+class TestHcpsdk_66_1_HedgePolicy(unittest.TestCase):
+    '''
+    Make sure HedgePolicy derives the delay and keeps the budget
+    '''
+    def test_1_10_delay(self):
+        """
+        Make sure the delay is derived from the percentile of a window
+        """
+        h = HedgePolicy(percentile=90, window=10, mindelay=0.001)
+        self.assertIsNone(h.delay)
+        for i in range(1, 11):
+            h.record(i / 100)
+        self.assertAlmostEqual(h.delay, 0.09, delta=0.02)
+        self.assertEqual(HedgePolicy(delay=0.2).delay, 0.2)
+
+    def test_1_20_budget(self):
+        """
+        Make sure hedges are limited by the budget
+        """
+        h = HedgePolicy(budget=0.5, burst=1)
+        self.assertTrue(h._hedge())
+        self.assertFalse(h._hedge())
+        h._request()
+        h._request()
+        self.assertTrue(h._hedge())
+        self.assertEqual(h.hedged, 2)
+
+
+class TestHcpsdk_66_2_Hedge(unittest.TestCase):
+    '''
+    Make sure slow Requests are hedged to another IP address (no HCP
+    needed) - a slow emulator on 127.0.0.1 and a fast one on 127.0.0.2
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_66_hedge'
+        self.slow = Emulator(latency=0.5, seed=0).start()
+        try:
+            self.fast = Emulator(address='127.0.0.2',
+                                 port=self.slow.port).start()
+        except hcpsdk.emulator.EmulatorError as e:
+            self.slow.stop()
+            self.skipTest(str(e))
+        self.hedging = HedgePolicy(delay=0.05)
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.slow.port, dnscache=True,
+                                       hedging=self.hedging)
+        # make the Target see both emulators as HCP nodes
+        self.pin(self.hcptarget.ipaddrqry, ['127.0.0.1', '127.0.0.2'])
+        self.con = hcpsdk.Connection(self.hcptarget)
+        # only the slow one has the object
+        self.con.connect(address='127.0.0.1')
+        self.con.PUT(self.T_HCPFILE, b'x' * 1000)
+
+    def pin(self, circle, addresses):
+        """
+        Make *circle* use *addresses*, and keep the DNS cache's background
+        refresh from overwriting them
+        """
+        circle._addresses = list(addresses)
+        circle._stats = {a: hcpsdk.ips.AddressStats() for a in addresses}
+        patcher = mock.patch.object(circle, '_update')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.con.close()
+        self.slow.stop()
+        self.fast.stop()
+
+    def test_2_10_hedge(self):
+        """
+        Make sure the hedged Request wins if the first IP address is slow
+        """
+        s_t = time.perf_counter()
+        r = self.con.HEAD(self.T_HCPFILE)
+        self.assertLess(time.perf_counter() - s_t, 0.4)
+        self.assertEqual(r.status, 404)  # the fast one doesn't have it
+        self.assertEqual(self.con.address, '127.0.0.2')
+        self.assertEqual((self.hedging.hedged, self.hedging.won), (1, 1))
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+
+    def test_2_20_no_hedge(self):
+        """
+        Make sure PUTs aren't hedged, and nothing is hedged without budget
+        """
+        self.assertEqual(self.con.PUT(self.T_HCPFILE + '_put', b'x').status,
+                         201)
+        self.assertEqual(self.hedging.hedged, 0)
+        while self.hedging._hedge():
+            pass
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.address, '127.0.0.1')
+
+    def test_2_30_bookkeeping(self):
+        """
+        Make sure the hedged Request is timed and reported in flight, and
+        that hedging doesn't hand out IP addresses
+        """
+        circle = self.hcptarget.ipaddrqry
+        with mock.patch.object(circle, '_addr',
+                               side_effect=AssertionError('handed out')), \
+                mock.patch.object(circle, 'started',
+                                  wraps=circle.started) as started:
+            s_t = time.perf_counter()
+            r = self.con.HEAD(self.T_HCPFILE)
+            elapsed = time.perf_counter() - s_t
+        self.assertEqual(r.status, 404)
+        self.assertEqual([c[0][0] for c in started.call_args_list],
+                         ['127.0.0.1', '127.0.0.2'])
+        t = self.con.timings
+        self.assertGreater(t.connect, 0.0)
+        self.assertLess(t.total, elapsed)
+        self.assertGreater(t.total, 0.05)
+        stats = circle.stats
+        self.assertEqual(stats['127.0.0.1'].outstanding, 0)
+        self.assertEqual(stats['127.0.0.2'].outstanding, 0)
+        self.assertEqual(stats['127.0.0.2'].requests, 1)
+
+    def test_2_40_open_circuit(self):
+        """
+        Make sure an IP address with an open circuit isn't used for a hedge
+        """
+        stats = self.hcptarget.ipaddrqry._stats['127.0.0.2']
+        stats.opened = time.monotonic() - 3600  # due to be probed
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.address, '127.0.0.1')
+        self.assertEqual(self.hedging.hedged, 0)
+        self.assertFalse(stats.probing)
+
+    def test_2_50_wait_fails(self):
+        """
+        Make sure the Request goes on with the first connection if waiting
+        for the first byte fails
+        """
+        with mock.patch('hcpsdk.httpclient._arrived',
+                        side_effect=ValueError('Invalid file descriptor')):
+            self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.con.address, '127.0.0.1')
+        self.assertEqual(self.hedging.hedged, 0)
+
+
+class TestHcpsdk_66_3_HedgeTls(unittest.TestCase):
+    '''
+    Make sure hedging works with https, where TLS 1.3 session tickets make a
+    socket readable before the Response arrives (no HCP needed, but
+    *openssl* to create a self-signed certificate) - the emulator with the
+    object on 127.0.0.1, another one on 127.0.0.2
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.cert = os.path.join(cls.tmpdir, 'cert.pem')
+        cls.key = os.path.join(cls.tmpdir, 'key.pem')
+        try:
+            subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                            '-nodes', '-subj', '/CN=localhost', '-days', '1',
+                            '-keyout', cls.key, '-out', cls.cert],
+                           check=True, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            cls.cert = None
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        if not self.cert:
+            self.skipTest('unable to create a certificate with openssl')
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_66_hedge_tls'
+        self.servercontext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.servercontext.load_cert_chain(self.cert, self.key)
+        self.ems = []
+
+    def tearDown(self):
+        self.con.close()
+        hcpsdk.SSL_PORTS.remove(self.port)
+        for em in self.ems:
+            em.stop()
+
+    def start(self, latency, hedgelatency):
+        """
+        Start the emulators and open a Connection to the first one, which
+        gets the object
+        """
+        em = Emulator(sslcontext=self.servercontext, seed=0).start()
+        self.ems.append(em)
+        self.port = em.port
+        hcpsdk.SSL_PORTS.append(self.port)
+        try:
+            self.ems.append(Emulator(address='127.0.0.2', port=em.port,
+                                     latency=hedgelatency,
+                                     sslcontext=self.servercontext).start())
+        except hcpsdk.emulator.EmulatorError as e:
+            self.con = mock.Mock()
+            self.skipTest(str(e))
+        clientcontext = ssl.create_default_context()
+        clientcontext.check_hostname = False
+        clientcontext.verify_mode = ssl.CERT_NONE
+        self.hedging = HedgePolicy(delay=0.05)
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=em.port, dnscache=True,
+                                       sslcontext=clientcontext,
+                                       hedging=self.hedging)
+        self.pin(self.hcptarget.ipaddrqry, ['127.0.0.1', '127.0.0.2'])
+        # a connect timeout that would fail slow Requests if used as timeout
+        self.con = hcpsdk.Connection(self.hcptarget, connect_timeout=0.2)
+        self.con.connect(address='127.0.0.1')
+        self.con.PUT(self.T_HCPFILE, b'x' * 1000)
+        em.latency = latency
+
+    def pin(self, circle, addresses):
+        """
+        Make *circle* use *addresses*, and keep the DNS cache's background
+        refresh from overwriting them
+        """
+        circle._addresses = list(addresses)
+        circle._stats = {a: hcpsdk.ips.AddressStats() for a in addresses}
+        patcher = mock.patch.object(circle, '_update')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_3_10_ticket(self):
+        """
+        Make sure a session ticket doesn't let a slower hedge win
+        """
+        self.start(0.5, 2.0)
+        # a new TLS session, with a ticket on its way
+        self.con.connect(address='127.0.0.1')
+        s_t = time.perf_counter()
+        r = self.con.HEAD(self.T_HCPFILE)
+        self.assertLess(time.perf_counter() - s_t, 1.5)
+        self.assertEqual(r.status, 200)
+        self.assertEqual(self.con.address, '127.0.0.1')
+        self.assertEqual((self.hedging.hedged, self.hedging.won), (1, 0))
+
+    def test_3_20_hedge(self):
+        """
+        Make sure the hedged Request wins if the first IP address is slow,
+        and that the Response isn't missing the byte read ahead
+        """
+        self.start(0.5, 0.0)
+        s_t = time.perf_counter()
+        r = self.con.GET(self.T_HCPFILE)
+        self.assertLess(time.perf_counter() - s_t, 0.4)
+        self.assertEqual(r.status, 404)  # the other one doesn't have it
+        r.read()
+        self.assertEqual(self.con.address, '127.0.0.2')
+        self.assertEqual((self.hedging.hedged, self.hedging.won), (1, 1))
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+
+    def test_3_30_in_time(self):
+        """
+        Make sure a Response arriving in time isn't hedged, and isn't missing
+        the byte read ahead
+        """
+        self.start(0.0, 0.0)
+        self.con.connect(address='127.0.0.1')
+        r = self.con.GET(self.T_HCPFILE)
+        self.assertEqual(r.status, 200)
+        self.assertEqual(r.read(), b'x' * 1000)
+        self.assertEqual(self.hedging.hedged, 0)
+
+    def test_3_40_winner(self):
+        """
+        Make sure the winning hedge gets the Connection's timeout and has
+        its TLS session cached
+        """
+        self.start(0.5, 0.0)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.con.address, '127.0.0.2')
+        self.assertIsNotNone(self.hcptarget._tlssession('127.0.0.2'))
+        while self.hedging._hedge():  # no more hedges
+            pass
+        self.ems[1].latency = 0.3  # longer than the connect timeout
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.con.address, '127.0.0.2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+from unittest import mock
+
+
+class TestHcpsdk_67_1_Replica(unittest.TestCase):
+    '''
+    Make sure Requests are sent to the replica as allowed by the replica
+    strategy (no HCP needed) - the primary emulator on 127.0.0.1, the
+    replica on 127.0.0.2
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_67_replica'
+        self.primary = Emulator(seed=0).start()
+        try:
+            self.replica = Emulator(address='127.0.0.2',
+                                    port=self.primary.port).start()
+        except hcpsdk.emulator.EmulatorError as e:
+            self.primary.stop()
+            self.skipTest(str(e))
+        self.cons = []
+
+    def tearDown(self):
+        for con in self.cons:
+            con.close()
+        self.primary.stop()
+        self.replica.stop()
+
+    def pin(self, circle, addresses):
+        """
+        Make *circle* use *addresses*, and keep the DNS cache's background
+        refresh from overwriting them
+        """
+        circle._addresses = list(addresses)
+        circle._stats = {a: hcpsdk.ips.AddressStats() for a in addresses}
+        patcher = mock.patch.object(circle, '_update')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def mktarget(self, strategy):
+        t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=self.primary.port, dnscache=True,
+                          replica_fqdn='localhost', replica_strategy=strategy,
+                          breaker=hcpsdk.ips.CircuitBreaker(maxfailures=1))
+        # point each side to its emulator
+        for side, address in [(t, '127.0.0.1'), (t.replica, '127.0.0.2')]:
+            self.pin(side.ipaddrqry, [address])
+        return t
+
+    def mkcon(self, target):
+        con = hcpsdk.Connection(target)
+        self.cons.append(con)
+        return con
+
+    def test_1_10_init(self):
+        """
+        Make sure the replica is a Target of its own
+        """
+        t = self.mktarget(hcpsdk.RS_READ_ALLOWED)
+        self.assertIsInstance(t.replica, hcpsdk.Target)
+        self.assertIsNot(t.replica.ipaddrqry, t.ipaddrqry)
+        self.assertIsNot(t.replica.metrics, t.metrics)
+        self.assertIsNot(t.replica.ipaddrqry.breaker, t.ipaddrqry.breaker)
+        self.assertEqual(t.replica.ipaddrqry.breaker.maxfailures, 1)
+        self.assertIn('replica_fqdn=localhost,', repr(t))
+        self.assertIs(t.replica.retrypolicy, t.retrypolicy)
+        with self.assertRaises(hcpsdk.HcpsdkReplicaInitError):
+            hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=self.primary.port, dnscache=True,
+                          replica_fqdn='this_wont_work.at-all')
+
+    def test_1_15_shared_settings(self):
+        """
+        Make sure the replica gets a limiter of its own and shares the
+        Target's hedging
+        """
+        limiter = hcpsdk.limit.AIMD(initial=1, maxlimit=10)
+        hedging = hcpsdk.hedge.HedgePolicy(delay=1.0)
+        t = hcpsdk.Target('localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+                          port=self.primary.port, dnscache=True,
+                          replica_fqdn='localhost',
+                          replica_strategy=hcpsdk.RS_READ_ALLOWED,
+                          limiter=limiter, hedging=hedging)
+        self.assertIsNot(t.replica.limiter, limiter)
+        self.assertIsInstance(t.replica.limiter, hcpsdk.limit.AIMD)
+        self.assertIs(t.replica.hedging, hedging)
+        self.pin(t.replica.ipaddrqry, ['127.0.0.2'])
+        con = self.mkcon(t.replica)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual((t.replica.limiter.inflight, t.replica.limiter.limit),
+                         (0, 2))
+        self.assertEqual((limiter.inflight, limiter.limit), (0, 1))
+
+    def test_1_20_read_allowed(self):
+        """
+        Make sure reads are spread over both sides, but writes go to the
+        primary, only
+        """
+        t = self.mktarget(hcpsdk.RS_READ_ALLOWED)
+        cons = [self.mkcon(t) for i in range(4)]
+        for con in cons:
+            self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual((self.primary.requests, self.replica.requests),
+                         (2, 2))
+        self.assertEqual(t.metrics.counters['connects'], 2)
+        self.assertEqual(t.replica.metrics.counters['connects'], 2)
+        for con in cons:
+            self.assertIn(con.PUT(self.T_HCPFILE, b'x').status, (201, 409))
+            self.assertIs(con.side, t)
+        self.assertEqual(self.replica.requests, 2)
+
+    def test_1_30_read_on_failover(self):
+        """
+        Make sure reads fail over to the replica if the primary is down,
+        while writes don't
+        """
+        t = self.mktarget(hcpsdk.RS_READ_ON_FAILOVER)
+        con = self.mkcon(t)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIs(con.side, t)
+        self.primary.stop()
+        con.close()
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIs(con.side, t.replica)
+        self.assertFalse(t.ipaddrqry.available())
+        # the next Connection goes to the replica right away
+        self.assertEqual(self.mkcon(t).HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.replica.requests, 2)
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            con.PUT(self.T_HCPFILE, b'x')
+
+    def test_1_40_write_on_failover(self):
+        """
+        Make sure writes fail over to the replica if the primary is down
+        """
+        t = self.mktarget(hcpsdk.RS_READ_ON_FAILOVER |
+                          hcpsdk.RS_WRITE_ON_FAILOVER)
+        con = self.mkcon(t)
+        self.primary.stop()
+        self.assertEqual(con.PUT(self.T_HCPFILE, b'x').status, 201)
+        self.assertIs(con.side, t.replica)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 200)
+
+    def test_1_50_write_allowed(self):
+        """
+        Make sure writes are spread over both sides on A/A links
+        """
+        t = self.mktarget(hcpsdk.RS_WRITE_ALLOWED)
+        for i in range(4):
+            self.assertEqual(self.mkcon(t).PUT(self.T_HCPFILE + str(i),
+                                               b'x').status, 201)
+        self.assertEqual((self.primary.requests, self.replica.requests),
+                         (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
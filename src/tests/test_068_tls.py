@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import ssl
+import shutil
+import subprocess
+import tempfile
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_68_1_TlsResumption(unittest.TestCase):
+    '''
+    Make sure new Connections resume the TLS session of earlier ones (no
+    HCP needed, but *openssl* to create a self-signed certificate)
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.cert = os.path.join(cls.tmpdir, 'cert.pem')
+        cls.key = os.path.join(cls.tmpdir, 'key.pem')
+        try:
+            subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                            '-nodes', '-subj', '/CN=localhost', '-days', '1',
+                            '-keyout', cls.key, '-out', cls.cert],
+                           check=True, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            cls.cert = None
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        if not self.cert:
+            self.skipTest('unable to create a certificate with openssl')
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_68_tls'
+        servercontext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        servercontext.load_cert_chain(self.cert, self.key)
+        self.em = Emulator(sslcontext=servercontext, seed=0).start()
+        # make the Target use https with the emulator's port
+        hcpsdk.SSL_PORTS.append(self.em.port)
+        clientcontext = ssl.create_default_context()
+        clientcontext.check_hostname = False
+        clientcontext.verify_mode = ssl.CERT_NONE
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True,
+                                       sslcontext=clientcontext)
+
+    def tearDown(self):
+        hcpsdk.SSL_PORTS.remove(self.em.port)
+        self.em.stop()
+
+    def request(self):
+        con = hcpsdk.Connection(self.hcptarget)
+        try:
+            self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+            return con.timings
+        finally:
+            con.close()
+
+    def test_1_10_resumption(self):
+        """
+        Make sure the first Connection does a full handshake, and the
+        following ones resume its TLS session
+        """
+        self.assertTrue(self.hcptarget.ssl)
+        self.assertIsNone(self.hcptarget.metrics.tlshitrate)
+        for i in range(3):
+            self.assertGreater(self.request().tls, 0.0)
+        self.assertIsNotNone(self.hcptarget._tlssession('127.0.0.1'))
+        counters = self.hcptarget.metrics.counters
+        self.assertEqual((counters['tls_handshakes'],
+                          counters['tls_resumptions']), (3, 2))
+        self.assertAlmostEqual(self.hcptarget.metrics.tlshitrate, 2 / 3)
+
+    def test_1_20_failed(self):
+        """
+        Make sure the cached TLS session is dropped if the IP address fails
+        """
+        self.request()
+        con = hcpsdk.Connection(self.hcptarget)
+        con.connect(address='127.0.0.1')
+        con._failed()
+        con.close()
+        self.assertIsNone(self.hcptarget._tlssession('127.0.0.1'))
+        self.request()
+        self.assertEqual(self.hcptarget.metrics.counters['tls_resumptions'],
+                         1)
+
+
+if __name__ == '__main__':
+    unittest.main()
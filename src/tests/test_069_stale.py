@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import socket
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_69_1_Stale(unittest.TestCase):
+    '''
+    Make sure connections closed by HCP while idle are detected before
+    re-use, and HCP's keep-alive interval is learned (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_69_stale'
+        self.min_keepalive = hcpsdk.MIN_KEEPALIVE
+        hcpsdk.MIN_KEEPALIVE = 0.1
+        self.em = Emulator(idletimeout=0.3, seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.retries = []
+        self.hcptarget.hooks.register('on_retry', self.retries.append)
+        self.con = hcpsdk.Connection(self.hcptarget, retries=0)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+        hcpsdk.MIN_KEEPALIVE = self.min_keepalive
+
+    def test_1_10_stale(self):
+        """
+        Make sure a connection closed by HCP is re-opened without a failed
+        Request or a retry
+        """
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIsNone(self.hcptarget.keepalive)
+        time.sleep(0.5)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.retries, [])
+        self.assertEqual(self.em.connections, 2)
+        counters = self.hcptarget.metrics.counters
+        self.assertEqual((counters['stale'], counters['errors']), (1, 0))
+
+    def test_1_20_keepalive(self):
+        """
+        Make sure the keep-alive interval is learned and idle Connections
+        are closed before HCP closes them
+        """
+        self.con.HEAD(self.T_HCPFILE)
+        time.sleep(0.5)
+        self.con.HEAD(self.T_HCPFILE)
+        self.assertAlmostEqual(self.hcptarget.keepalive, 0.5, delta=0.1)
+        time.sleep(0.45)  # > keepalive * KEEPALIVE_MARGIN
+        self.assertIsNone(self.con.con)
+        self.con.HEAD(self.T_HCPFILE)
+        self.assertEqual(self.hcptarget.metrics.counters['stale'], 1)
+        self.assertEqual(self.em.connections, 3)
+
+
+class TestHcpsdk_69_2_StaleFd(unittest.TestCase):
+    '''
+    Make sure stale sockets are detected with file descriptors beyond
+    select()'s FD_SETSIZE, too (no HCP needed)
+    '''
+    def setUp(self):
+        a, self.peer = socket.socketpair()
+        try:
+            fd = os.dup2(a.fileno(), 1500)
+        except OSError as e:
+            self.skipTest('unable to get a file descriptor >= 1024 '
+                          '({})'.format(e))
+        finally:
+            a.close()
+        self.sock = socket.socket(fileno=fd)
+
+    def tearDown(self):
+        self.sock.close()
+        self.peer.close()
+
+    def test_2_10_stale(self):
+        """
+        Make sure an idle socket is fine until the peer closes it
+        """
+        self.assertGreaterEqual(self.sock.fileno(), 1024)
+        self.assertFalse(hcpsdk.httpclient._stale(self.sock))
+        self.peer.close()
+        self.assertTrue(hcpsdk.httpclient._stale(self.sock))
+        self.sock.close()
+        self.assertTrue(hcpsdk.httpclient._stale(self.sock))
+
+
+if __name__ == '__main__':
+    unittest.main()
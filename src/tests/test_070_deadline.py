@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_70_1_Deadline(unittest.TestCase):
+    '''
+    Make sure the timeouts of the single steps and the deadline of a Request
+    are kept (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_70_deadline'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.cons = []
+
+    def tearDown(self):
+        for con in self.cons:
+            con.close()
+        self.em.stop()
+
+    def mkcon(self, **kwargs):
+        con = hcpsdk.Connection(self.hcptarget, **kwargs)
+        self.cons.append(con)
+        return con
+
+    def test_1_10_firstbyte_timeout(self):
+        """
+        Make sure the first byte timeout is separate from the timeout
+        """
+        con = self.mkcon(timeout=5, firstbyte_timeout=0.1)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.em.latency = 0.5
+        s_t = time.perf_counter()
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError):
+            con.HEAD(self.T_HCPFILE)
+        self.assertLess(time.perf_counter() - s_t, 0.4)
+
+    def test_1_20_deadline_covers_retries(self):
+        """
+        Make sure retries don't take longer than the deadline, and the
+        deadline doesn't count as failure of the IP address
+        """
+        self.em.latency = 0.5
+        con = self.mkcon(timeout=0.3, retries=5)
+        s_t = time.perf_counter()
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError) as cm:
+            con.HEAD(self.T_HCPFILE, deadline=0.4)
+        self.assertLess(time.perf_counter() - s_t, 0.6)
+        self.assertIn('deadline exceeded', str(cm.exception))
+        self.assertEqual(self.hcptarget.ipaddrqry.stats['127.0.0.1'].failures,
+                         1)
+
+    def test_1_30_retry_delay(self):
+        """
+        Make sure a retry that wouldn't make it in time is given up
+        """
+        self.em.busyrate = 1.0
+        self.hcptarget = hcpsdk.Target(
+            'localhost', hcpsdk.NativeAuthorization('n', 'n01'),
+            port=self.em.port, dnscache=True,
+            retrypolicy=hcpsdk.RetryPolicy(backoff=1.0, jitter=False,
+                                           statuses=(503,)))
+        con = self.mkcon(retries=3, deadline=0.5)
+        s_t = time.perf_counter()
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError) as cm:
+            con.HEAD(self.T_HCPFILE)
+        self.assertLess(time.perf_counter() - s_t, 0.3)
+        self.assertIn('retry # 1 given up', str(cm.exception))
+
+    def test_1_40_deadline_read(self):
+        """
+        Make sure reading the Response is covered by the deadline
+        """
+        con = self.mkcon()
+        self.assertEqual(con.PUT(self.T_HCPFILE, b'x' * 3 * 2**16).status,
+                         201)
+        self.em.throughput = 2**17  # 0.5 secs per 64 KiB slice
+        con.GET(self.T_HCPFILE, deadline=0.3)
+        with self.assertRaises(hcpsdk.HcpsdkTimeoutError):
+            con.read()
+        # no deadline for the next Request
+        self.em.throughput = 0
+        con.GET(self.T_HCPFILE)
+        self.assertEqual(len(con.read()), 3 * 2**16)
+
+    def test_1_50_reuse(self):
+        """
+        Make sure a deadline doesn't cut the timeout of the next Requests
+        on the same Connection
+        """
+        con = self.mkcon()
+        self.assertEqual(con.HEAD(self.T_HCPFILE, deadline=0.3).status, 404)
+        self.em.latency = 0.5
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertEqual(self.em.connections, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import io
+import random
+import zipfile
+import hcpsdk
+from hcpsdk.download import HcpObjectFile, DownloadError
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_71_1_ObjectFile(unittest.TestCase):
+    '''
+    Make sure HcpObjectFile reads the right bytes, transferring just the
+    blocks needed (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_71_objectfile'
+        self.T_BUF = bytes(random.Random(0).getrandbits(8)
+                           for _ in range(100000))
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        with self.hcptarget.pool.connection() as con:
+            r = con.PUT(self.T_HCPFILE, self.T_BUF)
+        self.assertEqual(r.status, 201)
+
+    def tearDown(self):
+        self.hcptarget.pool.close()
+        self.em.stop()
+
+    def test_1_10_random_access(self):
+        """
+        Make sure seek() and read() return the right bytes, fetching just
+        the blocks holding them
+        """
+        with HcpObjectFile(self.hcptarget, self.T_HCPFILE, blocksize=4096,
+                           readahead=0) as f:
+            self.assertEqual(f.size, len(self.T_BUF))
+            self.assertEqual(f.seek(-22, io.SEEK_END), len(self.T_BUF) - 22)
+            self.assertEqual(f.read(22), self.T_BUF[-22:])
+            self.assertEqual(f.bytes_received, len(self.T_BUF) % 4096)
+            f.seek(5000)
+            self.assertEqual(f.read(10), self.T_BUF[5000:5010])
+            self.assertEqual(f.read(4000), self.T_BUF[5010:9010])
+            self.assertEqual(f.tell(), 9010)
+            self.assertEqual(f.bytes_received, len(self.T_BUF) % 4096 + 8192)
+            self.assertEqual(f.requests, 4)  # HEAD + 3 GETs
+            f.seek(4096)
+            self.assertEqual(f.read(8192), self.T_BUF[4096:12288])
+            self.assertEqual(f.requests, 4)  # served from the cache
+            self.assertEqual(f.read(), self.T_BUF[12288:])
+            self.assertEqual(f.read(10), b'')
+        self.assertTrue(f.closed)
+        with self.assertRaises(ValueError):
+            f.read(1)
+
+    def test_1_20_readahead(self):
+        """
+        Make sure sequential reads fetch blocks ahead
+        """
+        f = HcpObjectFile(self.hcptarget, self.T_HCPFILE, blocksize=1000,
+                          readahead=9, size=len(self.T_BUF))
+        data = bytearray()
+        while True:
+            chunk = f.read(100)
+            if not chunk:
+                break
+            data += chunk
+        self.assertEqual(data, self.T_BUF)
+        # the first read fetches a single block, later ones 10 blocks each
+        self.assertEqual(f.requests, 11)
+        self.assertEqual(f.bytes_received, len(self.T_BUF))
+        self.assertEqual(self.em.connections, 1)
+        f.close()
+
+    def test_1_30_lru(self):
+        """
+        Make sure the least recently used block is evicted from the cache
+        """
+        f = HcpObjectFile(self.hcptarget, self.T_HCPFILE, blocksize=1000,
+                          readahead=0, cachesize=2)
+        for offset in (0, 1000, 0, 2000, 0, 1000):
+            f.seek(offset)
+            self.assertEqual(f.read(10), self.T_BUF[offset:offset + 10])
+        self.assertEqual((f.hits, f.misses), (2, 4))
+        f.close()
+
+    def test_1_40_zipfile(self):
+        """
+        Make sure a single member can be read from a zip archive
+        """
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as z:
+            for i in range(10):
+                z.writestr('m{}'.format(i), self.T_BUF[i * 10000:])
+        with self.hcptarget.pool.connection() as con:
+            self.assertEqual(con.PUT(self.T_HCPFILE + '.zip',
+                                     buf.getvalue()).status, 201)
+        f = HcpObjectFile(self.hcptarget, self.T_HCPFILE + '.zip',
+                          blocksize=4096)
+        with zipfile.ZipFile(f) as z:
+            self.assertEqual(z.read('m9'), self.T_BUF[90000:])
+        self.assertLess(f.bytes_received, len(buf.getvalue()) / 10)
+        f.close()
+
+    def test_1_50_missing(self):
+        """
+        Make sure we fail on a missing object
+        """
+        with self.assertRaises(DownloadError):
+            HcpObjectFile(self.hcptarget, self.T_HCPFILE + '_missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
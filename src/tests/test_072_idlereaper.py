@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import time
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class _Con(object):
+    """
+    Stands in for a Connection, recording the idle timeouts.
+    """
+
+    def __init__(self):
+        self.timedout = []
+
+    def _idletimeout(self, entry):
+        self.timedout.append(entry)
+
+
+def waitfor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestHcpsdk_72_1_IdleReaper(unittest.TestCase):
+    '''
+    Make sure the idle reaper closes idle Connections, skips re-used ones
+    and ends its thread when there is nothing left to do (no HCP needed)
+    '''
+    def setUp(self):
+        # noinspection PyProtectedMember
+        self.reaper = hcpsdk._IdleReaper(linger=0.2)
+
+    def test_1_10_timeout(self):
+        """
+        Make sure a Connection is timed out after its idletime
+        """
+        con = _Con()
+        s_t = time.monotonic()
+        entry = self.reaper.schedule(con, 0.2)
+        self.assertTrue(waitfor(lambda: con.timedout))
+        self.assertGreaterEqual(time.monotonic() - s_t, 0.2)
+        self.assertEqual(con.timedout, [entry])
+        self.assertEqual(len(self.reaper), 0)
+
+    def test_1_20_canceled(self):
+        """
+        Make sure a re-used Connection isn't timed out by the stale entry
+        left in the heap
+        """
+        con = _Con()
+        entry = self.reaper.schedule(con, 0.1)
+        self.reaper.cancel(entry)  # the Connection is re-used...
+        entry = self.reaper.schedule(con, 0.5)  # ...and idle again
+        self.assertEqual(len(self.reaper), 1)
+        time.sleep(0.3)
+        self.assertEqual(con.timedout, [])
+        self.assertTrue(waitfor(lambda: con.timedout))
+        self.assertEqual(con.timedout, [entry])
+
+    def test_1_30_thread_exits(self):
+        """
+        Make sure the reaper thread exits when no Connection is left, and
+        is restarted when needed again
+        """
+        self.assertFalse(self.reaper.alive)
+        con = _Con()
+        self.reaper.cancel(self.reaper.schedule(con, 0.1))
+        self.assertTrue(self.reaper.alive)
+        self.assertTrue(waitfor(lambda: not self.reaper.alive))
+        self.reaper.schedule(con, 0.1)
+        self.assertTrue(self.reaper.alive)
+        self.assertTrue(waitfor(lambda: con.timedout))
+        self.assertTrue(waitfor(lambda: not self.reaper.alive))
+        self.assertEqual(con.timedout[0][2], None)
+
+
+class TestHcpsdk_72_2_IdleConnection(unittest.TestCase):
+    '''
+    Make sure idle Connections are closed by the process-wide idle reaper
+    (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_72_idle'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+
+    def tearDown(self):
+        self.em.stop()
+
+    def test_2_10_idle(self):
+        """
+        Make sure an idle Connection is closed after idletime
+        """
+        con = hcpsdk.Connection(self.hcptarget, idletime=0.2)
+        self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+        self.assertIsNotNone(con.con)
+        self.assertTrue(waitfor(lambda: con.con is None))
+        con.close()
+
+    def test_2_20_reused(self):
+        """
+        Make sure a Connection re-used within idletime isn't closed
+        """
+        con = hcpsdk.Connection(self.hcptarget, idletime=0.4)
+        for i in range(4):
+            self.assertEqual(con.HEAD(self.T_HCPFILE).status, 404)
+            time.sleep(0.2)
+        self.assertIsNotNone(con.con)
+        self.assertEqual(self.em.connections, 1)
+        con.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import io
+import ssl
+import shutil
+import socket
+import subprocess
+import tempfile
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+from unittest import mock
+
+
+class TestHcpsdk_73_1_FileBody(unittest.TestCase):
+    '''
+    Make sure file bodies are sent completely and with a Content-Length,
+    using sendfile() with http (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_73_filebody'
+        self.T_BUF = os.urandom(3 * 2**20 + 5)
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.con = hcpsdk.Connection(self.hcptarget, blocksize=2**16)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def put(self, body, url=None):
+        url = url or self.T_HCPFILE
+        r = self.con.PUT(url, body)
+        self.assertEqual(r.status, 201)
+        return self.em.store[url].data
+
+    def test_1_10_sendfile(self):
+        """
+        Make sure a file is sent using sendfile(), from its current position
+        """
+        with tempfile.TemporaryFile() as f:
+            f.write(self.T_BUF)
+            f.seek(100)
+            with mock.patch('socket.socket.sendfile', autospec=True,
+                            side_effect=socket.socket.sendfile) as sendfile:
+                self.assertEqual(self.put(f), self.T_BUF[100:])
+            self.assertEqual(sendfile.call_count, 1)
+            self.assertEqual(f.tell(), len(self.T_BUF))
+        self.assertEqual(self.hcptarget.metrics.counters['bytes_sent'],
+                         len(self.T_BUF) - 100)
+
+    def test_1_20_seekable(self):
+        """
+        Make sure an in-memory stream is sent from its current position
+        """
+        body = io.BytesIO(self.T_BUF)
+        body.seek(10)
+        self.assertEqual(self.put(body), self.T_BUF[10:])
+
+    def test_1_30_unseekable(self):
+        """
+        Make sure a stream that can't be sized is sent (chunked)
+        """
+        r, w = os.pipe()
+        with os.fdopen(r, 'rb') as pipe:
+            with os.fdopen(w, 'wb') as f:
+                f.write(self.T_BUF[:2**15])
+            self.assertEqual(self.put(pipe), self.T_BUF[:2**15])
+
+    def test_1_40_retry(self):
+        """
+        Make sure a file body is sent from its start again on a retry
+        """
+        self.con.close()
+        self.con = hcpsdk.Connection(self.hcptarget, retries=5)
+        self.em.resetrate = 0.5
+        with tempfile.TemporaryFile() as f:
+            f.write(self.T_BUF)
+            for i in range(4):
+                f.seek(i)
+                url = '{}_{}'.format(self.T_HCPFILE, i)
+                self.assertEqual(self.put(f, url), self.T_BUF[i:])
+        self.assertGreater(self.em.resets, 0)
+
+
+class TestHcpsdk_73_2_FileBodyTls(unittest.TestCase):
+    '''
+    Make sure file bodies are sent completely from a memory map with https
+    (no HCP needed, but *openssl* to create a self-signed certificate)
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.cert = os.path.join(cls.tmpdir, 'cert.pem')
+        cls.key = os.path.join(cls.tmpdir, 'key.pem')
+        try:
+            subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                            '-nodes', '-subj', '/CN=localhost', '-days', '1',
+                            '-keyout', cls.key, '-out', cls.cert],
+                           check=True, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            cls.cert = None
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        if not self.cert:
+            self.skipTest('unable to create a certificate with openssl')
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_73_filebody_tls'
+        servercontext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        servercontext.load_cert_chain(self.cert, self.key)
+        self.em = Emulator(sslcontext=servercontext, seed=0).start()
+        # make the Target use https with the emulator's port
+        hcpsdk.SSL_PORTS.append(self.em.port)
+        clientcontext = ssl.create_default_context()
+        clientcontext.check_hostname = False
+        clientcontext.verify_mode = ssl.CERT_NONE
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True,
+                                       sslcontext=clientcontext)
+
+    def tearDown(self):
+        hcpsdk.SSL_PORTS.remove(self.em.port)
+        self.em.stop()
+
+    def test_2_10_mmap(self):
+        """
+        Make sure a file is sent in blocks from a memory map
+        """
+        T_BUF = os.urandom(2**20 + 7)
+        con = hcpsdk.Connection(self.hcptarget, blocksize=2**16)
+        with tempfile.TemporaryFile() as f:
+            f.write(T_BUF)
+            f.seek(7)
+            with mock.patch('mmap.mmap', wraps=__import__('mmap').mmap) as m:
+                r = con.PUT(self.T_HCPFILE, f)
+            self.assertEqual(m.call_count, 1)
+        con.close()
+        self.assertEqual(r.status, 201)
+        self.assertEqual(self.em.store[self.T_HCPFILE].data, T_BUF[7:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_74_1_ReadInto(unittest.TestCase):
+    '''
+    Make sure Responses can be read into caller buffers and chunk by chunk
+    (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_74_readinto'
+        self.T_BUF = os.urandom(2**20 + 3)
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.con = hcpsdk.Connection(self.hcptarget)
+        self.assertEqual(self.con.PUT(self.T_HCPFILE, self.T_BUF).status, 201)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_1_10_readinto(self):
+        """
+        Make sure readinto() fills the caller's buffer, signals the end of
+        the Response by 0 and leaves the Connection ready for re-use
+        """
+        self.assertEqual(self.con.GET(self.T_HCPFILE).status, 200)
+        buf = bytearray(len(self.T_BUF) + 10)
+        with memoryview(buf) as view:
+            got = 0
+            while True:
+                n = self.con.readinto(view[got:got + 2**16])
+                if not n:
+                    break
+                self.assertLessEqual(n, 2**16)
+                got += n
+        self.assertEqual(got, len(self.T_BUF))
+        self.assertEqual(bytes(buf[:got]), self.T_BUF)
+        self.assertEqual(buf[got:], bytearray(10))
+        self.assertTrue(self.con.response.isclosed())
+        self.assertEqual(self.hcptarget.metrics.counters['bytes_received'],
+                         len(self.T_BUF))
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+        self.assertEqual(self.em.connections, 1)
+
+    def test_1_20_iter_chunks(self):
+        """
+        Make sure iter_chunks() yields views of a single, re-used buffer
+        """
+        self.assertEqual(self.con.GET(self.T_HCPFILE).status, 200)
+        buf = bytearray()
+        buffers = set()
+        for chunk in self.con.iter_chunks(2**16):
+            self.assertIsInstance(chunk, memoryview)
+            self.assertLessEqual(len(chunk), 2**16)
+            buffers.add(id(chunk.obj))
+            buf += chunk
+        self.assertEqual(buf, self.T_BUF)
+        self.assertEqual(len(buffers), 1)
+        self.assertEqual(self.con.HEAD(self.T_HCPFILE).status, 200)
+
+    def test_1_30_no_response(self):
+        """
+        Make sure readinto() fails if there is no Response to read from
+        """
+        con = hcpsdk.Connection(self.hcptarget)
+        with self.assertRaises(hcpsdk.HcpsdkError):
+            con.readinto(bytearray(10))
+        con.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
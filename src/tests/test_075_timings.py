@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+
+
+class TestHcpsdk_75_1_Timings(unittest.TestCase):
+    '''
+    Make sure the phases of a Request are timed (no HCP needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_75_timings'
+        self.em = Emulator(latency=0.1, seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.timings = []
+        self.con = hcpsdk.Connection(self.hcptarget, retries=3,
+                                     ontimings=self.timings.append)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_1_10_phases(self):
+        """
+        Make sure the connect is timed for the first Request only, and the
+        latency shows up as time to first byte
+        """
+        self.con.PUT(self.T_HCPFILE, b'x' * 2**16)
+        t = self.con.timings
+        self.assertEqual((t.method, t.url, t.address),
+                         ('PUT', self.T_HCPFILE, '127.0.0.1'))
+        self.assertGreater(t.connect, 0.0)
+        self.assertEqual(t.tls, 0.0)
+        self.assertAlmostEqual(self.con.connect_time, t.connect)
+        self.assertGreaterEqual(t.ttfb, 0.1)
+        self.con.GET(self.T_HCPFILE)
+        self.assertEqual(len(self.con.read()), 2**16)
+        t = self.con.timings
+        self.assertEqual(t.connect, 0.0)
+        self.assertGreaterEqual(t.ttfb, 0.1)
+        self.assertGreater(t.transfer, 0.0)
+        self.assertLess(t.send, t.ttfb)
+        self.assertAlmostEqual(t.total, t.send + t.ttfb + t.transfer +
+                               t.acquire)
+
+    def test_1_20_callback(self):
+        """
+        Make sure the callback is called once per completed Request
+        """
+        self.con.PUT(self.T_HCPFILE, b'x' * 2**16)
+        self.con.GET(self.T_HCPFILE)
+        self.assertEqual(len(self.timings), 1)
+        self.con.read()
+        self.con.HEAD(self.T_HCPFILE)
+        self.assertEqual([t.method for t in self.timings],
+                         ['PUT', 'GET', 'HEAD'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2018 Thorsten Simons (sw@snomis.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+import hcpsdk
+from hcpsdk.emulator import Emulator
+import unittest
+from urllib.parse import quote
+
+
+class TestHcpsdk_76_1_Preparation(unittest.TestCase):
+    '''
+    Make sure the Request preparation fast path behaves like before (no HCP
+    needed)
+    '''
+    def setUp(self):
+        self.T_HCPFILE = '/rest/hcpsdk/TestHCPsdk_76_preparation'
+        self.em = Emulator(seed=0).start()
+        self.hcptarget = hcpsdk.Target('localhost',
+                                       hcpsdk.NativeAuthorization('n', 'n01'),
+                                       port=self.em.port, dnscache=True)
+        self.con = hcpsdk.Connection(self.hcptarget)
+
+    def tearDown(self):
+        self.con.close()
+        self.em.stop()
+
+    def test_1_10_quoteurl(self):
+        """
+        Make sure urls are quoted only if necessary, and quoted the same way
+        as quote() does
+        """
+        for url in ['/rest/a/b', '/rest/a/b%20c', '', 'x']:
+            self.assertEqual(hcpsdk._quoteurl(url), (url, False))
+        for url in ['/rest/ä/b', '/rest/a b/c', '/rest/a/b c', 'x y',
+                    '/rest/a:/b/', '/rest/(x)/y?z']:
+            self.assertEqual(hcpsdk._quoteurl(url), (quote(url), True))
+
+    def test_1_15_isascii(self):
+        """
+        Make sure the ascii check used with Python < 3.7 agrees with
+        str.isascii()
+        """
+        for url in ['/rest/a/b', '', '/rest/ä/b', '/rest/\x7f', '/rest/\x80',
+                    '/rest/\u20ac']:
+            self.assertEqual(hcpsdk._encodesascii(url), url.isascii())
+
+    def test_1_20_headers(self):
+        """
+        Make sure the Target's headers are built once, and the caller's
+        headers are left alone
+        """
+        self.assertIs(self.hcptarget._baseheaders,
+                      self.hcptarget._baseheaders)
+        self.assertEqual(self.hcptarget.headers,
+                         dict(self.hcptarget._baseheaders))
+        self.assertIsNot(self.hcptarget.headers, self.hcptarget.headers)
+        headers = {'X-Test': 'yes'}
+        self.con.PUT(self.T_HCPFILE, b'x' * 1024, headers=headers)
+        self.assertEqual(self.con.response_status, 201)
+        self.assertEqual(headers, {'X-Test': 'yes'})
+
+
+if __name__ == '__main__':
+    unittest.main()